@@ -34,9 +34,24 @@ import threading
 import traceback
 import queue
 import sys
+import tempfile
+import collections
+import concurrent.futures
+import hashlib
+import contextlib
+import time
+import posixpath
+import struct
+import subprocess
+import importlib.util
+import fnmatch
+import re
+import multiprocessing
 
 THEMES_DIR_NAME = "ventoy/theme"
 VENTOY_JSON_PATH = "ventoy/ventoy.json"
+VENTOY_JSON_TMP_SUFFIX = ".tmp"
+VENTOY_JSON_BACKUP_SUFFIX = ".bak"
 OUTER_PADDING = 10
 SECTION_SPACING = 5
 TITLE_SPACING = 5
@@ -46,6 +61,82 @@ BUTTON_GROUP_SPACING = 5
 LARGE_SECTION_SPACING = 40
 DRIVE_REMOVABLE = 2
 DRIVE_FIXED = 3
+INSTALL_WORKERS = max(1, min(4, os.cpu_count() or 1))
+INSTALL_STAGING_WINDOW = INSTALL_WORKERS + 1
+STAGING_DIR_PREFIX = "VentoyThemer_stage_"
+COMMIT_BUFFER_SIZE = 4 * 1024 * 1024
+DELETE_WORKERS = 4
+EXTRACT_WORKERS = max(1, min(8, os.cpu_count() or 1))
+PARALLEL_EXTRACT_MIN_MEMBERS = 8
+PARALLEL_EXTRACT_WINDOW_BYTES = 64 * 1024 * 1024
+PARALLEL_EXTRACT_MAX_MEMBER_BYTES = 16 * 1024 * 1024
+DELETE_BATCH_SIZE = 64
+EXTRACTION_CACHE_MAX_BYTES = 2 * 1024**3
+EXTRACTION_CACHE_TREE_NAME = "tree"
+EXTRACTION_CACHE_META_NAME = "entry.json"
+CACHE_HASH_CHUNK_SIZE = 1024 * 1024
+PROGRESS_REPORT_INTERVAL = 0.25
+UI_PUMP_INTERVAL_MS = 50
+THEME_PARTIAL_SUFFIX = ".partial"
+THEME_BACKUP_SUFFIX = ".backup"
+SYNC_MTIME_TOLERANCE = 2
+DEFAULT_CLUSTER_SIZE = 32 * 1024
+FAT32_MAX_FILE_SIZE = 4 * 1024**3 - 1
+FAT32_FILESYSTEMS = ("FAT32", "FAT", "VFAT", "MSDOS")
+MAX_INSTALL_PATH_LENGTH = 259
+PREFLIGHT_RESERVE_BYTES = 1024 * 1024
+DRIVE_INVENTORY_TTL = 30
+DRIVE_MOUNT_POLL_INTERVAL = 2
+VENTOY_DATA_LABEL = "VENTOY"
+VENTOY_EFI_LABEL = "VTOYEFI"
+VENTOY_DETECT_WORKERS = 8
+IOCTL_STORAGE_GET_DEVICE_NUMBER = 0x2D1080
+SYNC_MODE_METADATA = "metadata"
+SYNC_MODE_HASH = "hash"
+ARCHIVE_EXTENSIONS = (".zip", ".zipx", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".xz", ".tar.xz",
+                      ".lz4", ".tar.lz4", ".zst", ".tar.zst", ".7z", ".rar")
+ARCHIVE_MAGIC = (
+    (b"PK\x03\x04", "zip"), (b"PK\x05\x06", "zip"), (b"PK\x07\x08", "zip"),
+    (b"7z\xbc\xaf\x27\x1c", "7z"),
+    (b"Rar!\x1a\x07", "rar"),
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bzip2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x04\x22\x4d\x18", "lz4"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+)
+TAR_MAGIC = b"ustar"
+TAR_MAGIC_OFFSET = 257
+THEME_FONT_EXTENSIONS = (".pf2",)
+THEME_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tga")
+THEME_MEMBER_ALLOW_PATTERNS = ("*.pf2", "icons/*", "license*", "copying*")
+THEME_MEMBER_SKIP_PATTERNS = ("__macosx/*", ".git/*", ".svn/*", "._*", ".ds_store", "thumbs.db", "desktop.ini",
+                              "*.psd", "*.psb", "*.xcf", "*.kra", "*.ai", "*.eps", "*.svg", "*.svgz", "*.blend",
+                              "readme*", "*.md", "*.rst", "*.pdf", "*.htm", "*.html", "*.url",
+                              "*.sh", "*.bat", "*.cmd", "*.ps1", "*.py") + tuple("*" + ext for ext in ARCHIVE_EXTENSIONS)
+IMAGE_OPTIMIZE_WORKERS = max(1, min(4, os.cpu_count() or 1))
+IMAGE_OPTIMIZE_MIN_BYTES = 4 * 1024
+IMAGE_OPTIMIZE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+IMAGE_JPEG_QUALITY = 90
+GFXMODE_RE = re.compile(r'^\s*(\d+)\s*[x\u00d7]\s*(\d+)')
+THEME_IDENTIFIER_RE = re.compile(r'[A-Za-z0-9_-]+')
+THEME_WORD_RE = re.compile(r'\S*')
+THEME_IMAGE_PROPERTIES = ("desktop-image", "file", "center_bitmap", "tick_bitmap")
+THEME_STYLE_PROPERTIES = ("terminal-box", "menu_pixmap_style", "item_pixmap_style", "selected_item_pixmap_style",
+                          "scrollbar_frame", "scrollbar_thumb", "bar_style", "highlight_style")
+THEME_FONT_PROPERTIES = ("title-font", "message-font", "terminal-font", "font", "item_font", "selected_item_font")
+THEME_STYLE_BOX_PARTS = ("nw", "n", "ne", "w", "c", "e", "sw", "s", "se")
+THEME_ICONS_DIR = "icons"
+THEME_GRAPH_CACHE_SIZE = 256
+THEME_CHECK_REPORT_LINES = 10
+PF2_MAGIC = b"PFF2"
+PF2_HEADER_BYTES = 1024
+# Ventoy loads GRUB's unicode.pf2 itself, so themes may use it without shipping it.
+VENTOY_FONT_NAMES = ("Unifont Regular 16",)
+RESOLUTIONS = [
+    "max", "3840x2160", "2560x1440", "1920x1080", "1680x1050", "1600×900",
+    "1440x900", "1280x1024", "1280x960", "1024x768", "800x600"
+]
 
 def get_drive_label(drive):
     try:
@@ -53,6 +144,19 @@ def get_drive_label(drive):
     except Exception:
         return ""
 
+def get_drive_filesystem(drive):
+    try:
+        return win32api.GetVolumeInformation(drive)[4]
+    except Exception:
+        return ""
+
+def get_drive_cluster_size(drive):
+    try:
+        sectors_per_cluster, bytes_per_sector, _, _ = win32api.GetDiskFreeSpace(drive)
+        return sectors_per_cluster * bytes_per_sector
+    except Exception:
+        return DEFAULT_CLUSTER_SIZE
+
 def get_drive_size(drive):
     try:
         total, _, _ = shutil.disk_usage(drive)
@@ -74,27 +178,102 @@ def get_drive_description(drive):
     except Exception:
         return "Drive"
 
-def list_drives_display():
-    drives = []
+def list_drive_roots():
+    roots = []
+    for part in psutil.disk_partitions(all=False):
+        drive = part.device
+        if not drive.endswith("\\"):
+            drive += "\\"
+        roots.append(drive)
+    return roots
+
+def describe_drive(drive):
+    """Returns the drop-down text for a drive root, or None unless it is a removable or fixed disk."""
     try:
-        for part in psutil.disk_partitions(all=False):
-            drive = part.device
-            if not drive.endswith("\\"):
-                drive += "\\"
+        drive_type = win32file.GetDriveType(drive)
+    except Exception:
+        drive_type = 0
+
+    if drive_type in [DRIVE_REMOVABLE, DRIVE_FIXED] and os.path.exists(drive):
+        size = get_drive_size(drive)
+        label = get_drive_label(drive)
+
+        if not label:
+            label = get_drive_description(drive)
+
+        return f"{drive} [{size}] {label}"
+    return None
+
+def get_drive_disk_number(drive):
+    """Returns the number of the physical disk a drive letter lives on, or None."""
+    try:
+        handle = win32file.CreateFile("\\\\.\\" + drive.rstrip("\\/"), 0,
+                                      win32file.FILE_SHARE_READ | win32file.FILE_SHARE_WRITE,
+                                      None, win32file.OPEN_EXISTING, 0, None)
+        try:
+            device_info = win32file.DeviceIoControl(handle, IOCTL_STORAGE_GET_DEVICE_NUMBER, None, 12)
+        finally:
+            handle.Close()
+        return struct.unpack("<LLL", device_info)[1]
+    except Exception:
+        return None
 
-            try:
-                drive_type = win32file.GetDriveType(drive)
-            except Exception:
-                drive_type = 0
 
-            if drive_type in [DRIVE_REMOVABLE, DRIVE_FIXED] and os.path.exists(drive):
-                size = get_drive_size(drive)
-                label = get_drive_label(drive)
+class VentoyDetector:
+    """Tells Ventoy data partitions apart from other drives; positive verdicts are cached per volume serial."""
 
-                if not label:
-                    label = get_drive_description(drive)
+    def __init__(self, workers=VENTOY_DETECT_WORKERS):
+        self.workers = workers
+        self._verdicts = {}
+        self._lock = threading.Lock()
 
-                display = f"{drive} [{size}] {label}"
+    def _probe(self, drive):
+        try:
+            label, serial = win32api.GetVolumeInformation(drive)[:2]
+        except Exception:
+            label, serial = "", None
+        if (label or "").upper() == VENTOY_EFI_LABEL:
+            return label, serial, False, get_drive_disk_number(drive)
+        with self._lock:
+            cached = self._verdicts.get(serial) if serial else None
+        if cached:
+            return label, serial, True, None
+        has_layout = os.path.isdir(os.path.join(drive, "ventoy"))
+        return label, serial, has_layout or (label or "").upper() == VENTOY_DATA_LABEL, get_drive_disk_number(drive)
+
+    def detect(self, drives):
+        """Returns {drive: True if it is a Ventoy data partition} for the given drive roots."""
+        drives = list(drives)
+        if not drives:
+            return {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.workers, len(drives))) as executor:
+            probes = dict(zip(drives, executor.map(self._probe, drives)))
+        efi_disks = {disk for label, _, _, disk in probes.values()
+                     if disk is not None and (label or "").upper() == VENTOY_EFI_LABEL}
+        verdicts = {}
+        with self._lock:
+            for drive, (label, serial, is_ventoy, disk) in probes.items():
+                if not is_ventoy and disk is not None and disk in efi_disks and (label or "").upper() != VENTOY_EFI_LABEL:
+                    is_ventoy = True
+                if serial and is_ventoy:
+                    self._verdicts[serial] = True
+                verdicts[drive] = is_ventoy
+        return verdicts
+
+    def is_ventoy(self, drive):
+        return self.detect([drive]).get(drive, False)
+
+
+def list_drives_display(ventoy_only=True, detector=None):
+    drives = []
+    try:
+        roots = list_drive_roots()
+        if ventoy_only:
+            verdicts = (detector or VentoyDetector()).detect(roots)
+            roots = [drive for drive in roots if verdicts.get(drive)]
+        for drive in roots:
+            display = describe_drive(drive)
+            if display:
                 drives.append(display)
 
     except Exception as e:
@@ -104,50 +283,3305 @@ def list_drives_display():
     return drives
 
 
+class DriveInventory:
+    """Cached list of the drives offered for selection, refreshed from a background thread."""
+
+    def __init__(self, ttl=DRIVE_INVENTORY_TTL, poll_interval=DRIVE_MOUNT_POLL_INTERVAL, on_change=None,
+                 ventoy_only=True, detector=None):
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.on_change = on_change
+        self.ventoy_only = ventoy_only
+        self.detector = detector or VentoyDetector()
+        self._roots = None
+        self._entries = {}
+        self._displays = []
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="DriveInventory", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            if not self._stopped:
+                self.refresh()
+
+    def request_refresh(self):
+        self._wake.set()
+
+    def displays(self):
+        """Returns the cached drive list; only the first call scans synchronously."""
+        with self._lock:
+            scanned = self._roots is not None
+        if scanned and self._thread is not None:
+            self.request_refresh()
+        else:
+            self.refresh()
+        with self._lock:
+            return list(self._displays)
+
+    def refresh(self, force=False):
+        with self._refresh_lock:
+            try:
+                roots = list_drive_roots()
+            except Exception as e:
+                print(f"Error listing drives: {e}")
+                return
+            now = time.monotonic()
+            with self._lock:
+                mount_changed = roots != self._roots
+                stale = [root for root in roots
+                         if force or root not in self._entries or now - self._entries[root][1] > self.ttl]
+            if not mount_changed and not stale:
+                return
+
+            verdicts = self.detector.detect(roots) if self.ventoy_only else {}
+            probed = {}
+            for root in stale:
+                if self.ventoy_only and not verdicts.get(root):
+                    probed[root] = None
+                else:
+                    probed[root] = describe_drive(root)
+            with self._lock:
+                for root, display in probed.items():
+                    self._entries[root] = (display, now)
+                for root in list(self._entries):
+                    if root not in roots:
+                        del self._entries[root]
+                self._roots = roots
+                displays = sorted(display for display, _ in self._entries.values() if display)
+                changed = displays != self._displays
+                self._displays = displays
+            if changed and self.on_change:
+                self.on_change(list(displays))
+
+
+class TaskCancelled(BaseException):
+    """Raised at a cancellation check point; derives from BaseException so `except Exception` lets it through."""
+
+
+class CancelToken:
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._running.set()
+
+    def pause(self):
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def check(self):
+        self._running.wait()
+        if self._cancelled.is_set():
+            raise TaskCancelled()
+
+
+class TreeDeleter:
+    """Deletes several directory trees as one job, unlinking files from a small thread pool."""
+
+    def __init__(self, roots, workers=DELETE_WORKERS, on_file=None, cancel_token=None):
+        self.roots = list(roots)
+        self.workers = workers
+        self.on_file = on_file
+        self.cancel_token = cancel_token
+        self.files = []
+        self.dirs = []
+        self.errors = {}
+
+    def scan(self):
+        """Lists every file and directory below the roots; returns the file count."""
+        for root in self.roots:
+            try:
+                self._scan_root(root)
+            except OSError as e:
+                self.errors[root] = e
+        return len(self.files)
+
+    def _scan_root(self, root):
+        pending = [(root, 0)]
+        found_files = []
+        found_dirs = [(0, root, root)]
+        while pending:
+            dir_path, depth = pending.pop()
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append((entry.path, depth + 1))
+                        found_dirs.append((depth + 1, entry.path, root))
+                    else:
+                        found_files.append((entry.path, root))
+        self.files.extend(found_files)
+        self.dirs.extend(found_dirs)
+
+    def run(self):
+        """Deletes the roots; returns {root: first error} for those not removed completely."""
+        if not self.files and not self.dirs:
+            self.scan()
+        batches = [self.files[i:i + DELETE_BATCH_SIZE] for i in range(0, len(self.files), DELETE_BATCH_SIZE)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self._unlink_batch, batch) for batch in batches]
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        for depth, dir_path, root in sorted(self.dirs, key=lambda item: item[0], reverse=True):
+            try:
+                os.rmdir(dir_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.errors.setdefault(root, e)
+        return self.errors
+
+    def _unlink_batch(self, batch):
+        for path, root in batch:
+            if self.cancel_token:
+                self.cancel_token.check()
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.errors.setdefault(root, e)
+                continue
+            if self.on_file:
+                self.on_file()
+
+
+def list_tree(root_dir):
+    """Returns the sorted relative directory and file paths below root_dir."""
+    dir_paths = []
+    file_paths = []
+    for root, dirs, files in os.walk(root_dir):
+        dirs.sort()
+        rel_root = os.path.relpath(root, root_dir)
+        dir_paths.extend(os.path.normpath(os.path.join(rel_root, d)) for d in dirs)
+        file_paths.extend(os.path.normpath(os.path.join(rel_root, f)) for f in sorted(files))
+    return dir_paths, file_paths
+
+
+def copy_file_chunked(src_path, dest_path, buffer_size=COMMIT_BUFFER_SIZE, on_bytes=None, cancel_token=None):
+    """Copies one file with a large unbuffered write, keeping its mtime; returns the bytes copied."""
+    copied = 0
+    with open(src_path, 'rb') as f_in, open(dest_path, 'wb', buffering=0) as f_out:
+        while True:
+            if cancel_token:
+                cancel_token.check()
+            chunk = f_in.read(buffer_size)
+            if not chunk:
+                break
+            f_out.write(chunk)
+            copied += len(chunk)
+            if on_bytes:
+                on_bytes(len(chunk))
+    mtime = os.path.getmtime(src_path)
+    os.utime(dest_path, (mtime, mtime))
+    return copied
+
+
+def file_digest(path, cancel_token=None):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CACHE_HASH_CHUNK_SIZE), b""):
+            if cancel_token:
+                cancel_token.check()
+            digest.update(chunk)
+    return digest.digest()
+
+
+def commit_staged_tree(src_dir, dest_dir, buffer_size=COMMIT_BUFFER_SIZE, on_bytes=None, cancel_token=None):
+    """Copies a staged theme tree to the drive in one sequential pass; returns (files, bytes) written."""
+    dirs_to_create, files_to_copy = list_tree(src_dir)
+
+    os.makedirs(dest_dir, exist_ok=True)
+    for rel_dir in dirs_to_create:
+        os.makedirs(os.path.join(dest_dir, rel_dir), exist_ok=True)
+
+    total_bytes = 0
+    for rel_file in files_to_copy:
+        total_bytes += copy_file_chunked(os.path.join(src_dir, rel_file), os.path.join(dest_dir, rel_file),
+                                         buffer_size, on_bytes, cancel_token)
+    return len(files_to_copy), total_bytes
+
+
+class SyncPlan:
+    """The changes plan_tree_sync found between a source tree and an installed theme."""
+
+    def __init__(self, dirs):
+        self.dirs = dirs
+        self.to_write = []
+        self.to_touch = []
+        self.to_delete = []
+        self.stale_dirs = []
+        self.unchanged = 0
+
+
+def plan_tree_sync(src_dir, dest_dir, verify_hash=False, cancel_token=None):
+    """Compares a source tree with the installed one; returns a SyncPlan, or None if they cannot be synced."""
+    src_dirs, src_files = list_tree(src_dir)
+    dest_dirs, dest_files = list_tree(dest_dir)
+    if set(src_dirs) & set(dest_files) or set(src_files) & set(dest_dirs):
+        return None
+
+    plan = SyncPlan(src_dirs)
+    dest_file_set = set(dest_files)
+    for rel_file in src_files:
+        if cancel_token:
+            cancel_token.check()
+        src_path = os.path.join(src_dir, rel_file)
+        dest_path = os.path.join(dest_dir, rel_file)
+        if rel_file not in dest_file_set:
+            plan.to_write.append(rel_file)
+            continue
+        src_stat = os.stat(src_path)
+        dest_stat = os.stat(dest_path)
+        if src_stat.st_size != dest_stat.st_size:
+            plan.to_write.append(rel_file)
+        elif abs(src_stat.st_mtime - dest_stat.st_mtime) <= SYNC_MTIME_TOLERANCE:
+            plan.unchanged += 1
+        elif verify_hash and file_digest(src_path, cancel_token) == file_digest(dest_path, cancel_token):
+            plan.unchanged += 1
+            plan.to_touch.append(rel_file)
+        else:
+            plan.to_write.append(rel_file)
+    src_file_set = set(src_files)
+    plan.to_delete = [rel_file for rel_file in dest_files if rel_file not in src_file_set]
+    src_dir_set = set(src_dirs)
+    plan.stale_dirs = sorted((rel_dir for rel_dir in dest_dirs if rel_dir not in src_dir_set), reverse=True)
+    return plan
+
+
+class TransferMeter:
+    """Thread-safe byte counter with throughput, ETA and rate-limited progress updates."""
+
+    def __init__(self, total_bytes, report_interval=PROGRESS_REPORT_INTERVAL):
+        self.total_bytes = total_bytes
+        self.done_bytes = 0
+        self.report_interval = report_interval
+        self._start = time.monotonic()
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, byte_count):
+        with self._lock:
+            self.done_bytes += byte_count
+
+    def percent(self):
+        with self._lock:
+            if self.total_bytes <= 0:
+                return 100
+            return min(100, 100 * self.done_bytes / self.total_bytes)
+
+    def rate(self):
+        elapsed = time.monotonic() - self._start
+        with self._lock:
+            return self.done_bytes / elapsed if elapsed > 0 else 0.0
+
+    def eta(self):
+        rate = self.rate()
+        with self._lock:
+            remaining = self.total_bytes - self.done_bytes
+        if rate <= 0 or remaining <= 0:
+            return None
+        return remaining / rate
+
+    def due(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_report < self.report_interval:
+                return False
+            self._last_report = now
+            return True
+
+    def describe(self):
+        text = f"{self.rate() / (1024 * 1024):.1f} MB/s"
+        eta = self.eta()
+        if eta is not None:
+            minutes, seconds = divmod(int(eta + 0.5), 60)
+            text += f", ETA {minutes}:{seconds:02d}"
+        return text
+
+
+class UiBus:
+    """Queues calls and per-tab status updates from worker threads for the Tk thread to apply."""
+
+    def __init__(self):
+        self._calls = queue.Queue()
+        self._status_lock = threading.Lock()
+        self._pending_status = {}
+
+    def post(self, fn, *args):
+        self._calls.put((fn, args))
+
+    def post_status(self, tab_index, message, progress=None):
+        with self._status_lock:
+            pending = self._pending_status.get(tab_index)
+            if progress is None and pending is not None:
+                progress = pending[1]
+            self._pending_status[tab_index] = (message, progress)
+
+    def drain(self, apply_status):
+        """Runs the queued calls in order, then applies the merged statuses. Tk thread only."""
+        for _ in range(self._calls.qsize()):
+            try:
+                fn, args = self._calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fn(*args)
+            except Exception:
+                traceback.print_exc()
+        with self._status_lock:
+            pending, self._pending_status = self._pending_status, {}
+        for tab_index, (message, progress) in pending.items():
+            apply_status(tab_index, message, progress)
+
+
+class VentoyConfigStore:
+    """Reads ventoy.json and rewrites it through a fsynced temporary file, keeping one backup."""
+
+    def __init__(self, drive):
+        self.drive = drive
+        self.json_path = os.path.join(drive, VENTOY_JSON_PATH)
+        self.tmp_path = self.json_path + VENTOY_JSON_TMP_SUFFIX
+        self.backup_path = self.json_path + VENTOY_JSON_BACKUP_SUFFIX
+
+    def exists(self):
+        return os.path.exists(self.json_path)
+
+    def load(self):
+        with open(self.json_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save(self, config):
+        data = json.dumps(config, indent=4).encode('utf-8')
+        json_dir = os.path.dirname(self.json_path)
+        os.makedirs(json_dir, exist_ok=True)
+        try:
+            with open(self.tmp_path, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(self.json_path):
+                try:
+                    shutil.copyfile(self.json_path, self.backup_path)
+                except OSError as e:
+                    print(f"Warning: Failed to back up '{self.json_path}': {e}")
+            os.replace(self.tmp_path, self.json_path)
+        except Exception:
+            if os.path.exists(self.tmp_path):
+                try:
+                    os.remove(self.tmp_path)
+                except OSError:
+                    pass
+            raise
+        try:
+            dir_fd = os.open(json_dir, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+
+
+def normalize_member_path(rel_path):
+    """Turns an archive member name or relative path into the forward-slash form indexes use."""
+    rel_path = rel_path.replace("\\", "/").lstrip("/")
+    while rel_path.startswith("./"):
+        rel_path = rel_path[2:]
+    return rel_path
+
+
+class ThemeIndex:
+    """Theme tree summary: theme.txt path, fonts, images, file sizes and directory entry sizes."""
+
+    def __init__(self):
+        self.theme_txt = None
+        self.fonts = []
+        self.images = []
+        self.file_count = 0
+        self.total_bytes = 0
+        self.file_sizes = []
+        self.dir_entry_bytes = {}
+        self.longest_path = ""
+
+    def add(self, rel_path, size):
+        rel_path = normalize_member_path(rel_path)
+        if not rel_path:
+            return
+        self.file_count += 1
+        self.total_bytes += size or 0
+        self.file_sizes.append(size or 0)
+        if len(rel_path) > len(self.longest_path):
+            self.longest_path = rel_path
+        parent, _, name = rel_path.rpartition("/")
+        self._add_dir_entry(parent, name)
+        name_lower = name.lower()
+        if name == "theme.txt":
+            if self.theme_txt is None or (rel_path.count("/"), rel_path) < (self.theme_txt.count("/"), self.theme_txt):
+                self.theme_txt = rel_path
+        if name_lower.endswith(THEME_FONT_EXTENSIONS):
+            self.fonts.append(rel_path)
+        elif name_lower.endswith(THEME_IMAGE_EXTENSIONS):
+            self.images.append(rel_path)
+
+    def _add_dir_entry(self, rel_dir, name):
+        # A FAT directory entry takes 32 bytes plus one more per 13 characters
+        # of long name; every folder also starts with its '.' and '..' entries.
+        if rel_dir not in self.dir_entry_bytes:
+            self.dir_entry_bytes[rel_dir] = 64
+            if rel_dir:
+                parent, _, dir_name = rel_dir.rpartition("/")
+                self._add_dir_entry(parent, dir_name)
+        self.dir_entry_bytes[rel_dir] += 32 * (1 + -(-len(name) // 13))
+
+    def disk_footprint(self, cluster_size):
+        """Predicts the bytes the tree occupies on a FAT volume with the given cluster size."""
+        if not self.file_sizes:
+            return self.total_bytes + self.file_count * cluster_size // 2
+        clusters = sum(-(-size // cluster_size) for size in self.file_sizes)
+        clusters += sum(max(1, -(-entry_bytes // cluster_size)) for entry_bytes in self.dir_entry_bytes.values())
+        return clusters * cluster_size
+
+    def finish(self):
+        self.fonts.sort()
+        self.images.sort()
+        return self
+
+    @classmethod
+    def from_members(cls, members):
+        index = cls()
+        for rel_path, size in members:
+            index.add(rel_path, size)
+        return index.finish()
+
+    @classmethod
+    def from_tree(cls, root_dir):
+        index = cls()
+        pending = [("", root_dir)]
+        while pending:
+            rel_dir, abs_dir = pending.pop()
+            try:
+                with os.scandir(abs_dir) as it:
+                    for entry in it:
+                        rel_path = f"{rel_dir}{entry.name}"
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                pending.append((rel_path + "/", entry.path))
+                            elif entry.is_file():
+                                index.add(rel_path, entry.stat().st_size)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return index.finish()
+
+    @property
+    def theme_root(self):
+        """Directory holding theme.txt relative to the tree root ('' for the root), or None."""
+        if self.theme_txt is None:
+            return None
+        return self.theme_txt.rpartition("/")[0]
+
+    @classmethod
+    def from_dict(cls, data):
+        index = cls()
+        index.theme_txt = (data.get('theme_txt') or '').replace("\\", "/") or None
+        index.fonts = list(data.get('fonts', []))
+        index.images = list(data.get('images', []))
+        index.file_count = data.get('file_count', 0)
+        index.total_bytes = data.get('total_bytes', 0)
+        index.file_sizes = list(data.get('file_sizes', []))
+        index.dir_entry_bytes = dict(data.get('dir_entry_bytes', {}))
+        index.longest_path = data.get('longest_path', "")
+        return index
+
+    def to_dict(self):
+        return {
+            'theme_txt': self.theme_txt,
+            'fonts': self.fonts,
+            'images': self.images,
+            'file_count': self.file_count,
+            'total_bytes': self.total_bytes,
+            'file_sizes': self.file_sizes,
+            'dir_entry_bytes': self.dir_entry_bytes,
+            'longest_path': self.longest_path,
+        }
+
+
+class InstallSpacePlanner:
+    """Install pre-flight for one drive: FAT32 size cap, path length and free space."""
+
+    def __init__(self, free_bytes, cluster_size, filesystem):
+        self.free_bytes = free_bytes
+        self.cluster_size = cluster_size
+        self.is_fat32 = (filesystem or "").upper() in FAT32_FILESYSTEMS
+        self.planned_bytes = 0
+
+    @classmethod
+    def for_drive(cls, drive):
+        free_bytes = max(0, shutil.disk_usage(drive).free - PREFLIGHT_RESERVE_BYTES)
+        return cls(free_bytes, get_drive_cluster_size(drive), get_drive_filesystem(drive))
+
+    def check(self, theme_dir, index, replaced_bytes=0):
+        """Reserves space for the theme; returns None, or a (key, default text, args) rejection reason."""
+        largest_file = max(index.file_sizes, default=0)
+        if self.is_fat32 and largest_file > FAT32_MAX_FILE_SIZE:
+            return ("preflight_file_too_large", "it has a {:.1f} GB file and FAT32 files are limited to 4 GB",
+                    [largest_file / 1024**3])
+        path_length = len(os.path.join(theme_dir, index.longest_path)) if index.longest_path else 0
+        if path_length > MAX_INSTALL_PATH_LENGTH:
+            return ("preflight_path_too_long", "'{}' would need a {}-character path (limit {})",
+                    [index.longest_path, path_length, MAX_INSTALL_PATH_LENGTH])
+        needed = max(0, index.disk_footprint(self.cluster_size) - replaced_bytes)
+        available = self.free_bytes - self.planned_bytes
+        if needed > available:
+            return ("preflight_not_enough_space", "it needs {:.1f} MB but only {:.1f} MB are free",
+                    [needed / 1024**2, max(0, available) / 1024**2])
+        self.planned_bytes += needed
+        return None
+
+
+ThemeReference = collections.namedtuple("ThemeReference", "kind component property value line")
+
+
+class ThemeGraph:
+    """File references (images, styled boxes, fonts) and syntax errors of one GRUB theme file."""
+
+    def __init__(self):
+        self.references = []
+        self.errors = []
+        self.uses_icons = False
+
+    @property
+    def fonts(self):
+        return sorted({ref.value for ref in self.references if ref.kind == "font"})
+
+    @staticmethod
+    def candidates(ref):
+        value = ref.value.replace("\\", "/")
+        if ref.kind == "style" and "*" in value:
+            return [value.replace("*", part, 1) for part in THEME_STYLE_BOX_PARTS]
+        return [value]
+
+    def resolve(self, root, by_path):
+        """Matches the references against by_path; returns (used names, missing references)."""
+        used = set()
+        missing = []
+        for ref in self.references:
+            if ref.kind == "font" or ref.value.startswith(("/", "(")):
+                continue
+            found = False
+            for candidate in self.candidates(ref):
+                name = by_path.get(posixpath.normpath(posixpath.join(root, candidate)).lower())
+                if name is not None:
+                    used.add(name)
+                    found = True
+            if not found:
+                missing.append(ref)
+        if self.uses_icons:
+            prefix = posixpath.join(root, THEME_ICONS_DIR, "").lower()
+            used.update(name for path, name in by_path.items() if path.startswith(prefix))
+        return used, missing
+
+
+def theme_property_kind(name):
+    if name in THEME_IMAGE_PROPERTIES:
+        return "image"
+    if name in THEME_STYLE_PROPERTIES:
+        return "style"
+    if name in THEME_FONT_PROPERTIES:
+        return "font"
+    return None
+
+
+def skip_theme_space(text, pos):
+    """Skips whitespace and '#' comments, which GRUB allows between any two tokens."""
+    length = len(text)
+    while pos < length:
+        if text[pos] == "#":
+            end = text.find("\n", pos)
+            pos = length if end < 0 else end
+        elif text[pos].isspace():
+            pos += 1
+        else:
+            break
+    return pos
+
+
+def parse_theme_txt(text):
+    """Parses a GRUB theme file into a ThemeGraph, resuming on the next line after a syntax error."""
+    graph = ThemeGraph()
+    components = []
+    length = len(text)
+    pos = 0
+    # Line numbers are counted forward from the previous statement, so
+    # parsing stays linear in the size of the file.
+    line = 1
+    line_pos = 0
+
+    def fail(offset, message):
+        graph.errors.append((line + text.count("\n", line_pos, offset), message))
+        end = text.find("\n", offset)
+        return length if end < 0 else end
+
+    while True:
+        pos = skip_theme_space(text, pos)
+        if pos >= length:
+            break
+        start = pos
+        line += text.count("\n", line_pos, start)
+        line_pos = start
+        if text[pos] == "+":
+            match = THEME_IDENTIFIER_RE.match(text, skip_theme_space(text, pos + 1))
+            pos = skip_theme_space(text, match.end()) if match else pos
+            if not match or pos >= length or text[pos] != "{":
+                pos = fail(start, "expected '+ component_type {'")
+                continue
+            components.append(match.group(0))
+            if match.group(0) == "boot_menu":
+                graph.uses_icons = True
+            pos += 1
+            continue
+        if text[pos] == "}":
+            if components:
+                components.pop()
+                pos += 1
+            else:
+                pos = fail(pos, "'}' without a matching '+ component {'")
+            continue
+
+        match = THEME_IDENTIFIER_RE.match(text, pos)
+        if not match:
+            pos = fail(pos, f"unexpected {text[pos]!r}")
+            continue
+        name = match.group(0)
+        separator = "=" if components else ":"
+        pos = skip_theme_space(text, match.end())
+        if pos >= length or text[pos] != separator:
+            pos = fail(start, f"expected '{separator}' after '{name}'")
+            continue
+        pos = skip_theme_space(text, pos + 1)
+        if pos < length and text[pos] in "\"(":
+            closing = '"' if text[pos] == '"' else ")"
+            end = text.find(closing, pos + 1)
+            if end < 0:
+                pos = fail(start, f"value of '{name}' is missing its closing {closing}")
+                continue
+            value = text[pos + 1:end] if closing == '"' else text[pos:end + 1]
+            pos = end + 1
+        else:
+            word = THEME_WORD_RE.match(text, pos)
+            value = word.group(0)
+            pos = word.end()
+            if not value:
+                pos = fail(start, f"'{name}' has no value")
+                continue
+        kind = theme_property_kind(name)
+        if kind and value:
+            graph.references.append(ThemeReference(kind, components[-1] if components else None, name, value, line))
+    if components:
+        graph.errors.append((line + text.count("\n", line_pos), f"'+ {components[-1]}' is never closed"))
+    return graph
+
+
+class ThemeGraphCache:
+    """LRU cache of parsed theme files keyed by a digest of their text."""
+
+    def __init__(self, max_entries=THEME_GRAPH_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._graphs = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text):
+        key = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        with self._lock:
+            graph = self._graphs.get(key)
+            if graph is not None:
+                self._graphs.move_to_end(key)
+                return graph
+        graph = parse_theme_txt(text)
+        with self._lock:
+            self._graphs[key] = graph
+            while len(self._graphs) > self.max_entries:
+                self._graphs.popitem(last=False)
+        return graph
+
+
+THEME_GRAPHS = ThemeGraphCache()
+
+
+def list_theme_files(names, is_loadable=None):
+    """Returns the theme.txt members of names plus the other .txt files beside them."""
+    roots = set()
+    for name in names:
+        parent, _, base = normalize_member_path(name).rpartition("/")
+        if base.lower() == "theme.txt" and (is_loadable is None or is_loadable(name)):
+            roots.add(parent)
+    return [name for name in names
+            if name.lower().endswith(".txt") and normalize_member_path(name).rpartition("/")[0] in roots
+            and (is_loadable is None or is_loadable(name))]
+
+
+def read_tree_theme_texts(root_dir, theme_txt):
+    """Reads a tree's theme.txt and the .txt files beside it; returns their text by relative path."""
+    theme_texts = {}
+    rel_dir = theme_txt.rpartition("/")[0]
+    abs_dir = os.path.join(root_dir, *rel_dir.split("/")) if rel_dir else root_dir
+    for name in sorted(os.listdir(abs_dir)):
+        if name.lower().endswith(".txt") and os.path.isfile(os.path.join(abs_dir, name)):
+            with open(os.path.join(abs_dir, name), 'r', encoding='utf-8', errors='replace') as f:
+                theme_texts[posixpath.join(rel_dir, name)] = f.read()
+    return theme_texts
+
+
+class ThemeCheck:
+    """Missing references, syntax errors, unused files and unknown fonts of one theme."""
+
+    def __init__(self, theme_txt, missing, errors, unused, unknown_fonts=()):
+        self.theme_txt = theme_txt
+        self.missing = missing
+        self.errors = errors
+        self.unused = unused
+        self.unknown_fonts = list(unknown_fonts)
+
+    @property
+    def ok(self):
+        return not self.missing and not self.errors
+
+    def describe(self):
+        lines = [f"line {line}: {message}" for line, message in self.errors]
+        lines += [f"line {ref.line}: {ref.property} refers to missing '{ref.value}'" for ref in self.missing]
+        lines += [f"line {ref.line}: {ref.property} uses font '{ref.value}', which no .pf2 of the theme provides"
+                  for ref in self.unknown_fonts]
+        lines += [f"unused: {name}" for name in self.unused]
+        return lines
+
+
+def check_theme_references(theme_txt, theme_texts, names, font_names=None):
+    """Checks theme_txt's references against names, the file list of the tree holding it."""
+    by_path = {normalize_member_path(name).lower(): name for name in names}
+    used = set()
+    used_fonts = set()
+    missing = []
+    errors = []
+    font_refs = []
+    for theme_file, text in theme_texts.items():
+        graph = THEME_GRAPHS.get(text)
+        file_used, file_missing = graph.resolve(normalize_member_path(theme_file).rpartition("/")[0], by_path)
+        used |= file_used
+        used_fonts.update(graph.fonts)
+        if theme_file == theme_txt:
+            missing = file_missing
+            errors = graph.errors
+            font_refs = [ref for ref in graph.references if ref.kind == "font"]
+    root = normalize_member_path(theme_txt).rpartition("/")[0]
+    prefix = root + "/" if root else ""
+    unused = [name for name in names
+              if normalize_member_path(name).startswith(prefix) and name not in used
+              and name.lower().endswith(THEME_IMAGE_EXTENSIONS)]
+    unknown_fonts = []
+    if font_names is not None:
+        unused += [name for name, font_name in font_names.items()
+                   if normalize_member_path(name).startswith(prefix) and font_name not in used_fonts]
+        provided = set(font_names.values()) | set(VENTOY_FONT_NAMES)
+        unknown_fonts = [ref for ref in font_refs if ref.value not in provided]
+    return ThemeCheck(theme_txt, missing, errors, sorted(unused), unknown_fonts)
+
+
+def read_pf2_font_name(path):
+    """Returns the font name in a PF2 file's NAME section, or None if it is not a PF2 font."""
+    with open(path, 'rb') as f:
+        header = f.read(PF2_HEADER_BYTES)
+    pos = 0
+    while pos + 8 <= len(header):
+        section = header[pos:pos + 4]
+        length = int.from_bytes(header[pos + 4:pos + 8], "big")
+        data = header[pos + 8:pos + 8 + length]
+        if pos == 0 and (section != b"FILE" or data != PF2_MAGIC):
+            return None
+        if section == b"NAME":
+            return data.split(b"\0", 1)[0].decode('utf-8', 'replace') or None
+        pos += 8 + length
+    return None
+
+
+def read_tree_font_names(root_dir, fonts):
+    """Returns the font name of each readable PF2 font among fonts, by relative path."""
+    font_names = {}
+    for rel_path in fonts:
+        try:
+            font_name = read_pf2_font_name(os.path.join(root_dir, *rel_path.split("/")))
+        except OSError:
+            continue
+        if font_name:
+            font_names[rel_path] = font_name
+    return font_names
+
+
+class ThemeMemberFilter:
+    """Picks the members of a theme pack that GRUB can use, by pattern and by theme references."""
+
+    def __init__(self, allow_patterns=THEME_MEMBER_ALLOW_PATTERNS, skip_patterns=THEME_MEMBER_SKIP_PATTERNS):
+        self.allow_patterns = tuple(pattern.lower() for pattern in allow_patterns)
+        self.skip_patterns = tuple(pattern.lower() for pattern in skip_patterns)
+
+    @property
+    def signature(self):
+        """Short digest of the patterns, so trees filtered differently are cached apart."""
+        data = json.dumps([self.allow_patterns, self.skip_patterns]).encode()
+        return hashlib.blake2b(data, digest_size=4).hexdigest()
+
+    @staticmethod
+    def _matches(rel_path, patterns):
+        parts = normalize_member_path(rel_path).lower().split("/")
+        for pattern in patterns:
+            if "/" not in pattern:
+                if fnmatch.fnmatchcase(parts[-1], pattern):
+                    return True
+            elif any(fnmatch.fnmatchcase("/".join(parts[i:]), pattern) for i in range(len(parts))):
+                return True
+        return False
+
+    def is_allowed(self, rel_path):
+        return self._matches(rel_path, self.allow_patterns)
+
+    def is_loadable(self, rel_path):
+        """The filter that needs no theme files: only the skip patterns apply."""
+        return self.is_allowed(rel_path) or not self._matches(rel_path, self.skip_patterns)
+
+    def theme_files(self, names):
+        return list_theme_files(names, self.is_loadable)
+
+    def select(self, names, theme_texts):
+        """Returns the names to extract, given the text of the members named by theme_files()."""
+        by_path = {normalize_member_path(name).lower(): name for name in names}
+        keep = {name for name in names if self.is_allowed(name)}
+        for theme_file, text in theme_texts.items():
+            keep.add(theme_file)
+            used, _ = THEME_GRAPHS.get(text).resolve(normalize_member_path(theme_file).rpartition("/")[0], by_path)
+            keep.update(name for name in used if self.is_loadable(name))
+        return keep
+
+    def select_from_tree(self, root_dir):
+        """Returns the relative paths of the files in root_dir that select() keeps."""
+        names = [path.replace(os.sep, "/") for path in list_tree(root_dir)[1]]
+        theme_texts = {}
+        for name in self.theme_files(names):
+            try:
+                with open(os.path.join(root_dir, name), 'r', encoding='utf-8', errors='replace') as f:
+                    theme_texts[name] = f.read()
+            except OSError:
+                return {name for name in names if self.is_loadable(name)}
+        if not theme_texts:
+            return {name for name in names if self.is_loadable(name)}
+        return self.select(names, theme_texts)
+
+
+def prune_theme_tree(root_dir, member_filter, cancel_token=None):
+    """Deletes what member_filter drops from an extracted tree; returns (files, bytes) removed."""
+    keep = member_filter.select_from_tree(root_dir)
+    removed_files = 0
+    removed_bytes = 0
+    for root, dirs, files in os.walk(root_dir, topdown=False):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.relpath(path, root_dir).replace(os.sep, "/") in keep:
+                continue
+            if cancel_token:
+                cancel_token.check()
+            removed_bytes += os.path.getsize(path)
+            os.remove(path)
+            removed_files += 1
+        if root != root_dir and not os.listdir(root):
+            os.rmdir(root)
+    return removed_files, removed_bytes
+
+
+def select_members(members, wanted=None):
+    """Keeps the (relative path, size) pairs whose path passes wanted; all of them without one."""
+    if wanted is None:
+        return members
+    return [(name, size) for name, size in members if wanted(name)]
+
+
+def zip_file_members(zip_ref):
+    return [(i.filename, i.file_size) for i in zip_ref.infolist() if not i.is_dir()]
+
+
+def tar_file_members(tar_ref):
+    return [(m.name, m.size) for m in tar_ref.getmembers() if m.isfile()]
+
+
+def sevenzip_file_members(szr):
+    return [(f.filename, f.uncompressed) for f in szr.list() if not f.is_directory]
+
+
+def rar_file_members(rar_ref):
+    return [(i.filename, i.file_size) for i in rar_ref.infolist() if not i.is_dir()]
+
+
+def extract_zip_members(zip_ref, dest_path, on_bytes=None, cancel_token=None, wanted=None):
+    for info in zip_ref.infolist():
+        if cancel_token:
+            cancel_token.check()
+        if wanted and (info.is_dir() or not wanted(info.filename)):
+            continue
+        extracted_path = zip_ref.extract(info, dest_path)
+        if not info.is_dir():
+            # Keep the archived timestamp so syncs can compare by mtime.
+            mtime = time.mktime(info.date_time + (0, 0, -1))
+            os.utime(extracted_path, (mtime, mtime))
+            if on_bytes:
+                on_bytes(info.file_size)
+
+
+def zip_member_target(dest_path, member_name):
+    """Maps a ZIP member name to its path below dest_path, sanitised the way ZipFile.extract does."""
+    arcname = member_name.replace('/', os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    parts = [part for part in arcname.split(os.path.sep) if part not in ('', os.path.curdir, os.path.pardir)]
+    if os.path.sep == '\\':
+        parts = [part.translate(str.maketrans(':<>|"?*', '_______')).rstrip('.') for part in parts]
+        parts = [part for part in parts if part]
+    return os.path.join(dest_path, *parts)
+
+
+def extract_zip_parallel(archive_path, dest_path, workers=EXTRACT_WORKERS, on_bytes=None, cancel_token=None, wanted=None):
+    """Inflates ZIP members on a thread pool while the calling thread writes them in order."""
+    handles = threading.local()
+    opened = []
+    opened_lock = threading.Lock()
+
+    def inflate(info):
+        zip_ref = getattr(handles, "zip_ref", None)
+        if zip_ref is None:
+            zip_ref = handles.zip_ref = zipfile.ZipFile(archive_path, 'r')
+            with opened_lock:
+                opened.append(zip_ref)
+        if cancel_token:
+            cancel_token.check()
+        return zip_ref.read(info)
+
+    def finish_file(info, target):
+        mtime = time.mktime(info.date_time + (0, 0, -1))
+        os.utime(target, (mtime, mtime))
+        if on_bytes:
+            on_bytes(info.file_size)
+
+    pending = collections.deque()
+    window = [0]
+
+    def write_next():
+        info, target, future = pending.popleft()
+        data = future.result()
+        with open(target, 'wb') as f_out:
+            f_out.write(data)
+        window[0] -= info.file_size
+        finish_file(info, target)
+
+    try:
+        with zipfile.ZipFile(archive_path, 'r') as zip_ref, \
+             concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for info in zip_ref.infolist():
+                    if wanted and (info.is_dir() or not wanted(info.filename)):
+                        continue
+                    target = zip_member_target(dest_path, info.filename)
+                    if info.is_dir():
+                        os.makedirs(target, exist_ok=True)
+                        continue
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    if info.file_size > PARALLEL_EXTRACT_MAX_MEMBER_BYTES:
+                        while pending:
+                            write_next()
+                        with zip_ref.open(info) as f_in, open(target, 'wb') as f_out:
+                            for chunk in iter(lambda: f_in.read(COMMIT_BUFFER_SIZE), b""):
+                                if cancel_token:
+                                    cancel_token.check()
+                                f_out.write(chunk)
+                        finish_file(info, target)
+                        continue
+                    while pending and window[0] + info.file_size > PARALLEL_EXTRACT_WINDOW_BYTES:
+                        write_next()
+                    pending.append((info, target, executor.submit(inflate, info)))
+                    window[0] += info.file_size
+                while pending:
+                    write_next()
+            except BaseException:
+                for _, _, future in pending:
+                    future.cancel()
+                raise
+    finally:
+        for handle in opened:
+            handle.close()
+
+
+def extract_tar_members(tar_ref, dest_path, on_bytes=None, cancel_token=None, wanted=None):
+    # Directory attributes are left alone so read-only directories cannot
+    # block the files that follow them, as extractall does.
+    for member in tar_ref:
+        if cancel_token:
+            cancel_token.check()
+        if wanted and (member.isdir() or not wanted(member.name)):
+            continue
+        tar_ref.extract(member, dest_path, set_attrs=not member.isdir())
+        if on_bytes and member.isfile():
+            on_bytes(member.size)
+
+
+class UnsupportedArchiveError(ValueError):
+    """Raised when an archive's format is not recognised at all."""
+
+
+class MissingArchiveBackendError(Exception):
+    """Raised when an archive's format is known but no backend for it is installed."""
+
+    def __init__(self, archive_format):
+        super().__init__(f"No installed backend can read {archive_format} archives")
+        self.archive_format = archive_format
+
+
+def detect_archive_format(archive_path):
+    """Identifies an archive by its magic bytes; returns an ARCHIVE_MAGIC format name, 'tar' or None."""
+    with open(archive_path, 'rb') as f:
+        head = f.read(TAR_MAGIC_OFFSET + len(TAR_MAGIC))
+    for magic, archive_format in ARCHIVE_MAGIC:
+        if head.startswith(magic):
+            return archive_format
+    if head[TAR_MAGIC_OFFSET:TAR_MAGIC_OFFSET + len(TAR_MAGIC)] == TAR_MAGIC:
+        return "tar"
+    # Pre-POSIX tar headers carry no magic, so fall back to the name for them.
+    if archive_path.lower().endswith(".tar"):
+        return "tar"
+    return None
+
+
+class ArchiveBackend:
+    """One way of reading some archive formats; rank() orders the available backends for a format."""
+
+    name = ""
+    formats = ()
+    streaming_formats = ()
+    listing = True
+    parallel_formats = ()
+
+    def available(self):
+        return True
+
+    def rank(self, archive_format):
+        return 10
+
+    def is_streaming(self, archive_format):
+        return archive_format in self.streaming_formats
+
+    def is_parallel(self, archive_format):
+        return archive_format in self.parallel_formats
+
+    def list_members(self, archive_path, archive_format):
+        raise NotImplementedError
+
+    def extract(self, archive_path, archive_format, dest_path, on_bytes=None, cancel_token=None, wanted=None):
+        """Extracts the archive (only the members wanted accepts) and returns its ThemeIndex."""
+        raise NotImplementedError
+
+
+class ZipBackend(ArchiveBackend):
+    name = "zipfile"
+    formats = ("zip",)
+    parallel_formats = ("zip",)
+
+    def list_members(self, archive_path, archive_format):
+        with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+            return zip_file_members(zip_ref)
+
+    def extract(self, archive_path, archive_format, dest_path, on_bytes=None, cancel_token=None, wanted=None):
+        with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+            members = select_members(zip_file_members(zip_ref), wanted)
+            if EXTRACT_WORKERS == 1 or len(members) < PARALLEL_EXTRACT_MIN_MEMBERS:
+                extract_zip_members(zip_ref, dest_path, on_bytes, cancel_token, wanted)
+        if EXTRACT_WORKERS > 1 and len(members) >= PARALLEL_EXTRACT_MIN_MEMBERS:
+            extract_zip_parallel(archive_path, dest_path, EXTRACT_WORKERS, on_bytes, cancel_token, wanted)
+        return ThemeIndex.from_members(members)
+
+
+class TarBackend(ArchiveBackend):
+    name = "tarfile"
+    formats = ("tar", "gzip", "bzip2", "xz")
+    streaming_formats = ("gzip", "bzip2", "xz")
+
+    def rank(self, archive_format):
+        # The standard library's bzip2 and xz decoders are slow next to a native tool.
+        return 10 if archive_format in ("tar", "gzip") else 5
+
+    def list_members(self, archive_path, archive_format):
+        with tarfile.open(archive_path, 'r:*') as tar_ref:
+            return tar_file_members(tar_ref)
+
+    def extract(self, archive_path, archive_format, dest_path, on_bytes=None, cancel_token=None, wanted=None):
+        with tarfile.open(archive_path, 'r|*') as tar_ref:
+            extract_tar_members(tar_ref, dest_path, on_bytes, cancel_token, wanted)
+            return ThemeIndex.from_members(select_members(tar_file_members(tar_ref), wanted))
+
+
+class StreamTarBackend(ArchiveBackend):
+    """A tar wrapped in a compression format the standard library lacks (lz4, zstd)."""
+
+    streaming_formats = ("lz4", "zstd")
+
+    def __init__(self, archive_format, module_name):
+        self.name = module_name
+        self.formats = (archive_format,)
+        self.module_name = module_name
+
+    def available(self):
+        return importlib.util.find_spec(self.module_name) is not None
+
+    def rank(self, archive_format):
+        return 5
+
+    @contextlib.contextmanager
+    def _open_tar(self, archive_path):
+        with open(archive_path, 'rb') as f_in:
+            if self.module_name == "lz4":
+                import lz4.frame
+                reader = lz4.frame.open(f_in, 'rb')
+            else:
+                import zstandard
+                reader = zstandard.ZstdDecompressor().stream_reader(f_in)
+            with reader, tarfile.open(fileobj=reader, mode='r|') as tar_ref:
+                yield tar_ref
+
+    def list_members(self, archive_path, archive_format):
+        with self._open_tar(archive_path) as tar_ref:
+            return [(m.name, m.size) for m in tar_ref if m.isfile()]
+
+    def extract(self, archive_path, archive_format, dest_path, on_bytes=None, cancel_token=None, wanted=None):
+        with self._open_tar(archive_path) as tar_ref:
+            extract_tar_members(tar_ref, dest_path, on_bytes, cancel_token, wanted)
+            return ThemeIndex.from_members(select_members(tar_file_members(tar_ref), wanted))
+
+
+def extract_sevenzip_members(archive_path, dest_path, names=None, on_bytes=None, cancel_token=None):
+    """Decodes 7z members (all, or those in names) on the calling thread, checking cancel_token on every write."""
+    import py7zr
+    import py7zr.io
+
+    writers = []
+
+    class MemberWriter(py7zr.io.Py7zIO):
+        def __init__(self, path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.path = path
+            self.file = open(path, 'wb')
+            self.written = 0
+
+        def write(self, data):
+            if cancel_token:
+                cancel_token.check()
+            self.file.write(data)
+            self.written += len(data)
+            if on_bytes:
+                on_bytes(len(data))
+            return len(data)
+
+        def read(self, size=None):
+            return b""
+
+        def seek(self, offset, whence=0):
+            return self.file.seek(offset, whence)
+
+        def seekable(self):
+            return False
+
+        def flush(self):
+            self.file.flush()
+
+        def size(self):
+            return self.written
+
+        def close(self):
+            self.file.close()
+
+    class MemberWriterFactory(py7zr.io.WriterFactory):
+        def create(self, filename):
+            writer = MemberWriter(os.path.abspath(filename))
+            writers.append(writer)
+            return writer
+
+    # Given a file object instead of a path, py7zr decodes on this thread rather than on its own
+    # folder threads, so a cancel raised by a writer reaches the caller.
+    with open(archive_path, 'rb') as archive_file, py7zr.SevenZipFile(archive_file, mode='r') as szr:
+        entries = [entry for entry in szr.files if names is None or entry.filename in names]
+        for entry in entries:
+            if entry.is_directory:
+                os.makedirs(zip_member_target(dest_path, entry.filename), exist_ok=True)
+        try:
+            if names is None:
+                szr.extractall(path=dest_path, factory=MemberWriterFactory())
+            elif entries:
+                szr.extract(path=dest_path, targets=names, factory=MemberWriterFactory())
+        finally:
+            for writer in writers:
+                writer.close()
+    mtimes = {}
+    for entry in entries:
+        if not entry.is_directory and entry.lastwritetime is not None:
+            mtimes[os.path.abspath(zip_member_target(dest_path, entry.filename))] = entry.lastwritetime.totimestamp()
+    for writer in writers:
+        mtime = mtimes.get(writer.path)
+        if mtime is not None:
+            os.utime(writer.path, (mtime, mtime))
+
+
+class SevenZipBackend(ArchiveBackend):
+    name = "py7zr"
+    formats = ("7z",)
+    parallel_formats = ("7z",)
+
+    def available(self):
+        return importlib.util.find_spec("py7zr") is not None
+
+    def rank(self, archive_format):
+        return 5
+
+    def list_members(self, archive_path, archive_format):
+        import py7zr
+        with py7zr.SevenZipFile(archive_path, mode='r') as szr:
+            return sevenzip_file_members(szr)
+
+    def extract(self, archive_path, archive_format, dest_path, on_bytes=None, cancel_token=None, wanted=None):
+        import py7zr
+        with py7zr.SevenZipFile(archive_path, mode='r') as szr:
+            index = ThemeIndex.from_members(select_members(sevenzip_file_members(szr), wanted))
+            # Files in different folders (solid blocks) decode independently.
+            folders = collections.OrderedDict()
+            for entry in szr.files:
+                if wanted and (entry.is_directory or not wanted(entry.filename)):
+                    continue
+                folders.setdefault(id(getattr(entry, "folder", None)), []).append(entry.filename)
+        if cancel_token:
+            cancel_token.check()
+        if EXTRACT_WORKERS == 1 or len(folders) < 2:
+            if wanted is None or folders:
+                extract_sevenzip_members(archive_path, dest_path, None if wanted is None else [name for names in folders.values() for name in names],
+                                         on_bytes, cancel_token)
+            return index
+
+        report_lock = threading.Lock()
+
+        def report(byte_count):
+            with report_lock:
+                on_bytes(byte_count)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(EXTRACT_WORKERS, len(folders))) as executor:
+            futures = [executor.submit(extract_sevenzip_members, archive_path, dest_path, names, report if on_bytes else None, cancel_token)
+                       for names in folders.values()]
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        return index
+
+
+class RarBackend(ArchiveBackend):
+    name = "rarfile"
+    formats = ("rar",)
+
+    def available(self):
+        return importlib.util.find_spec("rarfile") is not None
+
+    def rank(self, archive_format):
+        return 5
+
+    def list_members(self, archive_path, archive_format):
+        import rarfile
+        with rarfile.RarFile(archive_path, 'r') as rar_ref:
+            return rar_file_members(rar_ref)
+
+    def extract(self, archive_path, archive_format, dest_path, on_bytes=None, cancel_token=None, wanted=None):
+        import rarfile
+        with rarfile.RarFile(archive_path, 'r') as rar_ref:
+            if cancel_token:
+                cancel_token.check()
+            members = select_members(rar_file_members(rar_ref), wanted)
+            if wanted is None:
+                rar_ref.extractall(dest_path)
+            elif members:
+                rar_ref.extractall(dest_path, members=[name for name, _ in members])
+            index = ThemeIndex.from_members(members)
+        if on_bytes:
+            on_bytes(index.total_bytes)
+        return index
+
+
+def run_archive_tool(args, cancel_token=None):
+    """Runs an external archiver without a console window and returns its stdout."""
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        process = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=out, stderr=err,
+                                   creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        try:
+            while True:
+                try:
+                    process.wait(timeout=0.1)
+                    break
+                except subprocess.TimeoutExpired:
+                    if cancel_token:
+                        cancel_token.check()
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+        out.seek(0)
+        err.seek(0)
+        if process.returncode != 0:
+            message = err.read().decode(errors="replace").strip().splitlines()
+            raise Exception(f"{os.path.basename(args[0])} exited with code {process.returncode}"
+                            + (f": {message[-1]}" if message else ""))
+        return out.read().decode(errors="replace")
+
+
+class SystemToolBackend(ArchiveBackend):
+    """An archiver installed on the system, preferred for the formats it decodes faster."""
+
+    native_formats = ("zip", "tar", "gzip")
+
+    def __init__(self):
+        self._executable = None
+        self._resolved = False
+
+    def find_executable(self):
+        raise NotImplementedError
+
+    def extract_args(self, archive_path, dest_path, list_path=None):
+        """Command line extracting the archive, or only the members named in list_path."""
+        raise NotImplementedError
+
+    def list_entry(self, name):
+        return name
+
+    @property
+    def executable(self):
+        if not self._resolved:
+            self._executable = self.find_executable()
+            self._resolved = True
+        return self._executable
+
+    def available(self):
+        return self.executable is not None
+
+    def rank(self, archive_format):
+        return 1 if archive_format in self.native_formats else 20
+
+    def extract(self, archive_path, archive_format, dest_path, on_bytes=None, cancel_token=None, wanted=None):
+        if wanted is None:
+            run_archive_tool(self.extract_args(archive_path, dest_path), cancel_token)
+            index = ThemeIndex.from_tree(dest_path)
+        else:
+            # The selected names go to the tool in a list file, which keeps
+            # long selections clear of the command line length limit.
+            members = select_members(self.list_members(archive_path, archive_format), wanted)
+            if members:
+                with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix=".lst", delete=False) as list_file:
+                    list_file.write("\n".join(self.list_entry(name) for name, _ in members) + "\n")
+                try:
+                    run_archive_tool(self.extract_args(archive_path, dest_path, list_file.name), cancel_token)
+                finally:
+                    os.remove(list_file.name)
+            index = ThemeIndex.from_members(members)
+        if on_bytes:
+            on_bytes(index.total_bytes)
+        return index
+
+
+class SevenZipToolBackend(SystemToolBackend):
+    name = "7z"
+    formats = ("7z", "zip", "rar", "tar", "gzip", "bzip2", "xz")
+    parallel_formats = ("7z", "zip")
+
+    def find_executable(self):
+        for candidate in ("7z", "7zz", "7za"):
+            path = shutil.which(candidate)
+            if path:
+                return path
+        program_files = os.environ.get("ProgramFiles")
+        if program_files and os.path.isfile(os.path.join(program_files, "7-Zip", "7z.exe")):
+            return os.path.join(program_files, "7-Zip", "7z.exe")
+        return None
+
+    def extract_args(self, archive_path, dest_path, list_path=None):
+        # -spd makes 7-Zip take the listed names literally instead of as wildcards.
+        selection = ["-spd", f"-i@{list_path}"] if list_path else []
+        return [self.executable, "x", "-y", "-bd", "-mmt=on", *selection, f"-o{dest_path}", "--", archive_path]
+
+    def list_members(self, archive_path, archive_format):
+        # -slt prints one "Key = value" block per member.
+        members = []
+        entry = {}
+        output = run_archive_tool([self.executable, "l", "-slt", "-ba", "--", archive_path])
+        for line in output.splitlines() + [""]:
+            if not line.strip():
+                if entry.get("Path") and entry.get("Folder") != "+" and "D" not in entry.get("Attributes", "")[:1]:
+                    members.append((entry["Path"], int(entry.get("Size") or 0)))
+                entry = {}
+                continue
+            key, sep, value = line.partition(" = ")
+            if sep:
+                entry[key.strip()] = value
+        return members
+
+
+class BsdtarBackend(SystemToolBackend):
+    name = "bsdtar"
+    formats = ("tar", "gzip", "bzip2", "xz", "lz4", "zstd", "zip", "7z", "rar")
+    streaming_formats = ("gzip", "bzip2", "xz", "lz4", "zstd")
+
+    def find_executable(self):
+        path = shutil.which("bsdtar")
+        if path:
+            return path
+        # Windows 10 and later ship bsdtar as tar.exe.
+        path = shutil.which("tar")
+        try:
+            if path and "bsdtar" in run_archive_tool([path, "--version"]):
+                return path
+        except Exception:
+            pass
+        return None
+
+    def rank(self, archive_format):
+        # 7-Zip is the better choice for the formats both tools read.
+        return super().rank(archive_format) - 1
+
+    def extract_args(self, archive_path, dest_path, list_path=None):
+        selection = ["-T", list_path] if list_path else []
+        return [self.executable, "-xf", archive_path, "-C", dest_path, *selection]
+
+    def list_entry(self, name):
+        # bsdtar matches the names it is given as patterns.
+        return re.sub(r'([\\*?\[])', r'\\\1', name)
+
+    def list_members(self, archive_path, archive_format):
+        members = []
+        output = run_archive_tool([self.executable, "-tvf", archive_path])
+        for line in output.splitlines():
+            fields = line.split(None, 8)
+            if len(fields) == 9 and fields[0].startswith("-"):
+                members.append((fields[8], int(fields[4])))
+        return members
+
+
+class ArchiveBackendRegistry:
+    """Maps archive formats to the backends that can read them and picks the best one."""
+
+    def __init__(self, extensions):
+        self.extensions = extensions
+        self._backends = []
+
+    def register(self, backend):
+        self._backends.append(backend)
+        return backend
+
+    def candidates(self, archive_format, listing=False):
+        backends = [b for b in self._backends
+                    if archive_format in b.formats and (b.listing or not listing) and b.available()]
+        return sorted(backends, key=lambda b: b.rank(archive_format), reverse=True)
+
+    def select(self, archive_path, listing=False):
+        """Returns (format, backend) for the archive; raises if none can read it."""
+        archive_format = detect_archive_format(archive_path)
+        if archive_format is None:
+            raise UnsupportedArchiveError(f"Unsupported archive format: {os.path.basename(archive_path)}")
+        candidates = self.candidates(archive_format, listing)
+        if not candidates:
+            raise MissingArchiveBackendError(archive_format)
+        return archive_format, candidates[0]
+
+    def is_supported_name(self, file_name):
+        return file_name.lower().endswith(self.extensions)
+
+    def dialog_patterns(self):
+        return " ".join("*" + extension for extension in self.extensions)
+
+
+MISSING_BACKEND_MESSAGES = {
+    "xz": ("error_lzma_module_missing", "LZMA module not found. Cannot extract .xz archives."),
+    "lz4": ("error_lz4_module_missing", "The 'lz4' library is not installed. Please install it using 'pip install lz4'."),
+    "zstd": ("error_zstd_module_missing", "The 'zstandard' library is not installed. Please install it using 'pip install zstandard'."),
+    "7z": ("error_py7zr_module_missing", "The 'py7zr' library is not installed. Please install it using 'pip install py7zr'."),
+    "rar": ("error_rarfile_module_missing", "The 'rarfile' library is not installed. Please install it using 'pip install rarfile' and ensure the 'unrar' utility is installed and available in your system's PATH."),
+}
+
+ARCHIVE_BACKENDS = ArchiveBackendRegistry(ARCHIVE_EXTENSIONS)
+for _backend in (ZipBackend(), TarBackend(), StreamTarBackend("lz4", "lz4"), StreamTarBackend("zstd", "zstandard"),
+                 SevenZipBackend(), RarBackend(), SevenZipToolBackend(), BsdtarBackend()):
+    ARCHIVE_BACKENDS.register(_backend)
+
+
+def read_theme_files(backend, archive_path, archive_format, theme_files, dest_path, on_bytes=None, cancel_token=None):
+    """Extracts the given theme files and returns their text by member name ({} if any is unreadable)."""
+    wanted = set(theme_files)
+    backend.extract(archive_path, archive_format, dest_path, on_bytes, cancel_token, wanted=wanted.__contains__)
+    theme_texts = {}
+    for name in theme_files:
+        try:
+            with open(zip_member_target(dest_path, name), 'r', encoding='utf-8', errors='replace') as f:
+                theme_texts[name] = f.read()
+        except OSError:
+            return {}
+    return theme_texts
+
+
+def probe_theme_archive(archive_path, member_filter=None, listing_only=False):
+    """Lists an archive and, unless listing_only or streamed, reads its theme files; returns (index, texts)."""
+    archive_format, backend = ARCHIVE_BACKENDS.select(archive_path, listing=True)
+    members = backend.list_members(archive_path, archive_format)
+    names = [name for name, _ in members]
+    theme_texts = {}
+    theme_files = list_theme_files(names, member_filter.is_loadable if member_filter else None)
+    if theme_files and not listing_only and not backend.is_streaming(archive_format):
+        temp_dir = tempfile.mkdtemp(prefix=STAGING_DIR_PREFIX)
+        try:
+            theme_texts = read_theme_files(backend, archive_path, archive_format, theme_files, temp_dir)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    if member_filter:
+        keep = member_filter.select(names, theme_texts) if theme_texts else None
+        members = select_members(members, keep.__contains__ if keep is not None else member_filter.is_loadable)
+    return ThemeIndex.from_members(members), theme_texts
+
+
+def read_archive_font_names(archive_path, fonts):
+    """Extracts only the given .pf2 members of an archive and returns their font names by member name."""
+    if not fonts:
+        return {}
+    archive_format, backend = ARCHIVE_BACKENDS.select(archive_path)
+    wanted = set(fonts)
+    temp_dir = tempfile.mkdtemp(prefix=STAGING_DIR_PREFIX)
+    try:
+        backend.extract(archive_path, archive_format, temp_dir, None, None,
+                        wanted=lambda name: normalize_member_path(name) in wanted)
+        return read_tree_font_names(temp_dir, fonts)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def parse_gfxmode(gfxmode):
+    """Returns the first (width, height) of a gfxmode such as '1920x1080' or '1024x768x32,auto'; None for 'max'."""
+    match = GFXMODE_RE.match(str(gfxmode or ""))
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def optimize_theme_image(path, max_size=None):
+    """Worker process step: strips, recompresses and downscales one image; returns (bytes before, after)."""
+    from PIL import Image
+    st = os.stat(path)
+    temp_path = path + ".opt"
+    with open(path, 'rb') as f:
+        header = f.read(26)
+    with Image.open(path) as image:
+        image_format = image.format
+        if image_format not in ("PNG", "JPEG"):
+            return st.st_size, st.st_size
+        image.load()
+        scaled = False
+        if max_size and (image.width > max_size[0] or image.height > max_size[1]):
+            scale = max(max_size[0] / image.width, max_size[1] / image.height)
+            if scale < 1:
+                image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS)
+                scaled = True
+        high_depth_png = image_format == "PNG" and len(header) == 26 and header[24] > 8
+        if not scaled and (image_format == "JPEG" or high_depth_png):
+            return st.st_size, st.st_size
+        try:
+            # Nothing from image.info is passed on, so text, time, EXIF and ICC chunks are dropped.
+            if image_format == "PNG":
+                image.save(temp_path, "PNG", optimize=True, icc_profile=None)
+            else:
+                image.save(temp_path, "JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True, icc_profile=None)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    # The source is closed by now, so Windows lets it be replaced.
+    new_size = os.path.getsize(temp_path)
+    if not scaled and new_size >= st.st_size:
+        os.remove(temp_path)
+        return st.st_size, st.st_size
+    os.replace(temp_path, path)
+    # The source's mtime is kept so incremental syncs still see the file as unchanged.
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    return st.st_size, new_size
+
+
+class ThemeImageOptimizer:
+    """Shrinks a staged theme's images in place on a process pool; needs Pillow."""
+
+    def __init__(self, max_size=None, workers=IMAGE_OPTIMIZE_WORKERS):
+        self.max_size = max_size
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available():
+        return importlib.util.find_spec("PIL") is not None
+
+    @property
+    def signature(self):
+        """Cache key suffix, so trees optimized for different resolutions are cached apart."""
+        return "img{}x{}".format(*self.max_size) if self.max_size else "img"
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def optimize_tree(self, root_dir, index, cancel_token=None):
+        """Optimizes the images listed in index below root_dir; returns (files rewritten, bytes saved)."""
+        paths = []
+        for rel_path in index.images:
+            path = os.path.join(root_dir, *rel_path.split("/"))
+            try:
+                if rel_path.lower().endswith(IMAGE_OPTIMIZE_EXTENSIONS) and os.path.getsize(path) >= IMAGE_OPTIMIZE_MIN_BYTES:
+                    paths.append(path)
+            except OSError:
+                continue
+        if not paths:
+            return 0, 0
+        pool = self._pool()
+        futures = {pool.submit(optimize_theme_image, path, self.max_size): path for path in paths}
+        pending = set(futures)
+        rewritten = 0
+        saved = 0
+        try:
+            while pending:
+                done, pending = concurrent.futures.wait(pending, timeout=0.1)
+                if cancel_token:
+                    cancel_token.check()
+                for future in done:
+                    try:
+                        before, after = future.result()
+                    except Exception as e:
+                        print(f"Warning: Could not optimize image '{futures[future]}': {e}")
+                        continue
+                    if after != before:
+                        rewritten += 1
+                        saved += before - after
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+        return rewritten, saved
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+class StagedTheme:
+    def __init__(self, path, index, temporary=False, on_cleanup=None):
+        self.path = path
+        self.index = index
+        self.temporary = temporary
+        self.on_cleanup = on_cleanup
+
+    @classmethod
+    def from_tree(cls, path, temporary=False):
+        return cls(path, ThemeIndex.from_tree(path), temporary)
+
+    def cleanup(self):
+        if self.temporary:
+            shutil.rmtree(self.path, ignore_errors=True)
+        if self.on_cleanup:
+            on_cleanup, self.on_cleanup = self.on_cleanup, None
+            on_cleanup()
+
+
+class ExtractionCache:
+    """LRU cache of extracted theme trees keyed by archive hash, size and mtime."""
+
+    def __init__(self, cache_dir, max_bytes=EXTRACTION_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._pinned = collections.Counter()
+
+    def key_for(self, archive_path):
+        st = os.stat(archive_path)
+        digest = hashlib.blake2b(digest_size=16)
+        with open(archive_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CACHE_HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return f"{digest.hexdigest()}-{st.st_size:x}-{st.st_mtime_ns:x}"
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def lookup(self, key):
+        with self._lock:
+            return self._lookup_locked(key)
+
+    def _lookup_locked(self, key):
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, EXTRACTION_CACHE_META_NAME)
+        tree_dir = os.path.join(entry_dir, EXTRACTION_CACHE_TREE_NAME)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if not os.path.isdir(tree_dir):
+                return None
+            os.utime(meta_path)
+        except (OSError, ValueError):
+            return None
+        self._pinned[key] += 1
+        return StagedTheme(tree_dir, ThemeIndex.from_dict(meta), on_cleanup=lambda: self._unpin(key))
+
+    def _unpin(self, key):
+        with self._lock:
+            self._pinned[key] -= 1
+            if self._pinned[key] <= 0:
+                del self._pinned[key]
+
+    def store(self, key, staged_dir, index=None):
+        if index is None:
+            index = ThemeIndex.from_tree(staged_dir)
+        meta = index.to_dict()
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entry_dir = self._entry_dir(key)
+            if os.path.isdir(entry_dir):
+                shutil.rmtree(staged_dir, ignore_errors=True)
+            else:
+                partial_dir = tempfile.mkdtemp(prefix=key + ".", dir=self.cache_dir)
+                partial_tree = os.path.join(partial_dir, EXTRACTION_CACHE_TREE_NAME)
+                try:
+                    shutil.move(staged_dir, partial_tree)
+                    with open(os.path.join(partial_dir, EXTRACTION_CACHE_META_NAME), 'w', encoding='utf-8') as f:
+                        json.dump(meta, f)
+                    os.replace(partial_dir, entry_dir)
+                except Exception:
+                    if os.path.isdir(partial_tree) and not os.path.exists(staged_dir):
+                        shutil.move(partial_tree, staged_dir)
+                    shutil.rmtree(partial_dir, ignore_errors=True)
+                    raise
+            # Pinned before the lock is released, so another store cannot evict it first.
+            staged = self._lookup_locked(key)
+            self._evict(keep=key)
+        return staged
+
+    def _evict(self, keep=None):
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            meta_path = os.path.join(self.cache_dir, name, EXTRACTION_CACHE_META_NAME)
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    size = json.load(f).get('total_bytes', 0)
+                last_used = os.path.getmtime(meta_path)
+            except (OSError, ValueError):
+                continue
+            entries.append((last_used, name, size))
+            total += size
+        entries.sort()
+        for last_used, name, size in entries:
+            if total <= self.max_bytes:
+                break
+            if name == keep or name in self._pinned:
+                continue
+            shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+            total -= size
+            print(f"Evicted cached theme tree: {name}")
+
+
+class StagingPipeline:
+    """Stages theme sources once and shares each staged tree between one writer per drive."""
+
+    def __init__(self, stage_fn, items, consumer_count, workers=INSTALL_WORKERS, window=INSTALL_STAGING_WINDOW):
+        self._stage_fn = stage_fn
+        self._items = items
+        self._consumer_count = consumer_count
+        self._window = window
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        self._futures = [None] * len(items)
+        self._positions = [0] * consumer_count
+        self._releases = [set() for _ in items]
+        self._reported_errors = []
+        self._condition = threading.Condition()
+        with self._condition:
+            self._submit_ahead()
+
+    def _limit(self):
+        return min(len(self._items), min(self._positions) + self._window)
+
+    def _submit(self, index):
+        if self._futures[index] is None:
+            self._futures[index] = self._executor.submit(self._stage_fn, *self._items[index])
+        return self._futures[index]
+
+    def _submit_ahead(self):
+        for index in range(self._limit()):
+            self._submit(index)
+
+    def get(self, consumer, index):
+        """Blocks until item `index` is staged and returns it (or raises its staging error)."""
+        with self._condition:
+            while index >= self._limit():
+                self._condition.wait()
+            future = self._submit(index)
+        return future.result()
+
+    def release(self, consumer, index):
+        with self._condition:
+            if consumer in self._releases[index]:
+                return
+            self._positions[consumer] = max(self._positions[consumer], index + 1)
+            self._releases[index].add(consumer)
+            finished = len(self._releases[index]) == self._consumer_count
+            future = self._futures[index]
+            self._submit_ahead()
+            self._condition.notify_all()
+        if finished and future is not None:
+            self._discard(future)
+
+    def claim_error_report(self, error):
+        with self._condition:
+            if any(error is reported for reported in self._reported_errors):
+                return False
+            self._reported_errors.append(error)
+            return True
+
+    @staticmethod
+    def _discard(future):
+        if future.cancel():
+            return
+        try:
+            staged = future.result()
+        except (Exception, TaskCancelled):
+            return
+        if staged:
+            staged.cleanup()
+
+    def released(self, consumer, index):
+        with self._condition:
+            return consumer in self._releases[index]
+
+    def close(self):
+        with self._condition:
+            leftovers = [future for index, future in enumerate(self._futures)
+                         if future is not None and len(self._releases[index]) < self._consumer_count]
+            self._releases = [set(range(self._consumer_count)) for _ in self._items]
+        for future in leftovers:
+            self._discard(future)
+        self._executor.shutdown(wait=True)
+
+
+class ThemeDirTransaction:
+    """Publishes or syncs the theme folders of one install batch so they can be rolled back."""
+
+    def __init__(self, themes_dir):
+        self.themes_dir = themes_dir
+        self._published = []
+        self._journal = []
+
+    def partial_dir(self, theme_name):
+        path = os.path.join(self.themes_dir, theme_name + THEME_PARTIAL_SUFFIX)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        return path
+
+    def discard(self, theme_name):
+        shutil.rmtree(os.path.join(self.themes_dir, theme_name + THEME_PARTIAL_SUFFIX), ignore_errors=True)
+
+    def publish(self, theme_name):
+        theme_dir = os.path.join(self.themes_dir, theme_name)
+        backup_dir = None
+        if os.path.isdir(theme_dir):
+            backup_dir = theme_dir + THEME_BACKUP_SUFFIX
+            if os.path.exists(backup_dir):
+                shutil.rmtree(backup_dir)
+            os.replace(theme_dir, backup_dir)
+        try:
+            os.replace(theme_dir + THEME_PARTIAL_SUFFIX, theme_dir)
+        except Exception:
+            if backup_dir:
+                os.replace(backup_dir, theme_dir)
+            raise
+        self._published.append((theme_dir, backup_dir))
+
+    def sync(self, theme_name, src_dir, plan, on_bytes=None, cancel_token=None):
+        """Applies a SyncPlan to an installed theme folder; returns the bytes written."""
+        journal_start = len(self._journal)
+        try:
+            return self._apply_sync_plan(os.path.join(self.themes_dir, theme_name), src_dir, plan, on_bytes, cancel_token)
+        except Exception:
+            self._undo_journal(journal_start)
+            raise
+
+    def _apply_sync_plan(self, theme_dir, src_dir, plan, on_bytes, cancel_token):
+        written = 0
+        for rel_dir in plan.dirs:
+            path = os.path.join(theme_dir, rel_dir)
+            if not os.path.isdir(path):
+                os.mkdir(path)
+                self._journal.append(("dir", path, None))
+        for rel_file in plan.to_write:
+            path = os.path.join(theme_dir, rel_file)
+            partial_path = path + THEME_PARTIAL_SUFFIX
+            try:
+                written += copy_file_chunked(os.path.join(src_dir, rel_file), partial_path,
+                                             on_bytes=on_bytes, cancel_token=cancel_token)
+            except BaseException:
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+                raise
+            self._replace_file(path, partial_path)
+        for rel_file in plan.to_touch:
+            mtime = os.path.getmtime(os.path.join(src_dir, rel_file))
+            os.utime(os.path.join(theme_dir, rel_file), (mtime, mtime))
+        for rel_file in plan.to_delete:
+            if cancel_token:
+                cancel_token.check()
+            self._replace_file(os.path.join(theme_dir, rel_file), None)
+        for rel_dir in plan.stale_dirs:
+            self._journal.append(("stale_dir", os.path.join(theme_dir, rel_dir), None))
+        return written
+
+    def _replace_file(self, path, new_path):
+        backup_path = None
+        if os.path.exists(path):
+            backup_path = path + THEME_BACKUP_SUFFIX
+            os.replace(path, backup_path)
+        if new_path:
+            os.replace(new_path, path)
+        self._journal.append(("file", path, backup_path))
+
+    def commit(self):
+        for theme_dir, backup_dir in self._published:
+            if backup_dir:
+                shutil.rmtree(backup_dir, ignore_errors=True)
+        self._published = []
+        for kind, path, backup_path in self._journal:
+            if backup_path:
+                try:
+                    os.remove(backup_path)
+                except OSError as e:
+                    print(f"Warning: Could not remove backup '{backup_path}': {e}")
+            elif kind == "stale_dir":
+                try:
+                    os.rmdir(path)
+                except OSError:
+                    pass
+        self._journal = []
+
+    def _undo_journal(self, start=0):
+        for kind, path, backup_path in reversed(self._journal[start:]):
+            try:
+                if kind == "dir":
+                    os.rmdir(path)
+                elif kind == "file":
+                    if os.path.exists(path):
+                        os.remove(path)
+                    if backup_path:
+                        os.replace(backup_path, path)
+            except OSError as e:
+                print(f"Warning: Could not restore '{path}': {e}")
+        del self._journal[start:]
+
+    def rollback(self):
+        self._undo_journal()
+        for theme_dir, backup_dir in reversed(self._published):
+            shutil.rmtree(theme_dir, ignore_errors=True)
+            if backup_dir:
+                try:
+                    os.replace(backup_dir, theme_dir)
+                except OSError as e:
+                    print(f"Warning: Could not restore '{theme_dir}' from its backup: {e}")
+        self._published = []
+
+
+def is_theme_work_dir(name):
+    return name.endswith((THEME_PARTIAL_SUFFIX, THEME_BACKUP_SUFFIX))
+
+
+def theme_folder_of(ventoy_json_path):
+    """Returns the theme folder name a ventoy.json path points into, or None."""
+    if not ventoy_json_path or not isinstance(ventoy_json_path, str):
+        return None
+    parts = posixpath.normpath("/" + ventoy_json_path.replace("\\", "/").lstrip("/")).split("/")
+    themes_parts = THEMES_DIR_NAME.split("/")
+    if len(parts) <= len(themes_parts) + 1 or parts[1:len(themes_parts) + 1] != themes_parts:
+        return None
+    return parts[len(themes_parts) + 1]
+
+
+def drop_theme_entries(theme_config, theme_names):
+    """Removes the entries inside the named theme folders from a ventoy.json 'theme' section."""
+    theme_names = set(theme_names)
+    dropped = 0
+    default_index = theme_config.get('default_file', 0)
+    files = theme_config.get('file', [])
+    default_path = files[default_index - 1] if 0 < default_index <= len(files) else None
+    for key in ('file', 'fonts', 'images'):
+        entries = theme_config.get(key, [])
+        kept = [entry for entry in entries if theme_folder_of(entry) not in theme_names]
+        dropped += len(entries) - len(kept)
+        theme_config[key] = kept
+    if default_index > 0:
+        if default_path is not None and default_path in theme_config['file']:
+            theme_config['default_file'] = theme_config['file'].index(default_path) + 1
+        else:
+            theme_config['default_file'] = 0
+    return dropped
+
+
+def ventoy_path_on_drive(drive, ventoy_json_path):
+    """Maps a ventoy.json path ('/ventoy/theme/...') to the file on the drive."""
+    return os.path.join(drive, *ventoy_json_path.replace("\\", "/").strip("/").split("/"))
+
+
+def select_theme_fonts(drive, rel_theme_dir, fonts, used_fonts):
+    """Returns the ventoy.json entries of the fonts (relative to the theme folder) that hold one of used_fonts."""
+    theme_dir = ventoy_path_on_drive(drive, rel_theme_dir)
+    return [f"/{rel_theme_dir}/{rel_path}" for rel_path, font_name in sorted(read_tree_font_names(theme_dir, fonts).items())
+            if font_name in used_fonts]
+
+
+def merge_font_entries(drive, listed, candidates):
+    """Appends the candidate font entries whose content is not listed already."""
+    digests = {}
+
+    def size_of(entry):
+        try:
+            return os.path.getsize(ventoy_path_on_drive(drive, entry))
+        except OSError:
+            return None
+
+    def digest_of(entry):
+        if entry not in digests:
+            try:
+                digests[entry] = file_digest(ventoy_path_on_drive(drive, entry))
+            except OSError:
+                digests[entry] = None
+        return digests[entry]
+
+    merged = list(listed)
+    by_size = {}
+    for entry in merged:
+        by_size.setdefault(size_of(entry), []).append(entry)
+    for entry in candidates:
+        size = size_of(entry)
+        if entry in merged or size is None:
+            continue
+        same_size = by_size.get(size, [])
+        if same_size and any(digest_of(other) == digest_of(entry) for other in same_size):
+            continue
+        merged.append(entry)
+        by_size.setdefault(size, []).append(entry)
+    return merged
+
+
+def restore_shared_fonts(drive, theme_files, listed, skip_themes):
+    """Lists fonts again for registered themes that use a font name no listed font holds."""
+    provided = set(read_tree_font_names(drive, [entry.strip("/") for entry in listed]).values())
+    candidates = []
+    for theme_file in theme_files:
+        theme_name = theme_folder_of(theme_file)
+        if theme_name is None or theme_name in skip_themes:
+            continue
+        try:
+            with open(ventoy_path_on_drive(drive, theme_file), 'r', encoding='utf-8', errors='replace') as f:
+                missing_fonts = set(THEME_GRAPHS.get(f.read()).fonts) - provided
+        except OSError:
+            continue
+        if missing_fonts:
+            rel_theme_dir = f"{THEMES_DIR_NAME}/{theme_name}"
+            fonts = ThemeIndex.from_tree(ventoy_path_on_drive(drive, rel_theme_dir)).fonts
+            candidates += select_theme_fonts(drive, rel_theme_dir, fonts, missing_fonts)
+    return merge_font_entries(drive, listed, candidates)
+
+
+def update_theme_fonts(drive, theme_files, font_entries, theme_fonts):
+    """Returns the 'fonts' list with the entries of the themes in theme_fonts replaced."""
+    kept = [entry for entry in font_entries if theme_folder_of(entry) not in theme_fonts]
+    candidates = sorted((entry for entries in theme_fonts.values() for entry in entries),
+                        key=lambda entry: (entry not in font_entries, entry))
+    merged = merge_font_entries(drive, kept, candidates)
+    if set(font_entries) - set(merged):
+        merged = restore_shared_fonts(drive, theme_files, merged, set(theme_fonts))
+    return sorted(merged)
+
+
+class ThemeConfigTransaction:
+    """Merges the theme paths and fonts of one install batch into ventoy.json in one write."""
+
+    def __init__(self, config_store):
+        self.config_store = config_store
+        self.theme_paths = set()
+        self.theme_fonts = {}
+        self.committed = False
+        self._lock = threading.Lock()
+
+    def add_theme_path(self, theme_path):
+        with self._lock:
+            self.theme_paths.add(theme_path)
+
+    def set_theme_fonts(self, theme_name, fonts):
+        with self._lock:
+            self.theme_fonts[theme_name] = list(fonts)
+
+    def commit(self, on_read_error=None):
+        """Merges the collected entries into ventoy.json; only the first call writes."""
+        with self._lock:
+            if self.committed:
+                return False
+            self.committed = True
+            config = {}
+            if self.config_store.exists():
+                try:
+                    config = self.config_store.load()
+                except Exception as e:
+                    if on_read_error:
+                        on_read_error(e)
+                    config = {}
+            config.setdefault('theme', {})
+            theme_config = config['theme']
+            theme_config.setdefault('file', [])
+            theme_config.setdefault('default_file', 0)
+            theme_config.setdefault('gfxmode', 'max')
+            theme_config.setdefault('display_mode', 'GUI')
+            theme_config.setdefault('serial_param', '--unit=0 --speed=9600')
+            theme_config.setdefault('fonts', [])
+            theme_config.setdefault('images', [])
+            theme_config['file'] = sorted(list(set(theme_config.get('file', [])) | self.theme_paths))
+            theme_config['fonts'] = update_theme_fonts(self.config_store.drive, theme_config['file'], theme_config.get('fonts', []),
+                                                       self.theme_fonts)
+            self.config_store.save(config)
+            return True
+
+
+def default_cache_dir():
+    cache_root = os.environ.get("LOCALAPPDATA") or tempfile.gettempdir()
+    return os.path.join(cache_root, "VentoyThemer", "cache")
+
+
 def extract_drive_letter(display_string):
     if not display_string or ' ' not in display_string:
         return ""
     return display_string.split()[0]
 
-class VentoyThemer:
-    def __init__(self, root):
-        self.root = root
-        base_dir = os.path.dirname(sys.executable) if hasattr(sys, '_MEIPASS') else os.path.dirname(__file__)
-        translation_file_path = os.path.join(base_dir, "VentoyThemer", "languages.json")
+class VentoyThemerCore:
+    """GUI-free install, settings and removal logic; front-ends override the reporting hooks."""
+
+    def __init__(self):
+        self.base_dir = os.path.dirname(sys.executable) if hasattr(sys, '_MEIPASS') else os.path.dirname(__file__)
+        self.all_translations = []
+        self._messages = {}
+        self._load_translations()
+        self.app_version = "Unknown"
+        self._load_version()
+        self.extraction_cache = ExtractionCache(default_cache_dir())
+        self.install_workers = INSTALL_WORKERS
+        self.overwrite_existing = False
+        self.member_filter = None
+        self.optimize_images = False
+        self._probe_cache = {}
+        self._probe_lock = threading.Lock()
+        self._checked_themes = set()
+        self.cancel_token = CancelToken()
+
+    def _load_translations(self):
+        """Loads languages.json and selects the first language as the default."""
+        translation_file_path = os.path.join(self.base_dir, "VentoyThemer", "languages.json")
+
+        self.all_translations = []
+        self._messages = {}
+
+        try:
+            if os.path.exists(translation_file_path):
+                with open(translation_file_path, 'r', encoding='utf-8') as f:
+                    loaded_data = json.load(f)
+                if isinstance(loaded_data, list) and loaded_data:
+                    self.all_translations = loaded_data
+                    if self.all_translations and self.all_translations[0] and isinstance(self.all_translations[0], dict):
+                         self._messages = self.all_translations[0]
+                         print("Translations loaded successfully. Using the first language as default.")
+                    else:
+                         print(f"Warning: First language in '{translation_file_path}' has unexpected format. Using fallback keys.")
+                         self._messages = {}
+                else:
+                    print(f"Warning: Translation file '{translation_file_path}' is empty or has unexpected format (not a list). Using fallback keys.")
+                    self.all_translations = []
+                    self._messages = {}
+
+            else:
+                print(f"Warning: Translation file not found at '{translation_file_path}'. Using fallback keys.")
+                self.all_translations = []
+                self._messages = {}
+
+        except json.JSONDecodeError as e:
+             print(f"Error decoding translation JSON from '{translation_file_path}': {e}. Using fallback keys.")
+             self.all_translations = []
+             self._messages = {}
+        except Exception as e:
+            print(f"Error loading translation file '{translation_file_path}': {e}. Using fallback keys.")
+            self.all_translations = []
+            self._messages = {}
+
+    def _load_version(self):
+        """Loads the application version from the 'version' file."""
+        version_file_path = os.path.join(self.base_dir, "VentoyThemer", "version")
+
+        try:
+            if os.path.exists(version_file_path):
+                with open(version_file_path, 'r', encoding='utf-8') as f:
+                    self.app_version = f.read().strip()
+                    if not self.app_version: 
+                         self.app_version = "Unknown (Empty File)"
+            else:
+                self.app_version = "Unknown (File not found)"
+                print(f"Warning: Version file not found at {version_file_path}")
+        except Exception as e:
+             self.app_version = f"Error loading version: {e}"
+             print(f"Error reading version file {version_file_path}: {e}")
+
+    def _(self, key, default=None):
+        """
+        Looks up a translation key in the currently active messages dictionary (_messages).
+        """
+        if self._messages and key in self._messages:
+            return self._messages[key]
+        else:
+             if default is not None:
+                 return default
+             return key
+
+    def format_message(self, *args, **kwargs):
+        args = list(args)
+        title_key = args.pop(0) if args else ""
+        message_key = args.pop(0) if args else ""
+        legacy_title = kwargs.pop('title_key', None)
+        legacy_message = kwargs.pop('message_key', None)
+        args = list(kwargs.pop('args', None) or []) + args
+
+        translated_title = legacy_title or self._(title_key, title_key)
+        if legacy_message:
+             return translated_title, legacy_message
+
+        if message_key:
+             translated_message = self._(message_key, message_key)
+             try:
+                  formatted_message = translated_message.format(*args, **kwargs)
+             except (IndexError, KeyError) as e:
+                  print(f"Formatting error for message key '{message_key}': {e}. Using raw translation.")
+                  formatted_message = translated_message
+        else:
+             formatted_message = args[0] if args else "Unknown Message"
+             if kwargs:
+                 print(f"Warning: show_message_safe called without message_key but with kwargs: {kwargs}")
+        return translated_title, formatted_message
+
+    def update_status_safe(self, tab_index, message, progress=None):
+        print(message)
+
+    def show_message_safe(self, type, *args, **kwargs):
+        title, message = self.format_message(*args, **kwargs)
+        print(f"{type.upper()}: {title}: {message}")
+
+    def confirm_overwrite(self, theme_name):
+        return self.overwrite_existing
+
+    def refresh_drive_view(self):
+        pass
+
+    def on_default_theme_reset(self):
+        pass
+
+    def task_finished(self, tab_index, reset_status=True):
+        pass
+
+    def extract_theme(self, archive_path, dest_path, on_bytes=None):
+        archive_name = os.path.basename(archive_path)
+        try:
+            archive_format, backend = ARCHIVE_BACKENDS.select(archive_path)
+        except UnsupportedArchiveError:
+            raise Exception(self._("error_unsupported_archive_format", "Unsupported archive format for extraction: {}").format(archive_name))
+        except MissingArchiveBackendError as e:
+            key, default = MISSING_BACKEND_MESSAGES.get(e.archive_format, ("error_unsupported_archive_format", "Unsupported archive format for extraction: {}"))
+            raise Exception(self._(key, default).format(archive_name))
+
+        try:
+            index = self.extract_theme_members(backend, archive_path, archive_format, dest_path, on_bytes)
+        except NotImplementedError as e:
+            # e.g. a .zipx member compressed with a method zipfile lacks; let the next backend try.
+            fallbacks = ARCHIVE_BACKENDS.candidates(archive_format)[1:]
+            if not fallbacks:
+                raise Exception(self._("error_archive_extraction_error", "Failed to extract {} archive '{}': {}").format(archive_format, archive_name, e))
+            print(f"{backend.name} cannot extract {archive_name} ({e}); retrying with {fallbacks[0].name}")
+            shutil.rmtree(dest_path, ignore_errors=True)
+            os.makedirs(dest_path, exist_ok=True)
+            backend = fallbacks[0]
+            try:
+                index = self.extract_theme_members(backend, archive_path, archive_format, dest_path, on_bytes)
+            except Exception as e:
+                raise Exception(self._("error_archive_extraction_error", "Failed to extract {} archive '{}': {}").format(archive_format, archive_name, e))
+        except Exception as e:
+            raise Exception(self._("error_archive_extraction_error", "Failed to extract {} archive '{}': {}").format(archive_format, archive_name, e))
+        print(self._("print_extracted_archive", "Extracted {} archive: {}").format(archive_format, archive_name) + f" ({backend.name})")
+        return index
+
+    def extract_theme_members(self, backend, archive_path, archive_format, dest_path, on_bytes):
+        member_filter = self.member_filter
+        if member_filter is None:
+            return backend.extract(archive_path, archive_format, dest_path, on_bytes, self.cancel_token)
+        archive_name = os.path.basename(archive_path)
+
+        if backend.listing and not backend.is_streaming(archive_format):
+            members = backend.list_members(archive_path, archive_format)
+            names = [name for name, _ in members]
+            theme_files = set(member_filter.theme_files(names))
+            # The probe has usually read the theme files already; then
+            # everything is extracted in one pass.
+            theme_texts = self.probed_theme_texts(archive_path)
+            if set(theme_texts) == theme_files:
+                theme_files = set()
+            elif theme_files:
+                theme_texts = read_theme_files(backend, archive_path, archive_format, sorted(theme_files), dest_path, on_bytes, self.cancel_token)
+            if theme_texts:
+                keep = member_filter.select(names, theme_texts)
+            else:
+                keep = {name for name in names if member_filter.is_loadable(name)}
+            rest = keep - theme_files
+            if rest:
+                backend.extract(archive_path, archive_format, dest_path, on_bytes, self.cancel_token, wanted=rest.__contains__)
+            kept = select_members(members, keep.__contains__)
+            skipped_bytes = sum(size or 0 for _, size in members) - sum(size or 0 for _, size in kept)
+            print(self._("print_skipped_unused_members", "Skipped {} unused file(s) ({} bytes) in {}").format(
+                len(members) - len(kept), skipped_bytes, archive_name))
+            return ThemeIndex.from_members(kept)
+
+        backend.extract(archive_path, archive_format, dest_path, on_bytes, self.cancel_token, wanted=member_filter.is_loadable)
+        removed_files, removed_bytes = prune_theme_tree(dest_path, member_filter, self.cancel_token)
+        if removed_files:
+            print(self._("print_pruned_unused_files", "Removed {} unreferenced file(s) ({} bytes) from {}").format(
+                removed_files, removed_bytes, archive_name))
+        return ThemeIndex.from_tree(dest_path)
+
+    def stage_theme_source(self, source_path, cache_only=False, on_extract=None, on_bytes=None, image_optimizer=None,
+                           on_optimize=None):
+        if os.path.isdir(source_path):
+            return StagedTheme.from_tree(source_path)
+
+        cache_key = None
+        if self.extraction_cache:
+            try:
+                cache_key = self.extraction_cache.key_for(source_path)
+                if self.member_filter:
+                    cache_key += f"-{self.member_filter.signature}"
+                if image_optimizer:
+                    cache_key += f"-{image_optimizer.signature}"
+                cached = self.extraction_cache.lookup(cache_key)
+                if cached:
+                    print(self._("print_using_cached_theme", "Using cached extraction of {}").format(os.path.basename(source_path)))
+                    return cached
+            except OSError as e:
+                print(f"Warning: Extraction cache lookup failed for '{source_path}': {e}")
+                cache_key = None
+        if cache_only:
+            return None
+
+        if on_extract:
+            on_extract()
+        staging_dir = tempfile.mkdtemp(prefix=STAGING_DIR_PREFIX)
+        try:
+            index = self.extract_theme(source_path, staging_dir, on_bytes)
+            if image_optimizer:
+                if on_optimize:
+                    on_optimize()
+                rewritten, saved = image_optimizer.optimize_tree(staging_dir, index, self.cancel_token)
+                if rewritten:
+                    index = ThemeIndex.from_tree(staging_dir)
+                    print(self._("print_optimized_images", "Optimized {} image(s) of {}, saving {} bytes").format(
+                        rewritten, os.path.basename(source_path), saved))
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        if cache_key:
+            try:
+                cached = self.extraction_cache.store(cache_key, staging_dir, index)
+                if cached:
+                    return cached
+            except Exception as e:
+                print(f"Warning: Failed to add '{source_path}' to the extraction cache: {e}")
+            if not os.path.isdir(staging_dir):
+                raise Exception(f"Staged tree of '{os.path.basename(source_path)}' was lost while caching it.")
+        return StagedTheme(staging_dir, index, temporary=True)
+
+    def probe_theme_source(self, source_path, listing_only=False):
+        """Returns the ThemeIndex of a theme archive or folder without extracting it."""
+        if os.path.isdir(source_path):
+            return ThemeIndex.from_tree(source_path)
+        try:
+            probe_key = self._probe_key(source_path) + (listing_only,)
+            with self._probe_lock:
+                probed = self._probe_cache.get(probe_key)
+            if probed is None:
+                probed = probe_theme_archive(source_path, self.member_filter, listing_only)
+                with self._probe_lock:
+                    self._probe_cache[probe_key] = probed
+            return probed[0]
+        except Exception as e:
+            raise Exception(self._("error_probe_archive", "Cannot read archive '{}': {}").format(os.path.basename(source_path), e))
+
+    def _probe_key(self, source_path):
+        st = os.stat(source_path)
+        return (source_path, st.st_size, st.st_mtime_ns, self.member_filter.signature if self.member_filter else None)
+
+    def probed_theme_texts(self, source_path):
+        """Returns the text of a theme source's theme files by relative path."""
+        if os.path.isdir(source_path):
+            index = ThemeIndex.from_tree(source_path)
+            return read_tree_theme_texts(source_path, index.theme_txt) if index.theme_txt else {}
+        try:
+            probe_key = self._probe_key(source_path)
+        except OSError:
+            return {}
+        with self._probe_lock:
+            probed = self._probe_cache.get(probe_key + (False,))
+        return dict(probed[1]) if probed else {}
+
+    def report_theme_check(self, theme_name, index, theme_texts, font_names=None):
+        """Checks a theme once per install task and warns about problems that break it at boot."""
+        if not index.theme_txt or index.theme_txt not in theme_texts:
+            return None
+        with self._probe_lock:
+            if theme_name in self._checked_themes:
+                return None
+            self._checked_themes.add(theme_name)
+        check = check_theme_references(index.theme_txt, theme_texts, [index.theme_txt] + index.images + index.fonts, font_names)
+        for line in check.describe():
+            print(f"{theme_name}/{index.theme_txt}: {line}")
+        if not check.ok:
+            problems = [line for line in check.describe() if not line.startswith("unused: ")]
+            if len(problems) > THEME_CHECK_REPORT_LINES:
+                problems = problems[:THEME_CHECK_REPORT_LINES] + ["..."]
+            self.show_message_safe("warning", "warning_theme_check_title", "warning_theme_check_message",
+                                   title_key=self._("warning_theme_check_title", "Theme Problems"),
+                                   message_key=self._("warning_theme_check_message", "Theme '{}' will be installed but may not display correctly at boot:\n{}").format(
+                                       theme_name, "\n".join(problems)))
+        return check
+
+    def check_theme_source(self, source_path):
+        """Checks a theme archive or folder against its own file list; None without theme.txt."""
+        index = self.probe_theme_source(source_path)
+        if not index.theme_txt:
+            return None
+        theme_texts = self.probed_theme_texts(source_path)
+        if os.path.isdir(source_path):
+            font_names = read_tree_font_names(source_path, index.fonts)
+        elif index.theme_txt in theme_texts:
+            font_names = read_archive_font_names(source_path, index.fonts)
+        else:
+            staged = self.stage_theme_source(source_path)
+            try:
+                theme_texts = read_tree_theme_texts(staged.path, staged.index.theme_txt)
+                font_names = read_tree_font_names(staged.path, staged.index.fonts)
+            finally:
+                staged.cleanup()
+        return check_theme_references(index.theme_txt, theme_texts, [index.theme_txt] + index.images + index.fonts, font_names)
+
+    def find_theme_txt(self, root_dir):
+        if not os.path.isdir(root_dir):
+             return None
+        for root, dirs, files in os.walk(root_dir):
+            if "theme.txt" in files:
+                return os.path.join(root, "theme.txt")
+        return None
+
+    def commit_theme_config(self, config_transaction, report_status=True):
+        if config_transaction.committed:
+            return False
+        if config_transaction.config_store.exists():
+            print(self._("print_loaded_existing_json", "Loaded existing ventoy.json"))
+
+        def on_read_error(e):
+            self.show_message_safe("error", "error_json_read_title", "error_json_read_message_existing",
+                                   title_key=self._("error_json_read_title", "JSON Read Error"),
+                                   message_key=self._("error_json_read_message_existing", "Failed to read existing ventoy.json: {}. Creating a new one.").format(e),
+                                   args=[])
+
+        if report_status:
+            self.update_status_safe(0, self._("status_updating_json", "Updating ventoy.json..."), 100)
+        try:
+            if not config_transaction.commit(on_read_error):
+                return False
+            print(self._("print_saved_json_successfully", "Saved ventoy.json successfully."))
+            if report_status:
+                self.update_status_safe(0, self._("status_themes_applied_success", "Themes applied and config updated successfully!"), 100)
+            return True
+
+        except Exception as e:
+            self.show_message_safe("error", "error_json_write_title", "error_json_write_message",
+                                   title_key=self._("error_json_write_title", "JSON Write Error"),
+                                   message_key=self._("error_json_write_message", "Failed to save ventoy.json: {}.").format(e),
+                                   args=[])
+            if report_status:
+                self.update_status_safe(0, self._("status_task_failed", "Task failed."), 100)
+            return False
+
+    def install_theme_to_drive(self, drive, source_path, theme_name, staged, config_transaction, dir_transaction, report, on_bytes=None,
+                               sync_mode=SYNC_MODE_METADATA):
+        theme_dir = os.path.join(drive, THEMES_DIR_NAME, theme_name)
+        index = None
+        if os.path.isdir(theme_dir):
+            index = self.sync_installed_theme(theme_dir, source_path, theme_name, staged, dir_transaction, report, on_bytes, sync_mode)
+            if index is None:
+                print(f"Overwriting existing theme directory: {theme_dir}")
+        if index is None:
+            index = self.write_theme_dir(theme_dir, source_path, theme_name, staged, dir_transaction, report, on_bytes)
+        self.register_installed_theme(drive, theme_dir, theme_name, index, config_transaction)
+
+    def sync_installed_theme(self, theme_dir, source_path, theme_name, staged, dir_transaction, report, on_bytes, sync_mode):
+        """Updates an installed theme in place; returns its index, or None to rewrite it in full."""
+        if not sync_mode:
+            return None
+        if staged:
+            src_dir, index = staged.path, staged.index
+        elif os.path.isdir(source_path):
+            src_dir, index = source_path, None
+        else:
+            return None
+
+        report(self._("status_comparing_theme", "Comparing {} with the installed copy...").format(theme_name))
+        plan = plan_tree_sync(src_dir, theme_dir, verify_hash=sync_mode == SYNC_MODE_HASH, cancel_token=self.cancel_token)
+        if plan is None:
+            return None
+        report(self._("status_syncing_theme", "Updating {} on drive...").format(theme_name))
+        try:
+            written = dir_transaction.sync(theme_name, src_dir, plan, on_bytes=on_bytes, cancel_token=self.cancel_token)
+            self.cancel_token.check()
+        except TaskCancelled:
+            raise
+        except Exception as sync_e:
+            raise Exception(f"Failed to update theme '{theme_name}' on drive: {sync_e}")
+        print(self._("print_synced_theme", "Synced {}: {} written ({} bytes), {} deleted, {} unchanged").format(
+            theme_dir, len(plan.to_write), written, len(plan.to_delete), plan.unchanged))
+        return index if index is not None else ThemeIndex.from_tree(src_dir)
+
+    def write_theme_dir(self, theme_dir, source_path, theme_name, staged, dir_transaction, report, on_bytes):
+        """Writes the whole theme into a work folder and publishes it; returns its index."""
+        work_dir = dir_transaction.partial_dir(theme_name)
+        index = None
+        try:
+            if staged:
+                index = staged.index
+                report(self._("status_writing_to_drive", "Writing {} to drive...").format(theme_name))
+                try:
+                    started = time.monotonic()
+                    file_count, byte_count = commit_staged_tree(staged.path, work_dir, on_bytes=on_bytes, cancel_token=self.cancel_token)
+                    elapsed = time.monotonic() - started
+                    print(self._("print_committed_staged_theme", "Committed {} file(s), {} bytes to {}").format(file_count, byte_count, theme_dir)
+                          + f" in {elapsed:.1f}s ({byte_count / (1024 * 1024) / max(elapsed, 0.001):.1f} MB/s)")
+                except Exception as copy_e:
+                    raise Exception(f"Failed to write theme '{theme_name}' to drive: {copy_e}")
+            elif os.path.isfile(source_path):
+                os.makedirs(work_dir)
+                report(self._("status_extracting", "Extracting {}...").format(theme_name))
+                index = self.extract_theme(source_path, work_dir, on_bytes)
+            elif os.path.isdir(source_path):
+                report(self._("status_copying", "Copying theme folder {}...").format(theme_name))
+                def copy_file(src, dst):
+                    self.cancel_token.check()
+                    shutil.copy2(src, dst)
+                    if on_bytes:
+                        on_bytes(os.path.getsize(src))
+
+                try:
+                    shutil.copytree(source_path, work_dir, copy_function=copy_file)
+                    print(self._("print_copied_theme_folder", "Copied theme folder: {} to {}").format(source_path, theme_dir))
+                except Exception as copy_e:
+                    raise Exception(f"Failed to copy theme folder '{theme_name}': {copy_e}")
+                index = ThemeIndex.from_tree(source_path)
+            if index is None:
+                index = ThemeIndex.from_tree(work_dir)
+            self.cancel_token.check()
+            dir_transaction.publish(theme_name)
+        except BaseException:
+            dir_transaction.discard(theme_name)
+            raise
+        return index
+
+    def register_installed_theme(self, drive, theme_dir, theme_name, index, config_transaction):
+        rel_theme_dir = os.path.relpath(theme_dir, drive).replace("\\", "/")
+        if not index.theme_txt:
+            self.show_message_safe("warning", "warning_theme_txt_not_found_title", "warning_theme_txt_not_found_message",
+                                   title_key=self._("warning_theme_txt_not_found_title", "Warning"),
+                                   message_key=self._("warning_theme_txt_not_found_message", "theme.txt not found in processed theme '{}'. This theme might not work correctly.").format(theme_name))
+            if os.path.exists(theme_dir):
+                 config_transaction.add_theme_path(f"/{rel_theme_dir}")
+            config_transaction.set_theme_fonts(theme_name, [])
+        else:
+            config_transaction.add_theme_path(f"/{rel_theme_dir}/{index.theme_txt}")
+            try:
+                theme_texts = read_tree_theme_texts(theme_dir, index.theme_txt)
+                font_names = read_tree_font_names(theme_dir, index.fonts)
+            except OSError as e:
+                # Its font entries are left as they are.
+                print(f"Warning: Could not read the theme files of '{theme_name}': {e}")
+                return
+            used_fonts = set(THEME_GRAPHS.get(theme_texts.get(index.theme_txt, "")).fonts)
+            config_transaction.set_theme_fonts(theme_name, [f"/{rel_theme_dir}/{rel_path}" for rel_path, font_name in sorted(font_names.items())
+                                                            if font_name in used_fonts])
+            # Themes whose theme files could not be read before installing are checked on the drive.
+            if theme_name not in self._checked_themes:
+                self.report_theme_check(theme_name, index, theme_texts, font_names)
+
+    def write_themes_to_drive(self, drive, jobs, pipeline, consumer, skipped_names, report, on_bytes, step_done, report_config_status,
+                              sync_mode=SYNC_MODE_METADATA):
+        config_transaction = ThemeConfigTransaction(VentoyConfigStore(drive))
+        dir_transaction = ThemeDirTransaction(os.path.join(drive, THEMES_DIR_NAME))
+        cancelled = False
+        try:
+            for index, (source_path, theme_name) in enumerate(jobs):
+                self.cancel_token.check()
+                if theme_name in skipped_names:
+                    pipeline.release(consumer, index)
+                    step_done(index)
+                    report(skipped_names[theme_name])
+                    continue
+                try:
+                    staged = pipeline.get(consumer, index)
+                    self.install_theme_to_drive(drive, source_path, theme_name, staged, config_transaction, dir_transaction, report, on_bytes,
+                                                sync_mode)
+                    step_done(index)
+                    report(self._("status_processed", "Processed {}").format(theme_name))
+
+                except Exception as e:
+                     error_message = self._("error_processing_theme_message", "Error processing theme '{}': {}").format(theme_name, e)
+                     print(error_message)
+                     if pipeline.claim_error_report(e):
+                         self.show_message_safe("error", "error_processing_theme_title", "",
+                                                title_key=self._("error_processing_theme_title", "Processing Error"),
+                                                message_key="",
+                                                args=[error_message])
+                     step_done(index)
+                     report(self._("status_error_processing_theme", "Error processing {}").format(theme_name))
+
+                finally:
+                    pipeline.release(consumer, index)
+
+            self.commit_theme_config(config_transaction, report_status=report_config_status)
+        except TaskCancelled:
+            cancelled = True
+            dir_transaction.rollback()
+            print(f"Install to {drive} cancelled; theme folders rolled back.")
+        finally:
+            if not cancelled:
+                self.commit_theme_config(config_transaction, report_status=False)
+            dir_transaction.commit()
+            for index in range(len(jobs)):
+                if not pipeline.released(consumer, index):
+                    pipeline.release(consumer, index)
+
+    def preflight_install(self, drive, jobs, job_indexes, skipped_names, sync_mode):
+        """Returns {theme name: status message} for the themes that do not fit on `drive`."""
+        try:
+            planner = InstallSpacePlanner.for_drive(drive)
+        except Exception as e:
+            print(f"Warning: Could not check free space on {drive}: {e}")
+            return {}
+        themes_dir = os.path.join(drive, THEMES_DIR_NAME)
+        rejected = {}
+        for (source_path, theme_name), index in zip(jobs, job_indexes):
+            if index is None or theme_name in skipped_names:
+                continue
+            theme_dir = os.path.join(themes_dir, theme_name)
+            replaced_bytes = 0
+            if sync_mode and os.path.isdir(theme_dir):
+                # A sync only writes what changed, so the installed copy's
+                # footprint is credited; a full rewrite keeps it as a backup.
+                replaced_bytes = ThemeIndex.from_tree(theme_dir).disk_footprint(planner.cluster_size)
+            reason = planner.check(theme_dir, index, replaced_bytes)
+            if reason:
+                key, default, args = reason
+                rejected[theme_name] = self._(key, default).format(*args)
+        if rejected:
+            details = "\n".join(f"{name}: {reason}" for name, reason in rejected.items())
+            print(f"Pre-flight on {drive} rejected {len(rejected)} theme(s):\n{details}")
+            self.show_message_safe("warning", "warning_preflight_title", "warning_preflight_message",
+                                   title_key=self._("warning_preflight_title", "Themes Skipped"),
+                                   message_key=self._("warning_preflight_message", "These themes will not be installed to {}:\n\n{}").format(drive, details))
+        return {name: self._("status_skipped_preflight", "Skipped {}: {}").format(name, reason) for name, reason in rejected.items()}
+
+    def apply_theme_to_drives_task(self, drives, theme_sources_paths, stage_on_host=True, sync_mode=SYNC_MODE_METADATA):
+        pipeline = None
+        image_optimizer = None
+        try:
+            total = len(theme_sources_paths)
+            if total == 0:
+                self.update_status_safe(0, self._("status_no_theme_items_warning_message", "No theme items to process."), 100)
+                return
+
+            multi_drive = len(drives) > 1
+            jobs = []
+            skipped_names = {drive: {} for drive in drives}
+            for source_path in theme_sources_paths:
+                if not os.path.exists(source_path):
+                    self.update_status_safe(0, self._("status_skipped_missing_source", "Skipping missing source: {}").format(os.path.basename(source_path)), 0)
+                    self.show_message_safe("warning", "warning_source_not_found_title", "warning_source_not_found_message",
+                                           title_key=self._("warning_source_not_found_title", "Source Not Found"),
+                                           message_key=self._("warning_source_not_found_message", "Theme source not found: {}. Skipping.").format(os.path.basename(source_path)))
+                    continue
+                theme_name = os.path.splitext(os.path.basename(source_path))[0] if os.path.isfile(source_path) else os.path.basename(source_path)
+                drives_with_theme = [drive for drive in drives if os.path.isdir(os.path.join(drive, THEMES_DIR_NAME, theme_name))]
+                if drives_with_theme:
+                    self.update_status_safe(0, self._("status_confirming_overwrite", "Confirming overwrite for {}...").format(theme_name), 0)
+                    if not self.confirm_overwrite(theme_name):
+                        skipped_message = self._("status_skipped_existing_theme", "Skipped existing theme: {}").format(theme_name)
+                        for drive in drives_with_theme:
+                            skipped_names[drive][theme_name] = skipped_message
+                        if len(drives_with_theme) == len(drives):
+                            self.update_status_safe(0, skipped_message, 0)
+                            continue
+                jobs.append((source_path, theme_name))
+
+            job_indexes = []
+            with self._probe_lock:
+                self._checked_themes = set()
+            for source_path, theme_name in jobs:
+                try:
+                    index = self.probe_theme_source(source_path)
+                except Exception as e:
+                    print(f"Warning: Could not size '{source_path}' for progress reporting: {e}")
+                    job_indexes.append(None)
+                    continue
+                job_indexes.append(index)
+                try:
+                    self.report_theme_check(theme_name, index, self.probed_theme_texts(source_path))
+                except OSError as e:
+                    print(f"Warning: Could not check '{theme_name}': {e}")
+
+            self.update_status_safe(0, self._("status_checking_free_space", "Checking free space..."), 0)
+            for drive in drives:
+                skipped_names[drive].update(self.preflight_install(drive, jobs, job_indexes, skipped_names[drive], sync_mode))
+            kept = [i for i, (_, theme_name) in enumerate(jobs) if any(theme_name not in skipped_names[drive] for drive in drives)]
+            jobs = [jobs[i] for i in kept]
+            job_indexes = [job_indexes[i] for i in kept]
+            if not jobs:
+                self.update_status_safe(0, self._("status_nothing_to_install", "Nothing left to install."), 100)
+                return
+
+            if self.optimize_images and stage_on_host:
+                if ThemeImageOptimizer.available():
+                    image_optimizer = ThemeImageOptimizer(self.target_gfxmode(drives))
+                else:
+                    self.show_message_safe("warning", "warning_pillow_missing_title", "warning_pillow_missing_message",
+                                           title_key=self._("warning_pillow_missing_title", "Image Optimization Unavailable"),
+                                           message_key=self._("warning_pillow_missing_message", "The 'Pillow' library is not installed, so theme images are installed unchanged. Install it using 'pip install pillow'."))
+
+            # Progress is measured in bytes: the uncompressed size of every theme
+            # (from the archive probe) is extracted once on the host when staging
+            # and then written once to every drive. Each drive has its own meter
+            # so its write speed can be told apart from the extraction speed.
+            job_bytes = [index.total_bytes if index else 0 for index in job_indexes]
+            extract_total = sum(size for size, (source_path, _) in zip(job_bytes, jobs) if stage_on_host and os.path.isfile(source_path))
+            overall_meter = TransferMeter(extract_total + sum(job_bytes) * len(drives))
+            extract_meter = TransferMeter(extract_total)
+            job_index = {job: index for index, job in enumerate(jobs)}
+
+            def overall_status(message, meter):
+                return f"{message} {meter.describe()}" if meter.done_bytes else message
+
+            def stage_job(source_path, theme_name):
+                size = job_bytes[job_index[(source_path, theme_name)]] if stage_on_host and os.path.isfile(source_path) else 0
+                extracted = [0]
+                message = self._("status_extracting", "Extracting {}...").format(theme_name)
+
+                def on_bytes(byte_count):
+                    extracted[0] += byte_count
+                    extract_meter.add(byte_count)
+                    overall_meter.add(byte_count)
+                    if overall_meter.due():
+                        self.update_status_safe(0, overall_status(message, extract_meter), overall_meter.percent())
+
+                try:
+                    self.cancel_token.check()
+                    if not stage_on_host:
+                        return self.stage_theme_source(source_path, cache_only=True) if os.path.isfile(source_path) else None
+                    return self.stage_theme_source(
+                        source_path,
+                        on_extract=lambda: self.update_status_safe(0, message, overall_meter.percent()),
+                        on_bytes=on_bytes,
+                        image_optimizer=image_optimizer,
+                        on_optimize=lambda: self.update_status_safe(
+                            0, self._("status_optimizing_images", "Optimizing images of {}...").format(theme_name), overall_meter.percent()))
+                finally:
+                    remaining = size - extracted[0]
+                    if remaining > 0:
+                        extract_meter.add(remaining)
+                        overall_meter.add(remaining)
+
+            def drive_channel(drive):
+                drive_meter = TransferMeter(sum(job_bytes))
+                state = {'message': "", 'written': 0}
+
+                def report(message):
+                    if multi_drive:
+                        message = f"[{drive}] {message}"
+                    state['message'] = message
+                    self.update_status_safe(0, message, overall_meter.percent())
+
+                def on_bytes(byte_count):
+                    state['written'] += byte_count
+                    drive_meter.add(byte_count)
+                    overall_meter.add(byte_count)
+                    if overall_meter.due():
+                        self.update_status_safe(0, overall_status(state['message'], drive_meter), overall_meter.percent())
+
+                def step_done(index):
+                    remaining = job_bytes[index] - state['written']
+                    state['written'] = 0
+                    if remaining > 0:
+                        drive_meter.add(remaining)
+                        overall_meter.add(remaining)
+                return report, on_bytes, step_done
+
+            pipeline = StagingPipeline(stage_job, jobs, len(drives), workers=self.install_workers)
+            writers = []
+            for consumer, drive in enumerate(drives):
+                report, on_bytes, step_done = drive_channel(drive)
+                writer = threading.Thread(target=self.write_themes_to_drive,
+                                          args=(drive, jobs, pipeline, consumer, skipped_names[drive], report, on_bytes, step_done, not multi_drive,
+                                                sync_mode))
+                writer.start()
+                writers.append(writer)
+            for writer in writers:
+                writer.join()
+
+            if self.cancel_token.cancelled:
+                self.update_status_safe(0, self._("status_install_cancelled", "Cancelled; drive left unchanged."), 0)
+            elif multi_drive:
+                self.update_status_safe(0, self._("status_themes_applied_to_drives", "Themes applied to {} drive(s).").format(len(drives)), 100)
+            self.refresh_drive_view()
+
+        except Exception as e:
+             error_message = self._("error_task_message", "An unexpected error occurred during task: {}\\n{}").format(str(e), traceback.format_exc())
+             print(error_message)
+             self.show_message_safe("error", "error_task_title", "",
+                                    title_key=self._("error_task_title", "Task Error"),
+                                    message_key="",
+                                    args=[error_message])
+             self.update_status_safe(0, self._("status_apply_theme_task_failed", "Theme application task failed."), 100)
+
+        finally:
+            try:
+                if pipeline is not None:
+                    pipeline.close()
+            finally:
+                try:
+                    if image_optimizer is not None:
+                        image_optimizer.shutdown()
+                finally:
+                    self.task_finished(0)
+
+    def target_gfxmode(self, drives):
+        """Returns the largest gfxmode of the drives' ventoy.json, or None for 'max'."""
+        largest = None
+        for drive in drives:
+            try:
+                config_store = VentoyConfigStore(drive)
+                gfxmode = config_store.load().get('theme', {}).get('gfxmode') if config_store.exists() else None
+            except Exception as e:
+                print(f"Warning: Could not read gfxmode from {drive}: {e}")
+                gfxmode = None
+            size = parse_gfxmode(gfxmode)
+            if size is None:
+                return None
+            if largest is None or size[0] * size[1] > largest[0] * largest[1]:
+                largest = size
+        return largest
+
+    def apply_theme_task(self, drive, theme_sources_paths, stage_on_host=True, sync_mode=SYNC_MODE_METADATA):
+        self.apply_theme_to_drives_task([drive], theme_sources_paths, stage_on_host, sync_mode)
+
+    def list_installed_themes(self, drive):
+        """Returns (theme folder name, registered in ventoy.json) pairs for `drive`."""
+        registered = set()
+        config_store = VentoyConfigStore(drive)
+        if config_store.exists():
+            try:
+                theme_files = config_store.load().get('theme', {}).get('file', [])
+                registered = {theme_folder_of(p) for p in theme_files} - {None}
+            except Exception as e:
+                print(self._("print_warning_failed_read_json_settings", "Warning: Failed to read ventoy.json settings from {}: {}").format(drive, e))
+        themes_disk_path = os.path.join(drive, THEMES_DIR_NAME)
+        if not os.path.isdir(themes_disk_path):
+            return []
+        names = sorted(item for item in os.listdir(themes_disk_path)
+                       if os.path.isdir(os.path.join(themes_disk_path, item)) and not is_theme_work_dir(item))
+        return [(name, name in registered) for name in names]
+
+    def apply_settings_task(self, drive, selected_theme, resolution):
+        try:
+            config_store = VentoyConfigStore(drive)
+            if not config_store.exists():
+                 self.show_message_safe("warning", "warning_ventoy_json_not_found_settings_title", "warning_ventoy_json_not_found_settings_message")
+                 return
+            try:
+                config = config_store.load()
+            except json.JSONDecodeError:
+                self.show_message_safe("error", "error_json_read_settings_title", "error_json_read_settings_message", drive=drive)
+                return
+            except PermissionError:
+                self.show_message_safe("error", "permission_error_title", "error_permission_read_json_settings_message", drive=drive)
+                return
+            except Exception as e:
+                 self.show_message_safe("error", "generic_error_title", "error_unexpected_read_json_settings_message", str(e))
+                 return
+            config.setdefault('theme', {})
+            theme_config = config['theme']
+            sel = selected_theme
+            theme_paths_in_json = theme_config.get('file', [])
+            theme_names_in_json = [os.path.basename(os.path.dirname(p)) for p in theme_paths_in_json if p and os.path.dirname(p)]
+            if sel == self._("option_random_theme", "Random Theme"):
+                theme_config['default_file'] = 0
+            elif sel and sel in theme_names_in_json:
+                 try:
+                      target_suffix_txt = f"/{sel}/theme.txt"
+                      target_suffix_dir = f"/{sel}"
+
+                      index_in_json = -1
+                      for i, p in enumerate(theme_paths_in_json):
+                          if not p or not isinstance(p, str):
+                              continue
+                          p_lower = p.lower().replace("\\", "/")
+                          target_suffix_txt_lower = target_suffix_txt.lower().replace("\\", "/")
+                          target_suffix_dir_lower = target_suffix_dir.lower().replace("\\", "/")
+                          if p_lower.endswith(target_suffix_txt_lower) or p_lower == target_suffix_dir_lower:
+                              index_in_json = i
+                              break
+
+                      if index_in_json != -1:
+                          theme_config['default_file'] = index_in_json + 1
+                      else:
+                          print(self._("print_warning_selected_default_theme_not_found_load", "Selected default theme '{}' not found in ventoy.json. Resetting to Random Theme.").format(sel))
+                          theme_config['default_file'] = 0
+                          self.on_default_theme_reset()
+
+                 except Exception as e:
+                      print(self._("print_error_finding_theme_index", "Error finding theme index in JSON: {}").format(e))
+                      theme_config['default_file'] = 0
+                      self.on_default_theme_reset()
+
+
+            else:
+                 self.show_message_safe("warning", "warning_select_drive_title", "warning_selected_default_theme_not_found", sel)
+                 self.on_default_theme_reset()
+                 theme_config['default_file'] = 0
+            if resolution in RESOLUTIONS:
+                 theme_config['gfxmode'] = resolution
+            else:
+                 if resolution is not None:
+                      print(self._("warning_resolution_not_in_list", "Warning: Selected resolution '{resolution}' is not in the allowed list. Keeping current or default.").format(resolution=resolution))
+                 if 'gfxmode' not in theme_config or theme_config['gfxmode'] not in RESOLUTIONS:
+                      theme_config['gfxmode'] = 'max'
+            try:
+                config_store.save(config)
+                self.refresh_drive_view()
+
+            except PermissionError:
+                self.show_message_safe("error", "permission_error_title", "error_permission_write_json_settings_message", drive=drive)
+                return
+            except Exception as e:
+                self.show_message_safe("error", "error_unexpected_settings_title", "error_unexpected_write_json_settings_message", str(e))
+                return
+
+
+        except Exception as e:
+             self.show_message_safe("error", "error_unexpected_settings_title", "error_unexpected_settings_message", str(e), traceback.format_exc())
+
+        finally:
+            self.task_finished(1, reset_status=False)
+
+    def remove_theme_task(self, drive, selected_theme):
+        self.remove_themes_task(drive, [selected_theme])
+
+    def remove_themes_task(self, drive, selected_themes):
+        """Removes a set of theme folders from `drive` and their ventoy.json entries."""
+
+        try:
+            config_store = VentoyConfigStore(drive)
+            themes_root = os.path.join(drive, THEMES_DIR_NAME)
+            themes_label = ", ".join(selected_themes)
+            MAX_STATUS_LENGTH = 50
+            prefix_del = self._("status_deleting_theme_prefix", "Deleting theme '")
+            suffix_del = self._("status_deleting_theme_suffix", "'...")
+            available_length_del = MAX_STATUS_LENGTH - len(prefix_del) - len(suffix_del)
+            short_name_del = themes_label if len(themes_label) <= available_length_del else themes_label[:available_length_del - 3] + "..."
+            self.update_status_safe(2, f"{prefix_del}{short_name_del}{suffix_del}", 0)
+            existing_themes = []
+            for theme in selected_themes:
+                if os.path.exists(os.path.join(themes_root, theme)):
+                    existing_themes.append(theme)
+                else:
+                    print(self._("print_warning_theme_folder_not_found_skip", "Warning: Theme folder not found, skipping deletion: {}").format(os.path.join(themes_root, theme)))
+            removed_themes = self.delete_theme_folders(themes_root, existing_themes, progress_span=60) if existing_themes else []
+            failed_themes = [theme for theme in existing_themes if theme not in removed_themes]
+            if failed_themes:
+                self.update_status_safe(2, self._("status_failed_delete_theme_folder", "Failed to delete theme folder."), 60)
+                self.show_message_safe("warning", "warning_partial_deletion_title", "warning_partial_deletion_message_unexpected",
+                                       title_key=self._("warning_partial_deletion_title", "Partial Deletion"),
+                                       message_key=self._("warning_partial_deletion_message_unexpected", "Could not delete theme folder '{}' due to an unexpected error. Attempting to update ventoy.json.").format(", ".join(failed_themes)),
+                                       args=[])
+            self.update_status_safe(2, self._("status_updating_config", "Updating config file..."), 60)
+            if config_store.exists():
+                try:
+                    config = config_store.load()
+                except json.JSONDecodeError:
+                    self.show_message_safe("error", "error_json_read_remove_title", "error_json_read_remove_message",
+                                           title_key=self._("error_json_read_remove_title", "JSON Error"),
+                                           message_key=self._("error_json_read_remove_message", "Failed to read ventoy.json on {drive}. File might be corrupted. Cannot update config.").format(drive=drive),
+                                           args=[])
+                    self.update_status_safe(2, self._("status_failed_update_config", "Failed to update config."), 100)
+                    self.show_message_safe("info", "dialog_deletion_status_title", "dialog_deletion_status_json_error",
+                                           title_key=self._("dialog_deletion_status_title", "Deletion Status"),
+                                           message_key=self._("dialog_deletion_status_json_error", "Theme folder '{}' deletion attempted, but ventoy.json could not be updated due to a JSON error.").format(themes_label),
+                                           args=[])
+                    self.refresh_drive_view()
+                    return
+
+                except PermissionError:
+                    self.show_message_safe("error", "permission_error_title", "error_permission_read_json_remove_message",
+                                           title_key=self._("permission_error_title", "Permission Error"),
+                                           message_key=self._("error_permission_read_json_remove_message", "Permission denied while reading ventoy.json on {drive}. Cannot update config.").format(drive=drive),
+                                           args=[])
+                    self.update_status_safe(2, self._("status_failed_update_config", "Failed to update config."), 100)
+                    self.show_message_safe("info", "dialog_deletion_status_title", "dialog_deletion_status_permission_error",
+                                           title_key=self._("dialog_deletion_status_title", "Deletion Status"),
+                                           message_key=self._("dialog_deletion_status_permission_error", "Theme folder '{}' deletion attempted, but ventoy.json could not be updated due to a permission error.").format(themes_label),
+                                           args=[])
+                    self.refresh_drive_view()
+                    return
+
+                except Exception as e:
+                    self.show_message_safe("error", "generic_error_title", "error_unexpected_read_json_remove_message",
+                                           title_key=self._("generic_error_title", "Error"),
+                                           message_key=self._("error_unexpected_read_json_remove_message", "An unexpected error occurred while reading ventoy.json: {}").format(str(e)),
+                                           args=[])
+                    self.update_status_safe(2, self._("status_failed_update_config", "Failed to update config."), 100)
+                    self.show_message_safe("info", "dialog_deletion_status_title", "dialog_deletion_status_unexpected_error",
+                                           title_key=self._("dialog_deletion_status_title", "Deletion Status"),
+                                           message_key=self._("dialog_deletion_status_unexpected_error", "Theme folder '{}' deletion attempted, but ventoy.json could not be updated due to an unexpected error.").format(themes_label),
+                                           args=[])
+                    self.refresh_drive_view()
+                    return
+
+
+                if 'theme' in config:
+                    had_default = config['theme'].get('default_file', 0) > 0
+                    font_entries = list(config['theme'].get('fonts', []))
+                    drop_theme_entries(config['theme'], selected_themes)
+                    # Fonts the removed themes shared with the remaining ones are listed again from a remaining copy.
+                    config['theme']['fonts'] = update_theme_fonts(drive, config['theme']['file'], font_entries,
+                                                                  {theme_name: [] for theme_name in selected_themes})
+                    if had_default and config['theme']['default_file'] == 0:
+                         print(self._("print_resetting_default_theme_to_random", "Resetting default theme to Random."))
+                    try:
+                        config_store.save(config)
+                        print(self._("print_updated_json_successfully", "Updated ventoy.json successfully."))
+                    except PermissionError:
+                        self.show_message_safe("error", "permission_error_title", "error_permission_write_json_settings_message",
+                                               title_key=self._("permission_error_title", "Permission Error"),
+                                               message_key=self._("error_permission_write_json_settings_message", "Permission denied while writing to ventoy.json on {drive}. Make sure you have write access.").format(drive=drive),
+                                               args=[])
+                        self.update_status_safe(2, self._("status_failed_update_config", "Failed to update config."), 100)
+                        return
+                    except Exception as e:
+                        self.show_message_safe("error", "generic_error_title", "error_unexpected_write_json_settings_message",
+                                               title_key=self._("generic_error_title", "Error"),
+                                               message_key=self._("error_unexpected_write_json_settings_message", "An unexpected error occurred while writing to ventoy.json: {}").format(str(e)),
+                                               args=[])
+                        self.update_status_safe(2, self._("status_failed_update_config", "Failed to update config."), 100)
+                        return
+
+                else:
+                    self.show_message_safe("info", "dialog_deletion_status_title", "info_themes_deleted_json_not_found_message",
+                                           title_key=self._("dialog_deletion_status_title", "Deletion Status"),
+                                           message_key=self._("info_themes_deleted_json_not_found_message", "Themes deleted, but ventoy.json not found."))
+
+
+            self.update_status_safe(2, self._("status_config_update_processed", "Config update processed."), 80)
+            self.refresh_drive_view()
+
+            prefix_done = self._("status_theme_deletion_finished_prefix", "Theme '")
+            suffix_done = self._("status_theme_deletion_finished_suffix", "' deletion process finished.")
+            available_length_done = MAX_STATUS_LENGTH - len(prefix_done) - len(suffix_done)
+            short_name_done = themes_label if len(themes_label) <= available_length_done else themes_label[:available_length_done - 3] + "..."
+            self.update_status_safe(2, f"{prefix_done}{short_name_done}{suffix_done}", 100)
+
+
+        except TaskCancelled:
+            print("Theme removal cancelled; ventoy.json left unchanged.")
+            self.update_status_safe(2, self._("status_removal_cancelled", "Removal cancelled; ventoy.json unchanged."), 0)
+            self.refresh_drive_view()
+
+        except Exception as e:
+            self.show_message_safe("error", "generic_error_title", "error_during_theme_deletion_task",
+                                   title_key=self._("generic_error_title", "Error"),
+                                   message_key=self._("error_during_theme_deletion_task", "Error during theme deletion task: {}\\n{}").format(str(e), traceback.format_exc()),
+                                   args=[])
+            self.update_status_safe(2, self._("status_unexpected_error_deletion", "An unexpected error occurred during deletion."), 100)
+
+
+        finally:
+            self.task_finished(2)
+
+    def delete_theme_folders(self, theme_dir, themes, progress_span=100):
+        """Deletes the given theme folders in one pass; returns the names actually removed."""
+        self.update_status_safe(2, self._("status_scanning_themes_for_deletion", "Scanning {} theme folder(s)...").format(len(themes)), 0)
+        roots = {os.path.join(theme_dir, theme): theme for theme in themes}
+        deleter = TreeDeleter(roots, cancel_token=self.cancel_token)
+        file_total = deleter.scan()
+        meter = TransferMeter(file_total)
+        message = self._("status_deleting_files", "Deleting {} of {} files...")
+
+        def on_file():
+            meter.add(1)
+            if meter.due():
+                self.update_status_safe(2, message.format(meter.done_bytes, file_total), meter.percent() * progress_span / 100)
+
+        deleter.on_file = on_file
+        errors = deleter.run()
+        removed = []
+        for theme_path, theme in roots.items():
+            error = errors.get(theme_path)
+            if error is None:
+                removed.append(theme)
+                print(self._("print_theme_folder_deleted", "Theme folder deleted: {}").format(theme_path))
+            elif isinstance(error, FileNotFoundError):
+                removed.append(theme)
+                print(self._("print_warning_theme_folder_not_found_during_delete", "Warning: Theme folder not found during deletion (already removed?): {}").format(theme_path))
+            elif isinstance(error, PermissionError):
+                self.show_message_safe("error", "permission_error_title", "error_permission_deleting_folder", theme)
+            else:
+                self.show_message_safe("error", "generic_error_title", "error_deleting_theme_file", theme, str(error))
+        self.update_status_safe(2, message.format(file_total, file_total), progress_span)
+        return removed
+
+    def remove_all_themes_task(self, drive):
+        try:
+            theme_dir = os.path.join(drive, "ventoy", "theme")
+            config_store = VentoyConfigStore(drive)
+            themes_to_delete = []
+            if os.path.exists(theme_dir) and os.path.isdir(theme_dir):
+                try:
+                    themes_to_delete = [item for item in os.listdir(theme_dir) if os.path.isdir(os.path.join(theme_dir, item))]
+                except PermissionError:
+                    self.show_message_safe("error", "permission_error_title", "error_permission_listing_theme_dir")
+                    self.update_status_safe(2, self._("status_failed_list_themes_for_deletion", "Failed to list themes for deletion."), 100)
+                except Exception as e:
+                    self.show_message_safe("error", "generic_error_title", "error_listing_theme_directory", str(e))
+                    self.update_status_safe(2, self._("status_failed_list_themes_for_deletion", "Failed to list themes for deletion."), 100)
+
+            total = len(themes_to_delete)
+            if total == 0:
+                self.update_status_safe(2, self._("status_no_themes_found_in_directory", "No themes found in directory to delete."), 100)
+            else:
+                self.delete_theme_folders(theme_dir, themes_to_delete, progress_span=80)
+            if config_store.exists():
+                try:
+                    self.update_status_safe(2, self._("status_updating_config", "Updating config file..."), 80)
+                    config = config_store.load()
+                    if 'theme' in config:
+                         config['theme']['file'] = []
+                         config['theme']['fonts'] = []
+                         config['theme']['images'] = []
+                         config['theme']['default_file'] = 0
+                    config_store.save(config)
+                    print(self._("print_updated_json_successfully", "Updated ventoy.json successfully."))
+                    self.update_status_safe(2, self._("status_config_update_processed", "Config update processed."), 90)
+
+                except json.JSONDecodeError:
+                    self.show_message_safe("error", "error_json_read_remove_title", "error_json_corrupted_message")
+                    self.update_status_safe(2, self._("status_failed_update_ventoy_json_remove", "Failed to update ventoy.json."), 100)
+                except PermissionError:
+                    self.show_message_safe("error", "permission_error_title", "error_permission_writing_ventoy_json_remove")
+                    self.update_status_safe(2, self._("status_failed_update_ventoy_json_remove", "Failed to update ventoy.json."), 100)
+                except Exception as e:
+                    self.show_message_safe("error", "generic_error_title", "error_failed_update_ventoy_json_remove", str(e))
+                    self.update_status_safe(2, self._("status_failed_update_ventoy_json_remove", "Failed to update ventoy.json."), 100)
+            elif total > 0:
+                self.show_message_safe("info", "generic_info_title", "info_themes_deleted_json_not_found_message")
+            self.update_status_safe(2, self._("status_all_themes_removed_config_updated", "All themes removed and config updated."), 100)
+            self.refresh_drive_view()
+
+        except TaskCancelled:
+            print("Theme removal cancelled; ventoy.json left unchanged.")
+            self.update_status_safe(2, self._("status_removal_cancelled", "Removal cancelled; ventoy.json unchanged."), 0)
+            self.refresh_drive_view()
 
-        self.all_translations = []
-        self._messages = {}
+        except Exception as e:
+            self.show_message_safe("error", "generic_error_title", "error_during_remove_all_themes_task", str(e), traceback.format_exc())
+            self.update_status_safe(2, self._("status_unexpected_error_remove_all", "Unexpected error occurred."), 100)
 
-        try:
-            if os.path.exists(translation_file_path):
-                with open(translation_file_path, 'r', encoding='utf-8') as f:
-                    loaded_data = json.load(f)
-                if isinstance(loaded_data, list) and loaded_data:
-                    self.all_translations = loaded_data
-                    if self.all_translations and self.all_translations[0] and isinstance(self.all_translations[0], dict):
-                         self._messages = self.all_translations[0]
-                         print("Translations loaded successfully. Using the first language as default.")
-                    else:
-                         print(f"Warning: First language in '{translation_file_path}' has unexpected format. Using fallback keys.")
-                         self._messages = {}
-                else:
-                    print(f"Warning: Translation file '{translation_file_path}' is empty or has unexpected format (not a list). Using fallback keys.")
-                    self.all_translations = []
-                    self._messages = {}
+        finally:
+            self.task_finished(2)
 
-            else:
-                print(f"Warning: Translation file not found at '{translation_file_path}'. Using fallback keys.")
-                self.all_translations = []
-                self._messages = {}
 
-        except json.JSONDecodeError as e:
-             print(f"Error decoding translation JSON from '{translation_file_path}': {e}. Using fallback keys.")
-             self.all_translations = []
-             self._messages = {}
-        except Exception as e:
-            print(f"Error loading translation file '{translation_file_path}': {e}. Using fallback keys.")
-            self.all_translations = []
-            self._messages = {}
+class VentoyThemer(VentoyThemerCore):
+    def __init__(self, root):
+        self.root = root
+        self.ui_bus = UiBus()
+        super().__init__()
+        base_dir = self.base_dir
         self.root.geometry("440x385")
         root.resizable(False, False)
         try:
@@ -174,10 +3608,12 @@ class VentoyThemer:
         self.default_theme_var = tk.StringVar()
         self.resolution_var = tk.StringVar()
         self.language_var = tk.StringVar()
+        self.stage_on_host_var = tk.BooleanVar(value=True)
+        self.sync_existing_var = tk.BooleanVar(value=True)
+        self.sync_verify_hash_var = tk.BooleanVar(value=False)
+        self.skip_unused_files_var = tk.BooleanVar(value=False)
+        self.optimize_images_var = tk.BooleanVar(value=False)
         
-        self.app_version = "Unknown" 
-        self._load_version() 
-
         self.style = ttk.Style()
         self.status_bar_install = tk.StringVar()
         self.progress_value_install = tk.DoubleVar(value=0)
@@ -191,8 +3627,14 @@ class VentoyThemer:
         self.current_drive = ""
         self.drive_combos = []
         self.language_combo = None
+        self.stage_on_host_check = None
+        self.sync_existing_check = None
+        self.sync_verify_hash_check = None
+        self.skip_unused_files_check = None
+        self.optimize_images_check = None
 
         self.translatable_widgets = []
+        self.task_controls = {}
         self.define_styles()
         self.create_widgets()
         if self._messages and 'name' in self._messages:
@@ -204,7 +3646,11 @@ class VentoyThemer:
         else:
              self.language_var.set("Default")
         self.update_gui_language()
+        self.drive_inventory = DriveInventory(on_change=lambda values: self.ui_bus.post(self.apply_drive_list, values))
         self.update_usb_drives()
+        self.on_drive_selected()
+        self.drive_inventory.start()
+        self._pump_ui()
 
     def update_gui_language(self):
         """Updates translatable GUI elements with the currently selected language."""
@@ -237,35 +3683,6 @@ class VentoyThemer:
         self.status_bar_remove.set(self._("status_ready", "Status - READY"))
 
 
-    def _load_version(self):
-        """Loads the application version from the 'version' file."""
-        base_dir = os.path.dirname(sys.executable) if hasattr(sys, '_MEIPASS') else os.path.dirname(__file__)
-        version_file_path = os.path.join(base_dir, "VentoyThemer", "version")
-
-        try:
-            if os.path.exists(version_file_path):
-                with open(version_file_path, 'r', encoding='utf-8') as f:
-                    self.app_version = f.read().strip()
-                    if not self.app_version: 
-                         self.app_version = "Unknown (Empty File)"
-            else:
-                self.app_version = "Unknown (File not found)"
-                print(f"Warning: Version file not found at {version_file_path}")
-        except Exception as e:
-             self.app_version = f"Error loading version: {e}"
-             print(f"Error reading version file {version_file_path}: {e}")
-
-    def _(self, key, default=None):
-        """
-        Looks up a translation key in the currently active messages dictionary (_messages).
-        """
-        if self._messages and key in self._messages:
-            return self._messages[key]
-        else:
-             if default is not None:
-                 return default
-             return key
-
     def _get_truncated_name(self, name, max_length=33, ellipsis="..."):
         if len(name) > max_length:
             return name[:max_length - len(ellipsis)] + ellipsis
@@ -373,39 +3790,31 @@ class VentoyThemer:
             self.progress_value_remove.set(0)
 
     def update_status_safe(self, tab_index, message, progress=None):
-        def update_gui():
-            if tab_index == 0:
-                self.status_bar_install.set(message)
-                if progress is not None:
-                    self.progress_value_install.set(progress)
-            elif tab_index == 1:
-                self.status_bar_settings.set(message)
-                if progress is not None:
-                    self.progress_value_settings.set(progress)
-            elif tab_index == 2:
-                self.status_bar_remove.set(message)
-                if progress is not None:
-                    self.progress_value_remove.set(progress)
-
-            self.root.update_idletasks()
-
-        self.root.after(0, update_gui)
-
-    def show_message_safe(self, type, title_key, message_key, *args, **kwargs):
-        def show_gui_message():
-            translated_title = self._(title_key, title_key)
+        self.ui_bus.post_status(tab_index, message, progress)
+
+    def _apply_status(self, tab_index, message, progress):
+        if tab_index == 0:
+            self.status_bar_install.set(message)
+            if progress is not None:
+                self.progress_value_install.set(progress)
+        elif tab_index == 1:
+            self.status_bar_settings.set(message)
+            if progress is not None:
+                self.progress_value_settings.set(progress)
+        elif tab_index == 2:
+            self.status_bar_remove.set(message)
+            if progress is not None:
+                self.progress_value_remove.set(progress)
+
+    def _pump_ui(self):
+        try:
+            self.ui_bus.drain(self._apply_status)
+        finally:
+            self.root.after(UI_PUMP_INTERVAL_MS, self._pump_ui)
 
-            if message_key:
-                 translated_message = self._(message_key, message_key)
-                 try:
-                      formatted_message = translated_message.format(*args, **kwargs)
-                 except (IndexError, KeyError) as e:
-                      print(f"Formatting error for message key '{message_key}': {e}. Using raw translation.")
-                      formatted_message = translated_message
-            else:
-                 formatted_message = args[0] if args else "Unknown Message"
-                 if (args or kwargs) and not message_key:
-                     print(f"Warning: show_message_safe called without message_key but with args/kwargs. Args: {args}, kwargs: {kwargs}")
+    def show_message_safe(self, type, *args, **kwargs):
+        def show_gui_message():
+            translated_title, formatted_message = self.format_message(*args, **kwargs)
 
             if type == "info":
                 messagebox.showinfo(translated_title, formatted_message)
@@ -416,11 +3825,12 @@ class VentoyThemer:
             else:
                  print(f"Error: show_message_safe called with unsupported type: {type}")
 
-        self.root.after(0, show_gui_message)
+        self.ui_bus.post(show_gui_message)
 
     def set_buttons_state(self, state):
         def set_state():
-            for btn in [self.apply_btn_install, self.browse_btn_install, self.clear_btn_install]:
+            for btn in [self.apply_btn_install, self.apply_drives_btn_install, self.browse_btn_install, self.clear_btn_install,
+                        self.options_btn_install]:
                  if btn and btn.winfo_exists():
                      btn.config(state=state)
 
@@ -441,264 +3851,77 @@ class VentoyThemer:
             if self.resolution_combo and self.resolution_combo.winfo_exists():
                  self.resolution_combo.config(state="readonly" if state == tk.NORMAL else tk.DISABLED)
 
-            if self.remove_theme_combo and self.remove_theme_combo.winfo_exists():
-                 self.remove_theme_combo.config(state="readonly" if state == tk.NORMAL else tk.DISABLED)
+            if self.remove_theme_listbox and self.remove_theme_listbox.winfo_exists():
+                 self.remove_theme_listbox.config(state=state)
 
             if self.theme_listbox and self.theme_listbox.winfo_exists():
                  self.theme_listbox.config(state=state)
 
-        self.root.after(0, set_state)
-
-    def extract_theme(self, archive_path, dest_path):
-        archive_path_lower = archive_path.lower()
-
-        if archive_path_lower.endswith(".zip"):
-            try:
-                with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-                    zip_ref.extractall(dest_path)
-                print(self._("print_extracted_archive", "Extracted {} archive: {}").format(".zip", os.path.basename(archive_path)))
-            except zipfile.BadZipFile:
-                raise Exception(self._("error_zip_bad_file", "Failed to extract .zip archive '{}': Not a valid ZIP file.").format(os.path.basename(archive_path)))
-            except Exception as e:
-                raise Exception(self._("error_zip_extraction_error", "Failed to extract .zip archive '{}': {}").format(os.path.basename(archive_path), e))
-
-        elif archive_path_lower.endswith(".zipx"):
-            try:
-                with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-                     zip_ref.extractall(dest_path)
-                print(self._("print_extracted_archive", "Extracted {} archive: {}").format(".zipx", os.path.basename(archive_path)))
-            except zipfile.BadZipFile as e:
-                 raise Exception(self._("error_zipx_bad_file", "Failed to extract .zipx archive '{}': Unsupported compression method or not a valid ZipX file. Error: {}").format(os.path.basename(archive_path), e))
-            except Exception as e:
-                raise Exception(self._("error_zipx_extraction_error", "Failed to extract .zipx archive '{}': {}").format(os.path.basename(archive_path), e))
-
-
-        elif archive_path_lower.endswith((".tar", ".tar.gz", ".tgz")):
-            try:
-                mode = 'r:gz' if archive_path_lower.endswith((".tar.gz", ".tgz")) else 'r'
-                with tarfile.open(archive_path, mode) as tar_ref:
-                    tar_ref.extractall(dest_path)
-                archive_type = ".tar.gz/.tgz" if mode == 'r:gz' else ".tar"
-                print(self._("print_extracted_archive", "Extracted {} archive: {}").format(archive_type, os.path.basename(archive_path)))
-            except tarfile.ReadError:
-                 raise Exception(self._("error_tar_read_error", "Failed to extract .tar/.tar.gz/.tgz archive '{}': Not a valid TAR/GZipped TAR file.").format(os.path.basename(archive_path)))
-            except Exception as e:
-                raise Exception(self._("error_tar_extraction_error", "Failed to extract .tar/.tar.gz/.tgz archive '{}': {}").format(os.path.basename(archive_path), e))
-
-
-        elif archive_path_lower.endswith(".tar.bz2"):
-            try:
-                import bz2
-                with tarfile.open(archive_path, 'r:bz2') as tar_ref:
-                     tar_ref.extractall(dest_path)
-                print(self._("print_extracted_archive", "Extracted {} archive: {}").format(".tar.bz2", os.path.basename(archive_path)))
-            except tarfile.ReadError:
-                 raise Exception(self._("error_tarbz2_read_error", "Failed to extract .tar.bz2 archive '{}': Not a valid BZ2ipped TAR file.").format(os.path.basename(archive_path)))
-            except Exception as e:
-                raise Exception(self._("error_tarbz2_extraction_error", "Failed to extract .tar.bz2 archive '{}': {}").format(os.path.basename(archive_path), e))
-
-
-        elif archive_path_lower.endswith((".xz", ".tar.xz")):
-            try:
-                import lzma
-            except ImportError:
-                raise Exception(self._("error_lzma_module_missing", "LZMA module not found. Cannot extract .xz archives."))
-
-            temp_tar_path = os.path.join(dest_path, "temp_lzma_decompressed.tar")
-            try:
-                with lzma.open(archive_path, 'rb') as f_in:
-                    os.makedirs(dest_path, exist_ok=True)
-                    with open(temp_tar_path, 'wb') as f_out:
-                        shutil.copyfileobj(f_in, f_out)
-
-                print(self._("print_decompressed_and_extracting", "Decompressed {}. Attempting to extract temporary tar: {}").format(".xz", os.path.basename(archive_path)))
-
-                with tarfile.open(temp_tar_path, 'r') as tar_ref:
-                    tar_ref.extractall(dest_path)
-                print(self._("print_extracted_archive", "Extracted {} archive: {}").format(".xz", os.path.basename(archive_path)))
-
-            except tarfile.ReadError:
-                 raise Exception(self._("error_tarxz_invalid_tar", "Decompressed file from .xz archive '{}' is not a valid tar archive. Please ensure it is a .tar.xz file.").format(os.path.basename(archive_path)))
-            except Exception as e:
-                 raise Exception(self._("error_tarxz_extraction_error", "Failed to decompress or extract .xz archive '{}': {}").format(os.path.basename(archive_path), e))
-            finally:
-                if os.path.exists(temp_tar_path):
-                    try:
-                        os.remove(temp_tar_path)
-                    except Exception as e:
-                        print(f"Warning: Failed to remove temporary file '{temp_tar_path}': {e}")
-
-
-        elif archive_path_lower.endswith((".lz4", ".tar.lz4")):
-            try:
-                import lz4.frame
-            except ImportError:
-                raise Exception(self._("error_lz4_module_missing", "The 'lz4' library is not installed. Please install it using 'pip install lz4'."))
-
-            temp_tar_path = os.path.join(dest_path, "temp_lz4_decompressed.tar")
-            try:
-                with lz4.frame.open(archive_path, 'rb') as f_in:
-                    os.makedirs(dest_path, exist_ok=True)
-                    with open(temp_tar_path, 'wb') as f_out:
-                        shutil.copyfileobj(f_in, f_out)
-
-                print(self._("print_decompressed_and_extracting", "Decompressed {}. Attempting to extract temporary tar: {}").format(".lz4", os.path.basename(archive_path)))
-
-                with tarfile.open(temp_tar_path, 'r') as tar_ref:
-                    tar_ref.extractall(dest_path)
-                print(self._("print_extracted_archive", "Extracted {} archive: {}").format(".lz4", os.path.basename(archive_path)))
-
-            except tarfile.ReadError:
-                 raise Exception(self._("error_tarlz4_invalid_tar", "Decompressed file from .lz4 archive '{}' is not a valid tar archive. Please ensure it is a .tar.lz4 file.").format(os.path.basename(archive_path)))
-            except Exception as e:
-                 raise Exception(self._("error_tarlz4_extraction_error", "Failed to decompress or extract .lz4 archive '{}': {}").format(os.path.basename(archive_path), e))
-            finally:
-                if os.path.exists(temp_tar_path):
-                    try:
-                        os.remove(temp_tar_path)
-                    except Exception as e:
-                        print(f"Warning: Failed to remove temporary file '{temp_tar_path}': {e}")
-
-
-        elif archive_path_lower.endswith((".zst", ".tar.zst")):
-            try:
-                import zstandard
-            except ImportError:
-                raise Exception(self._("error_zstd_module_missing", "The 'zstandard' library is not installed. Please install it using 'pip install zstandard'."))
-
-            temp_tar_path = os.path.join(dest_path, "temp_zstd_decompressed.tar")
-            try:
-                dctx = zstandard.ZstdDecompressor()
-                with open(archive_path, 'rb') as f_in, \
-                     open(temp_tar_path, 'wb') as f_out:
-                     os.makedirs(dest_path, exist_ok=True)
-                     dctx.copy_stream(f_in, f_out)
-
-                print(self._("print_decompressed_and_extracting", "Decompressed {}. Attempting to extract temporary tar: {}").format(".zst", os.path.basename(archive_path)))
-
-                with tarfile.open(temp_tar_path, 'r') as tar_ref:
-                    tar_ref.extractall(dest_path)
-                print(self._("print_extracted_archive", "Extracted {} archive: {}").format(".zst", os.path.basename(archive_path)))
-
-            except tarfile.ReadError:
-                 raise Exception(self._("error_tarzst_invalid_tar", "Decompressed file from .zst archive '{}' is not a valid tar archive. Please ensure it is a .tar.zst file.").format(os.path.basename(archive_path)))
-            except Exception as e:
-                 raise Exception(self._("error_tarzst_extraction_error", "Failed to decompress or extract .zst archive '{}': {}").format(os.path.basename(archive_path), e))
-            finally:
-                if os.path.exists(temp_tar_path):
-                    try:
-                        os.remove(temp_tar_path)
-                    except Exception as e:
-                        print(f"Warning: Failed to remove temporary file '{temp_tar_path}': {e}")
-
-
-        elif archive_path_lower.endswith(".7z"):
-            try:
-                import py7zr
-            except ImportError:
-                raise Exception(self._("error_py7zr_module_missing", "The 'py7zr' library is not installed. Please install it using 'pip install py7zr'."))
-
-            try:
-                with py7zr.SevenZipFile(archive_path, mode='r') as szr:
-                    szr.extractall(path=dest_path)
-                print(self._("print_extracted_archive", "Extracted {} archive: {}").format(".7z", os.path.basename(archive_path)))
-            except py7zr.Bad7zFile:
-                 raise Exception(self._("error_7z_bad_file", "Failed to extract .7z archive '{}': File is corrupted or not a valid 7z archive.").format(os.path.basename(archive_path)))
-            except Exception as e:
-                 raise Exception(self._("error_7z_extraction_error", "Failed to extract .7z archive '{}': {}").format(os.path.basename(archive_path), e))
-
-        elif archive_path_lower.endswith(".rar"):
-            try:
-                import rarfile
-            except ImportError:
-                raise Exception(self._("error_rarfile_module_missing", "The 'rarfile' library is not installed. Please install it using 'pip install rarfile' and ensure the 'unrar' utility is installed and available in your system's PATH."))
-
-            try:
-                with rarfile.RarFile(archive_path, 'r') as rar_ref:
-                     rar_ref.extractall(dest_path)
-                print(self._("print_extracted_archive", "Extracted {} archive: {}").format(".rar", os.path.basename(archive_path)))
-            except rarfile.RarCannotExec as e:
-                 raise Exception(self._("error_rar_unrar_not_found", "Failed to extract .rar archive '{}'. The 'unrar' command was not found or could not be executed. Please install 'unrar' and ensure it is available in PATH. Error: {}").format(os.path.basename(archive_path), e))
-            except rarfile.RarExtError as e:
-                 raise Exception(self._("error_rar_rarfile", "Failed to extract .rar archive '{}'. Rarfile error: {}").format(os.path.basename(archive_path), e))
-            except Exception as e:
-                 raise Exception(self._("error_rar_unexpected", "An unexpected error occurred while extracting .rar archive '{}': {}").format(os.path.basename(archive_path), e))
-
-        else:
-            raise Exception(self._("error_unsupported_archive_format", "Unsupported archive format for extraction: {}").format(os.path.basename(archive_path)))
+            for check in (self.stage_on_host_check, self.sync_existing_check, self.sync_verify_hash_check, self.skip_unused_files_check,
+                          self.optimize_images_check):
+                if check and check.winfo_exists():
+                     check.config(state=state)
 
+        self.ui_bus.post(set_state)
 
-    def find_theme_txt(self, root_dir):
-        if not os.path.isdir(root_dir):
-             return None
-        for root, dirs, files in os.walk(root_dir):
-            if "theme.txt" in files:
-                return os.path.join(root, "theme.txt")
-        return None
+    def refresh_drive_view(self):
+        self.ui_bus.post(self.load_existing_themes)
 
-    def find_pf2_fonts(self, root_dir):
-        fonts = set()
-        if not os.path.isdir(root_dir):
-             return fonts
+    def on_default_theme_reset(self):
+        random_label = self._("option_random_theme", "Random Theme")
 
-        drive_display = self.drive_var.get()
-        drive = extract_drive_letter(drive_display)
-        if not drive:
-             print(self._("error_extracting_drive_letter", "Error: Could not extract drive letter from '{}'").format(display_string=drive_display))
-             return fonts
+        def reset():
+            if random_label not in self.default_theme_combo['values']:
+                current_values = list(self.default_theme_combo['values'])
+                current_values.insert(0, random_label)
+                self.default_theme_combo.config(values=current_values)
+            self.default_theme_var.set(random_label)
 
-        for root, dirs, files in os.walk(root_dir):
-            for f in files:
-                if f.lower().endswith(".pf2"):
-                     try:
-                         rel_path = os.path.relpath(os.path.join(root, f), drive).replace("\\", "/")
-                         fonts.add(f"/{rel_path}")
-                     except ValueError:
-                         print(self._("print_warning_could_not_get_font_path", "Warning: Could not get relative path for font file: {}").format(os.path.join(root, f)))
-                         pass
+        self.ui_bus.post(reset)
 
-        return fonts
+    def task_finished(self, tab_index, reset_status=True):
+        self.set_buttons_state(tk.NORMAL)
+        self.ui_bus.post(self.show_task_controls, tab_index, False)
+        if reset_status:
+            self.ui_bus.post(self.root.after, 500, lambda: self.update_status_safe(tab_index, self._("status_ready", "Status - READY"), 0))
 
     def load_existing_themes(self):
 
         drive_display = self.drive_var.get()
         if not drive_display:
             self.theme_display_names_from_json = []
-            self.root.after(0, self.default_theme_combo.config, {'values': []})
-            self.root.after(0, self.default_theme_var.set, "")
-            self.root.after(0, self.remove_theme_combo.config, {'values': []})
-            self.root.after(0, self.remove_theme_combo.set, "")
+            self.default_theme_combo.config(values=[])
+            self.default_theme_var.set("")
+            self.remove_theme_listbox.delete(0, tk.END)
             self.resolution_var.set("")
             return
         self.current_drive = extract_drive_letter(drive_display)
         if not self.current_drive:
             print(self._("error_extracting_drive_letter", "Error: Could not extract drive letter from '{}'").format(display_string=drive_display))
             self.theme_display_names_from_json = []
-            self.root.after(0, self.default_theme_combo.config, {'values': []})
-            self.root.after(0, self.default_theme_var.set, "")
-            self.root.after(0, self.remove_theme_combo.config, {'values': []})
-            self.root.after(0, self.remove_theme_combo.set, "")
+            self.default_theme_combo.config(values=[])
+            self.default_theme_var.set("")
+            self.remove_theme_listbox.delete(0, tk.END)
             self.resolution_var.set("")
             return
 
 
-        json_path = os.path.join(self.current_drive, VENTOY_JSON_PATH)
+        config_store = VentoyConfigStore(self.current_drive)
 
         self.theme_display_names_from_json = []
         config = {}
         default_theme_set = False
         resolution_set = False
-        if os.path.exists(json_path):
+        if config_store.exists():
             try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                     config = json.load(f)
+                config = config_store.load()
 
                 theme_config = config.get('theme', {})
                 theme_files = theme_config.get('file', [])
                 self.theme_display_names_from_json = [os.path.basename(os.path.dirname(p)) for p in theme_files if p and os.path.dirname(p)]
                 values_default_combo = self.theme_display_names_from_json.copy()
                 values_default_combo.insert(0, self._("option_random_theme", "Random Theme"))
-                self.root.after(0, self.default_theme_combo.config, {'values': values_default_combo})
+                self.default_theme_combo.config(values=values_default_combo)
                 current_default_index_1_based = theme_config.get('default_file', 0)
                 if current_default_index_1_based == 0:
                     self.default_theme_var.set(self._("option_random_theme", "Random Theme"))
@@ -740,42 +3963,45 @@ class VentoyThemer:
 
             except json.JSONDecodeError:
                 print(self._("print_warning_could_not_parse_json", "Warning: Could not parse ventoy.json on {}. File might be corrupted or not a valid JSON.").format(self.current_drive))
-                self.root.after(0, self.default_theme_var.set, self._("option_random_theme", "Random Theme"))
-                self.root.after(0, self.resolution_var.set, "")
+                self.default_theme_var.set(self._("option_random_theme", "Random Theme"))
+                self.resolution_var.set("")
 
             except PermissionError:
                 print(self._("print_warning_permission_denied_read_json", "Warning: Permission denied while reading ventoy.json on {}.").format(self.current_drive))
-                self.root.after(0, self.default_theme_var.set, self._("option_random_theme", "Random Theme"))
-                self.root.after(0, self.resolution_var.set, "")
+                self.default_theme_var.set(self._("option_random_theme", "Random Theme"))
+                self.resolution_var.set("")
 
             except Exception as e:
                 print(self._("print_warning_failed_read_json_settings", "Warning: Failed to read ventoy.json settings from {}: {}").format(self.current_drive, e))
-                self.root.after(0, self.default_theme_var.set, self._("option_random_theme", "Random Theme"))
-                self.root.after(0, self.resolution_var.set, "")
+                self.default_theme_var.set(self._("option_random_theme", "Random Theme"))
+                self.resolution_var.set("")
 
         else:
-            self.root.after(0, self.default_theme_var.set, self._("option_random_theme", "Random Theme"))
-            self.root.after(0, self.resolution_var.set, "")
+            self.default_theme_var.set(self._("option_random_theme", "Random Theme"))
+            self.resolution_var.set("")
         themes_disk_path = os.path.join(self.current_drive, THEMES_DIR_NAME)
         themes_on_disk_names = []
         if os.path.exists(themes_disk_path) and os.path.isdir(themes_disk_path):
              try:
-                 themes_on_disk_names = [item for item in os.listdir(themes_disk_path) if os.path.isdir(os.path.join(themes_disk_path, item))]
+                 themes_on_disk_names = [item for item in os.listdir(themes_disk_path)
+                                         if os.path.isdir(os.path.join(themes_disk_path, item)) and not is_theme_work_dir(item)]
              except PermissionError:
                   print(self._("print_warning_permission_denied_listing_themes", "Warning: Permission denied while listing theme directory on {}.").format(self.current_drive))
              except Exception as e:
                   print(self._("print_warning_error_listing_themes", "Warning: Error listing theme directory on {}: {}").format(self.current_drive, e))
-        values_remove_combo = [self._("option_select_theme_to_delete", "Select a theme to delete")]
-        values_remove_combo.extend(themes_on_disk_names)
-        self.root.after(0, self.remove_theme_combo.config, {'values': values_remove_combo})
-        self.root.after(0, self.remove_theme_combo.set, self._("option_select_theme_to_delete", "Select a theme to delete"))
+        self.remove_theme_listbox.delete(0, tk.END)
+        for name in themes_on_disk_names:
+            self.remove_theme_listbox.insert(tk.END, name)
         
     def on_drive_selected(self, event=None):
         self.reset_status()
         self.load_existing_themes()
 
     def update_usb_drives(self):
-        values = list_drives_display()
+        self.apply_drive_list(self.drive_inventory.displays())
+
+    def apply_drive_list(self, values):
+        """Shows a new drive list; the selected drive is only reloaded if it went away."""
         current_drive = self.drive_var.get()
 
         for combo in self.drive_combos:
@@ -783,11 +4009,10 @@ class VentoyThemer:
                  combo['values'] = values
 
         if current_drive and current_drive in values:
-             self.drive_var.set(current_drive)
-        else:
-             self.drive_var.set("")
-
-        self.on_drive_selected()
+             return
+        self.drive_var.set("")
+        if current_drive:
+             self.on_drive_selected()
 
     def add_drive_selector(self, parent):
        
@@ -818,35 +4043,75 @@ class VentoyThemer:
              self.drive_combos = []
         self.drive_combos.append(combo)
 
+    def _accept_archive(self, path, rejected):
+        try:
+            index = self.probe_theme_source(path, listing_only=True)
+        except Exception as e:
+            rejected.append(f"{os.path.basename(path)}: {e}")
+            return False
+        if not index.theme_txt:
+            reason = self._("reason_no_theme_txt", "no theme.txt inside")
+            print(self._("print_rejected_archive", "Rejected theme archive {}: {}").format(path, reason))
+            rejected.append(f"{os.path.basename(path)}: {reason}")
+            return False
+        print(self._("print_probed_archive", "Probed {}: theme root '{}', {} font(s), {} file(s), {} bytes").format(
+            os.path.basename(path), index.theme_root, len(index.fonts), index.file_count, index.total_bytes))
+        return True
+
+    def _probe_archives_async(self, archives, on_done):
+        """Probes archives on a worker thread, then calls on_done(accepted, rejected) on the Tk thread."""
+        def worker():
+            rejected = []
+            accepted = set(path for path in archives if self._accept_archive(path, rejected))
+            self.ui_bus.post(on_done, accepted, rejected)
+
+        if archives:
+            self.update_status_safe(0, self._("status_probing_archives", "Checking {} archive(s)...").format(len(archives)), 0)
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _report_rejected_archives(self, rejected):
+        if rejected:
+            self.show_message_safe("warning",
+                                   title_key=self._("warning_rejected_archives_title", "Archives Skipped"),
+                                   message_key=self._("warning_rejected_archives_message", "These archives were not added:\n\n{}").format("\n".join(rejected)))
+
     def browse_zip(self):
 
         paths = filedialog.askopenfilenames(
             title=self._("dialog_select_theme_archives_title", "Select Theme Archive(s)"),
-            filetypes=[("Theme Archives", "*.zip *.tar *.gz *.tgz *.xz *.rar *.7z *.zipx *.tar.bz2 *.tar.lz4 *.tar.zst"), ("All files", "*.*")]
+            filetypes=[("Theme Archives", ARCHIVE_BACKENDS.dialog_patterns()), ("All files", "*.*")]
         )
+        archives = []
         for path in paths:
             if path and os.path.isfile(path):
-                if path not in self.theme_sources_paths:
-                    self.theme_sources_paths.append(path)
-                    file_name = os.path.basename(path)
-                    display_name = self._get_truncated_name(file_name)
-                    self.theme_listbox.insert(tk.END, display_name)
+                if path not in self.theme_sources_paths and path not in archives:
+                    archives.append(path)
                 else:
                     print(self._("print_skipping_already_added_file", "Warning: Skipping already added file: {}").format(path))
             elif path:
                 print(self._("print_skipped_non_file_selection", "Warning: Skipping non-file selection: {}").format(path))
+        if archives:
+            self._probe_archives_async(archives, lambda accepted, rejected: self._finish_browse_zip(archives, accepted, rejected))
+
+    def _finish_browse_zip(self, archives, accepted, rejected):
+        for path in archives:
+            if path in accepted and path not in self.theme_sources_paths:
+                self.theme_sources_paths.append(path)
+                file_name = os.path.basename(path)
+                display_name = self._get_truncated_name(file_name)
+                self.theme_listbox.insert(tk.END, display_name)
+        self._report_rejected_archives(rejected)
+        self.update_status_safe(0, self._("status_ready", "Status - READY"), 0)
 
 
     def on_drop(self, event):
         """Handles files and directories dropped onto the install tab."""
         paths = self.root.tk.splitlist(event.data) 
-        supported_archive_extensions = ('.zip', '.tar', '.tar.gz', '.tgz', '.xz', '.rar', '.7z', '.zipx', '.tar.bz2', '.tar.lz4', '.tar.zst')
-        total_processed_count = 0 
+        dropped_items = []
 
 
         for path in paths: 
             path = os.path.normpath(path) 
-            processed_count_in_this_item = 0 
             if os.path.isdir(path):
 
                 print(self._("print_dropped_directory", "Dropped directory: {}").format(path))
@@ -857,7 +4122,7 @@ class VentoyThemer:
                     if os.path.exists(path): 
                         for item in os.listdir(path):
                             item_path = os.path.join(path, item)
-                            if os.path.isfile(item_path) and item.lower().endswith(supported_archive_extensions):
+                            if os.path.isfile(item_path) and ARCHIVE_BACKENDS.is_supported_name(item):
                                  found_archives_in_root.append(item_path)
                 except PermissionError:
                      print(self._("print_warning_permission_denied_list_dir", "Warning: Permission denied listing directory: {}").format(path))
@@ -907,71 +4172,91 @@ class VentoyThemer:
 
                         else:
                              print(self._("warning_skipping_directory_content_warning", "Skipping directory '{}' as it does not contain supported theme archives or theme folders.").format(os.path.basename(path)))
-                             self.root.after(0, messagebox.showwarning,
+                             self.ui_bus.post(messagebox.showwarning,
                                              self._("warning_skipping_directory_title", "Skipping Directory"),
                                              self._("warning_skipping_directory_content_warning", "Skipping directory '{}' as it does not contain supported theme archives or theme folders.").format(os.path.basename(path)))
                              directory_content_type = "skipped_no_content" 
                              pass 
 
                 if potential_sources_to_add:
-                    for source_path in potential_sources_to_add:
-                         if source_path not in self.theme_sources_paths:
-                            self.theme_sources_paths.append(source_path)
-                            if os.path.isfile(source_path): 
-                                file_name = os.path.basename(source_path)
-                                display_name = self._get_truncated_name(file_name)
-                                self.root.after(0, self.theme_listbox.insert, tk.END, display_name)
-                                print("Added archive source from directory:", source_path)
-                            elif os.path.isdir(source_path):
-                                 folder_name = os.path.basename(source_path)
-                                 display_name = self._get_truncated_name(folder_name)
-                                 folder_prefix = self._("listbox_folder_prefix", "[FOLDER]")
-                                 self.root.after(0, self.theme_listbox.insert, tk.END, f"{folder_prefix} {display_name}")
-                                 print("Added theme folder source from directory:", source_path)
-                            processed_count_in_this_item += 1 
-                         else:
-                             print("Warning: Skipping already added source from directory:", source_path)
-                             
-                if directory_content_type != "skipped_no_content": 
-                     if processed_count_in_this_item > 0:
-
-                         if directory_content_type == "archives_in_root":
-                             msg_key = "status_added_dropped_archives_from_folder" 
-                             default_msg = "Added {} archive(s) from dropped folder '{}'."
-                             self.update_status_safe(0, self._(msg_key, default_msg).format(processed_count_in_this_item, os.path.basename(path)), 0)
-                         elif directory_content_type == "theme_folders_in_subdirs":
-                              msg_key = "status_added_dropped_theme_folders_from_folder" 
-                              default_msg = "Added {} theme folder(s) from dropped folder '{}'."
-                              self.update_status_safe(0, self._(msg_key, default_msg).format(processed_count_in_this_item, os.path.basename(path)), 0)
-                         elif directory_content_type == "single_theme_folder":
-                              msg_key = "status_added_dropped_single_theme_folder" 
-                              default_msg = "Added theme folder '{}'."
-
-                              self.update_status_safe(0, self._(msg_key, default_msg).format(os.path.basename(path)), 0)
+                    dropped_items.append((path, directory_content_type, potential_sources_to_add))
 
 
             elif os.path.isfile(path):
 
-                if path.lower().endswith(supported_archive_extensions):
+                if ARCHIVE_BACKENDS.is_supported_name(path):
                     if path not in self.theme_sources_paths:
-                        self.theme_sources_paths.append(path)
-                        file_name = os.path.basename(path)
-                        display_name = self._get_truncated_name(file_name)
-                        self.root.after(0, self.theme_listbox.insert, tk.END, display_name)
-                        print(self._("print_added_theme_archive_source", "Added theme archive source: {}").format(path))
-                        processed_count_in_this_item += 1 
+                        dropped_items.append((path, "archive_file", [path]))
+                    else:
                         print(self._("print_skipping_already_added_file", "Warning: Skipping already added file: {}").format(path))
                 else:
                     print(self._("print_skipping_unsupported_file_extension", "Warning: Skipping unsupported file extension: {}").format(os.path.basename(path)))
             else:
                 print(self._("print_skipping_unsupported_dropped_item", "Warning: Skipping unsupported dropped item: {}").format(path))
 
+
+        archives = []
+        for _path, _content_type, sources in dropped_items:
+            for source_path in sources:
+                if os.path.isfile(source_path) and source_path not in self.theme_sources_paths and source_path not in archives:
+                    archives.append(source_path)
+        self._probe_archives_async(archives, lambda accepted, rejected: self._finish_drop(dropped_items, bool(paths), accepted, rejected))
+
+    def _finish_drop(self, dropped_items, had_paths, accepted, rejected):
+        total_processed_count = 0 
+        for path, directory_content_type, sources in dropped_items:
+            processed_count_in_this_item = 0 
+            if directory_content_type == "archive_file":
+                if path in accepted and path not in self.theme_sources_paths:
+                    self.theme_sources_paths.append(path)
+                    file_name = os.path.basename(path)
+                    display_name = self._get_truncated_name(file_name)
+                    self.theme_listbox.insert(tk.END, display_name)
+                    print(self._("print_added_theme_archive_source", "Added theme archive source: {}").format(path))
+                    processed_count_in_this_item += 1 
+            else:
+                for source_path in sources:
+                    if source_path in self.theme_sources_paths:
+                        print("Warning: Skipping already added source from directory:", source_path)
+                        continue
+                    if os.path.isfile(source_path):
+                        if source_path not in accepted:
+                            continue
+                        self.theme_sources_paths.append(source_path)
+                        file_name = os.path.basename(source_path)
+                        display_name = self._get_truncated_name(file_name)
+                        self.theme_listbox.insert(tk.END, display_name)
+                        print("Added archive source from directory:", source_path)
+                    elif os.path.isdir(source_path):
+                        self.theme_sources_paths.append(source_path)
+                        folder_name = os.path.basename(source_path)
+                        display_name = self._get_truncated_name(folder_name)
+                        folder_prefix = self._("listbox_folder_prefix", "[FOLDER]")
+                        self.theme_listbox.insert(tk.END, f"{folder_prefix} {display_name}")
+                        print("Added theme folder source from directory:", source_path)
+                    processed_count_in_this_item += 1 
+
+                if processed_count_in_this_item > 0:
+                    if directory_content_type == "archives_in_root":
+                        msg_key = "status_added_dropped_archives_from_folder" 
+                        default_msg = "Added {} archive(s) from dropped folder '{}'."
+                        self.update_status_safe(0, self._(msg_key, default_msg).format(processed_count_in_this_item, os.path.basename(path)), 0)
+                    elif directory_content_type == "theme_folders_in_subdirs":
+                        msg_key = "status_added_dropped_theme_folders_from_folder" 
+                        default_msg = "Added {} theme folder(s) from dropped folder '{}'."
+                        self.update_status_safe(0, self._(msg_key, default_msg).format(processed_count_in_this_item, os.path.basename(path)), 0)
+                    elif directory_content_type == "single_theme_folder":
+                        msg_key = "status_added_dropped_single_theme_folder" 
+                        default_msg = "Added theme folder '{}'."
+                        self.update_status_safe(0, self._(msg_key, default_msg).format(os.path.basename(path)), 0)
+
             total_processed_count += processed_count_in_this_item 
 
+        self._report_rejected_archives(rejected)
         if total_processed_count > 0:
 
              self.update_status_safe(0, self._("status_added_dropped_items_total", "Added {} item(s).").format(total_processed_count), 0) # Новый ключ
-        elif total_processed_count == 0 and paths: 
+        elif total_processed_count == 0 and had_paths: 
              self.update_status_safe(0, self._("status_no_supported_dropped_items", "No supported items found in dropped items."), 0)
 
     def add_install_tab_widgets(self):
@@ -1014,8 +4299,15 @@ class VentoyThemer:
                                             command=self.clear_zip_selection,
                                             style="RoundedButton.TButton",
                                             takefocus=False)
-        self.clear_btn_install.pack()
+        self.clear_btn_install.pack(pady=(0, BUTTON_GROUP_SPACING))
         self.translatable_widgets.append((self.clear_btn_install, "clear_button"))
+        self.options_btn_install = ttk.Button(btn_frame,
+                                              text=self._("install_options_button", "Options..."),
+                                              command=self.show_install_options,
+                                              style="RoundedButton.TButton",
+                                              takefocus=False)
+        self.options_btn_install.pack()
+        self.translatable_widgets.append((self.options_btn_install, "install_options_button"))
         self.status_label_install = tk.Label(self.install_tab, textvariable=self.status_bar_install, anchor="w", font=("Courier New", 10))
         self.status_label_install.place(x=5, y=220, width=425)
 
@@ -1025,10 +4317,19 @@ class VentoyThemer:
                                              text=self._("apply_themes_button", "Apply Themes"),
                                              command=self.start_apply_theme_thread,
                                              style="RoundedButton.TButton",
-                                             width=15,
+                                             width=21,
                                              takefocus=False)
-        self.apply_btn_install.place(x=136, y=282)
+        self.apply_btn_install.place(x=10, y=282)
         self.translatable_widgets.append((self.apply_btn_install, "apply_themes_button"))
+        self.apply_drives_btn_install = ttk.Button(self.install_tab,
+                                                   text=self._("apply_to_drives_button", "Apply to Drives..."),
+                                                   command=self.start_apply_theme_to_drives_thread,
+                                                   style="RoundedButton.TButton",
+                                                   width=21,
+                                                   takefocus=False)
+        self.apply_drives_btn_install.place(x=230, y=282)
+        self.translatable_widgets.append((self.apply_drives_btn_install, "apply_to_drives_button"))
+        self.add_task_controls(self.install_tab, 0, [self.apply_btn_install, self.apply_drives_btn_install])
 
     def add_settings_tab_widgets(self):
         default_theme_main_frame = ttk.Frame(self.settings_tab)
@@ -1063,10 +4364,7 @@ class VentoyThemer:
                                              textvariable=self.resolution_var,
                                              state="readonly",
                                              style="Courier.TCombobox")
-        self.resolution_combo['values'] = [
-            "max", "3840x2160", "2560x1440", "1920x1080", "1680x1050", "1600×900",
-            "1440x900", "1280x1024", "1280x960", "1024x768", "800x600"
-        ]
+        self.resolution_combo['values'] = RESOLUTIONS
         self.resolution_combo.pack(fill="x", padx=0, pady=WIDGET_SPACING)
 
         self.apply_btn_settings = ttk.Button(self.settings_tab,
@@ -1087,10 +4385,15 @@ class VentoyThemer:
 
         content_frame = ttk.Frame(main_frame)
         content_frame.pack(fill="both", expand=True, padx=INNER_PADDING, pady=0)
-        self.remove_theme_combo = ttk.Combobox(content_frame,
-                                                 state="readonly",
-                                                 style="Courier.TCombobox")
-        self.remove_theme_combo.pack(fill="x", padx=0, pady=WIDGET_SPACING)
+        scrollbar = ttk.Scrollbar(content_frame, orient=tk.VERTICAL)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=WIDGET_SPACING)
+        self.remove_theme_listbox = tk.Listbox(content_frame,
+                                               height=6,
+                                               selectmode=tk.MULTIPLE,
+                                               exportselection=False,
+                                               yscrollcommand=scrollbar.set)
+        self.remove_theme_listbox.pack(side=tk.LEFT, fill="both", expand=True, padx=0, pady=WIDGET_SPACING)
+        scrollbar.config(command=self.remove_theme_listbox.yview)
         self.status_label_remove = tk.Label(self.remove_tab, textvariable=self.status_bar_remove, anchor="w", font=("Courier New", 10))
         self.status_label_remove.place(x=5, y=220, width=425)
 
@@ -1112,6 +4415,75 @@ class VentoyThemer:
                                          takefocus=False)
         self.remove_all_btn.place(x=10, y=282)
         self.translatable_widgets.append((self.remove_all_btn, "remove_all_button"))
+        self.add_task_controls(self.remove_tab, 2, [self.remove_all_btn, self.remove_btn])
+
+    def add_task_controls(self, tab, tab_index, action_buttons):
+        pause_btn = ttk.Button(tab,
+                               text=self._("pause_button", "Pause"),
+                               command=lambda: self.toggle_pause(tab_index),
+                               style="RoundedButton.TButton",
+                               width=21,
+                               takefocus=False)
+        cancel_btn = ttk.Button(tab,
+                                text=self._("cancel_button", "Cancel"),
+                                command=lambda: self.cancel_task(tab_index),
+                                style="RoundedButton.TButton",
+                                width=21,
+                                takefocus=False)
+        self.translatable_widgets.append((cancel_btn, "cancel_button"))
+        self.task_controls[tab_index] = (pause_btn, cancel_btn, [(btn, btn.place_info()) for btn in action_buttons])
+
+    def show_task_controls(self, tab_index, running):
+        if tab_index not in self.task_controls:
+            return
+        pause_btn, cancel_btn, action_buttons = self.task_controls[tab_index]
+        if running:
+            pause_btn.config(text=self._("pause_button", "Pause"))
+            for (btn, place_info), control in zip(action_buttons, (pause_btn, cancel_btn)):
+                btn.place_forget()
+                control.place(**place_info)
+        else:
+            pause_btn.place_forget()
+            cancel_btn.place_forget()
+            for btn, place_info in action_buttons:
+                btn.place(**place_info)
+
+    def toggle_pause(self, tab_index):
+        pause_btn = self.task_controls[tab_index][0]
+        if self.cancel_token.paused:
+            self.cancel_token.resume()
+            pause_btn.config(text=self._("pause_button", "Pause"))
+            self.update_status_safe(tab_index, self._("status_resumed", "Resumed."))
+        else:
+            self.cancel_token.pause()
+            pause_btn.config(text=self._("resume_button", "Resume"))
+            self.update_status_safe(tab_index, self._("status_paused", "Paused."))
+
+    def cancel_task(self, tab_index):
+        self.cancel_token.cancel()
+        self.update_status_safe(tab_index, self._("status_cancelling", "Cancelling..."))
+
+    def selected_sync_mode(self):
+        if not self.sync_existing_var.get():
+            return None
+        return SYNC_MODE_HASH if self.sync_verify_hash_var.get() else SYNC_MODE_METADATA
+
+    def on_skip_unused_files_toggled(self):
+        self.member_filter = ThemeMemberFilter() if self.skip_unused_files_var.get() else None
+
+    def on_optimize_images_toggled(self):
+        if self.optimize_images_var.get() and not ThemeImageOptimizer.available():
+            self.optimize_images_var.set(False)
+            self.show_message_safe("warning", "warning_pillow_missing_title", "warning_pillow_missing_message",
+                                   title_key=self._("warning_pillow_missing_title", "Image Optimization Unavailable"),
+                                   message_key=self._("warning_pillow_missing_message", "The 'Pillow' library is not installed, so theme images are installed unchanged. Install it using 'pip install pillow'."))
+        self.optimize_images = self.optimize_images_var.get()
+
+    def begin_task(self, tab_index):
+        """Arms a fresh cancel token and locks the UI for a task started from `tab_index`."""
+        self.cancel_token = CancelToken()
+        self.set_buttons_state(tk.DISABLED)
+        self.show_task_controls(tab_index, True)
 
     def add_language_tab_widgets(self):
         main_frame = ttk.Frame(self.language_tab)
@@ -1138,7 +4510,7 @@ class VentoyThemer:
         )
         self.language_combo.pack(fill="x", padx=0, pady=WIDGET_SPACING)
         self.language_combo.bind("<<ComboboxSelected>>", self.on_language_selected)
-       
+
         version_frame = ttk.Frame(self.language_tab)
 
         frame_relx = 1.0 
@@ -1209,146 +4581,22 @@ class VentoyThemer:
         self.add_settings_tab_widgets()
         self.add_remove_tab_widgets()
         self.add_language_tab_widgets()
-        self.add_footer_links()
-
-    def apply_theme_task(self, drive, theme_sources_paths):
-
-        try:
-            total = len(theme_sources_paths)
-            if total == 0:
-                self.update_status_safe(0, self._("status_no_theme_items_warning_message", "No theme items to process."), 100)
-                return
-
-            all_paths = set()
-            all_fonts = set()
-            for i, source_path in enumerate(theme_sources_paths):
-                processed_count = i + 1
-                if not os.path.exists(source_path):
-                    self.update_status_safe(0, self._("status_skipped_missing_source", "Skipping missing source: {}").format(os.path.basename(source_path)), 100 * i / total)
-                    self.show_message_safe("warning", "warning_source_not_found_title", "warning_source_not_found_message",
-                                           title_key=self._("warning_source_not_found_title", "Source Not Found"),
-                                           message_key=self._("warning_source_not_found_message", "Theme source not found: {}. Skipping.").format(os.path.basename(source_path)))
-                    continue
-                theme_name = os.path.splitext(os.path.basename(source_path))[0] if os.path.isfile(source_path) else os.path.basename(source_path)
-                theme_dir = os.path.join(drive, THEMES_DIR_NAME, theme_name)
-
-                should_process = True
-                if os.path.exists(theme_dir) and os.path.isdir(theme_dir):
-                    self.update_status_safe(0, self._("status_confirming_overwrite", "Confirming overwrite for {}...").format(theme_name), 100 * (i / total))
-                    result_queue = queue.Queue(maxsize=1)
-                    self.root.after(0, self._show_overwrite_dialog_threaded, theme_name, result_queue)
-                    try:
-                        overwrite_confirmed = result_queue.get(block=True)
-                        print(f"Received confirmation for '{theme_name}': {overwrite_confirmed}")
-                        if not overwrite_confirmed:
-                            should_process = False
-                    except Exception as e:
-                        print(f"Error while waiting for overwrite confirmation for '{theme_name}': {e}")
-                        self.show_message_safe("error", "error_task_title", "error_task_message",
-                                               title_key=self._("error_task_title", "Task Error"),
-                                               message_key=self._("error_task_message", "An unexpected error occurred during task: {}\\n{}").format(f"Failed to get confirmation for theme '{theme_name}'. Skipping this theme.", ""),
-                                               args=[])
-                        should_process = False
-                if should_process:
-                    try:
-                        if os.path.isdir(theme_dir):
-                            if os.path.isdir(source_path):
-                                print(f"Overwriting existing theme directory: {theme_dir}")
-                                try:
-                                    shutil.rmtree(theme_dir)
-                                    print(self._("print_theme_folder_deleted", "Theme folder deleted: {}").format(theme_dir))
-                                except Exception as clean_e:
-                                    raise Exception(f"Failed to remove existing theme directory '{theme_name}' before overwrite: {clean_e}")
-                        if os.path.isfile(source_path):
-                            os.makedirs(theme_dir, exist_ok=True)
-                            self.update_status_safe(0, self._("status_extracting", "Extracting {}...").format(theme_name), 100 * (i / total))
-                            self.extract_theme(source_path, theme_dir)
-                        elif os.path.isdir(source_path):
-                            self.update_status_safe(0, self._("status_copying", "Copying theme folder {}...").format(theme_name), 100 * (i / total))
-                            try:
-                                shutil.copytree(source_path, theme_dir)
-                                print(self._("print_copied_theme_folder", "Copied theme folder: {} to {}").format(source_path, theme_dir))
-                            except Exception as copy_e:
-                                raise Exception(f"Failed to copy theme folder '{theme_name}': {copy_e}")
-                        theme_txt = self.find_theme_txt(theme_dir)
-                        if not theme_txt:
-                            self.show_message_safe("warning", "warning_theme_txt_not_found_title", "warning_theme_txt_not_found_message",
-                                                   title_key=self._("warning_theme_txt_not_found_title", "Warning"),
-                                                   message_key=self._("warning_theme_txt_not_found_message", "theme.txt not found in processed theme '{}'. This theme might not work correctly.").format(theme_name))
-                            if os.path.exists(theme_dir):
-                                 rel_theme_dir = os.path.relpath(theme_dir, drive).replace("\\", "/")
-                                 all_paths.add(f"/{rel_theme_dir}")
-                        else:
-                            rel_path = os.path.relpath(theme_txt, drive).replace("\\", "/")
-                            all_paths.add(f"/{rel_path}")
-                        all_fonts.update(self.find_pf2_fonts(theme_dir))
-                        self.update_status_safe(0, self._("status_processed", "Processed {}").format(theme_name), 100 * processed_count / total)
-
-                    except Exception as e:
-                         error_message = self._("error_processing_theme_message", "Error processing theme '{}': {}").format(theme_name, e)
-                         print(error_message)
-                         self.show_message_safe("error", "error_processing_theme_title", "",
-                                                title_key=self._("error_processing_theme_title", "Processing Error"),
-                                                message_key="",
-                                                args=[error_message])
-                         self.update_status_safe(0, self._("status_error_processing_theme", "Error processing {}").format(theme_name), 100 * processed_count / total)
-                         continue
-
-                else:
-                     self.update_status_safe(0, self._("status_skipped_existing_theme", "Skipped existing theme: {}").format(theme_name), 100 * processed_count / total)
-                     continue
-            json_path = os.path.join(drive, VENTOY_JSON_PATH)
-            config = {}
-            if os.path.exists(json_path):
-                try:
-                    print(self._("print_loaded_existing_json", "Loaded existing ventoy.json"))
-                    with open(json_path, 'r', encoding='utf-8') as f:
-                         config = json.load(f)
-                except Exception as e:
-                    self.show_message_safe("error", "error_json_read_title", "error_json_read_message_existing",
-                                           title_key=self._("error_json_read_title", "JSON Read Error"),
-                                           message_key=self._("error_json_read_message_existing", "Failed to read existing ventoy.json: {}. Creating a new one.").format(e),
-                                           args=[])
-                    config = {}
-            config.setdefault('theme', {})
-            theme_config = config['theme']
-            theme_config.setdefault('file', [])
-            theme_config.setdefault('default_file', 0)
-            theme_config.setdefault('gfxmode', 'max')
-            theme_config.setdefault('display_mode', 'GUI')
-            theme_config.setdefault('serial_param', '--unit=0 --speed=9600')
-            theme_config.setdefault('fonts', [])
-            theme_config.setdefault('images', [])
-            theme_config['file'] = sorted(list(set(theme_config.get('file', [])) | all_paths))
-            theme_config['fonts'] = sorted(list(set(theme_config.get('fonts', [])) | all_fonts))
-            self.update_status_safe(0, self._("status_updating_json", "Updating ventoy.json..."), 100)
-            try:
-                with open(json_path, 'w', encoding='utf-8') as f:
-                    json.dump(config, f, indent=4)
-                print(self._("print_saved_json_successfully", "Saved ventoy.json successfully."))
-                self.update_status_safe(0, self._("status_themes_applied_success", "Themes applied and config updated successfully!"), 100)
-                self.root.after(0, self.load_existing_themes)
-
-            except Exception as e:
-                self.show_message_safe("error", "error_json_write_title", "error_json_write_message",
-                                       title_key=self._("error_json_write_title", "JSON Write Error"),
-                                       message_key=self._("error_json_write_message", "Failed to save ventoy.json: {}.").format(e),
-                                       args=[])
-                self.update_status_safe(0, self._("status_task_failed", "Task failed."), 100)
-
-
-        except Exception as e:
-             error_message = self._("error_task_message", "An unexpected error occurred during task: {}\\n{}").format(str(e), traceback.format_exc())
-             print(error_message)
-             self.show_message_safe("error", "error_task_title", "",
-                                    title_key=self._("error_task_title", "Task Error"),
-                                    message_key="",
-                                    args=[error_message])
-             self.update_status_safe(0, self._("status_apply_theme_task_failed", "Theme application task failed."), 100)
+        self.add_footer_links()
 
-        finally:
-            self.set_buttons_state(tk.NORMAL)
-            self.root.after(500, lambda: self.update_status_safe(0, self._("status_ready", "Status - READY"), 0))
+    def confirm_overwrite(self, theme_name):
+        result_queue = queue.Queue(maxsize=1)
+        self.ui_bus.post(self._show_overwrite_dialog_threaded, theme_name, result_queue)
+        try:
+            overwrite_confirmed = result_queue.get(block=True)
+            print(f"Received confirmation for '{theme_name}': {overwrite_confirmed}")
+            return overwrite_confirmed
+        except Exception as e:
+            print(f"Error while waiting for overwrite confirmation for '{theme_name}': {e}")
+            self.show_message_safe("error", "error_task_title", "error_task_message",
+                                   title_key=self._("error_task_title", "Task Error"),
+                                   message_key=self._("error_task_message", "An unexpected error occurred during task: {}\\n{}").format(f"Failed to get confirmation for theme '{theme_name}'. Skipping this theme.", ""),
+                                   args=[])
+            return False
 
     def start_apply_theme_thread(self):
         if self.worker_thread and self.worker_thread.is_alive():
@@ -1378,98 +4626,109 @@ class VentoyThemer:
              return
 
         self.reset_status()
-        self.set_buttons_state(tk.DISABLED)
-        self.worker_thread = threading.Thread(target=self.apply_theme_task, args=(self.current_drive, self.theme_sources_paths.copy()))
+        self.begin_task(0)
+        self.worker_thread = threading.Thread(target=self.apply_theme_task, args=(self.current_drive, self.theme_sources_paths.copy(), self.stage_on_host_var.get(),
+                                                                                     self.selected_sync_mode()))
         self.worker_thread.start()
 
-    def apply_settings_task(self, drive):
-
-        try:
-            json_path = os.path.join(drive, VENTOY_JSON_PATH)
-            if not os.path.exists(json_path):
-                 self.show_message_safe("warning", "warning_ventoy_json_not_found_settings_title", "warning_ventoy_json_not_found_settings_message")
-                 return
-            try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                     config = json.load(f)
-            except json.JSONDecodeError:
-                self.show_message_safe("error", "error_json_read_settings_title", "error_json_read_settings_message", drive=drive)
-                return
-            except PermissionError:
-                self.show_message_safe("error", "permission_error_title", "error_permission_read_json_settings_message", drive=drive)
-                return
-            except Exception as e:
-                 self.show_message_safe("error", "generic_error_title", "error_unexpected_read_json_settings_message", str(e))
-                 return
-            config.setdefault('theme', {})
-            theme_config = config['theme']
-            sel = self.default_theme_var.get()
-            theme_paths_in_json = theme_config.get('file', [])
-            theme_names_in_json = [os.path.basename(os.path.dirname(p)) for p in theme_paths_in_json if p and os.path.dirname(p)]
-            if sel == self._("option_random_theme", "Random Theme"):
-                theme_config['default_file'] = 0
-            elif sel and sel in theme_names_in_json:
-                 try:
-                      target_suffix_txt = f"/{sel}/theme.txt"
-                      target_suffix_dir = f"/{sel}"
-
-                      index_in_json = -1
-                      for i, p in enumerate(theme_paths_in_json):
-                          if not p or not isinstance(p, str):
-                              continue
-                          p_lower = p.lower().replace("\\", "/")
-                          target_suffix_txt_lower = target_suffix_txt.lower().replace("\\", "/")
-                          target_suffix_dir_lower = target_suffix_dir.lower().replace("\\", "/")
-                          if p_lower.endswith(target_suffix_txt_lower) or p_lower == target_suffix_dir_lower:
-                              index_in_json = i
-                              break
-
-                      if index_in_json != -1:
-                          theme_config['default_file'] = index_in_json + 1
-                      else:
-                          print(self._("print_warning_selected_default_theme_not_found_load", "Selected default theme '{}' not found in ventoy.json. Resetting to Random Theme.").format(sel))
-                          theme_config['default_file'] = 0
-                          self.root.after(0, self.default_theme_var.set, self._("option_random_theme", "Random Theme"))
-
-                 except Exception as e:
-                      print(self._("print_error_finding_theme_index", "Error finding theme index in JSON: {}").format(e))
-                      theme_config['default_file'] = 0
-                      self.root.after(0, self.default_theme_var.set, self._("option_random_theme", "Random Theme"))
-
-
-            else:
-                 self.show_message_safe("warning", "warning_select_drive_title", "warning_selected_default_theme_not_found", sel)
-                 if self._("option_random_theme", "Random Theme") not in self.default_theme_combo['values']:
-                      current_values = list(self.default_theme_combo['values'])
-                      current_values.insert(0, self._("option_random_theme", "Random Theme"))
-                      self.root.after(0, self.default_theme_combo.config, {'values': current_values})
-                 self.root.after(0, self.default_theme_var.set, self._("option_random_theme", "Random Theme"))
-                 theme_config['default_file'] = 0
-            resolution = self.resolution_var.get()
-            if resolution in self.resolution_combo['values']:
-                 theme_config['gfxmode'] = resolution
-            else:
-                 print(self._("warning_resolution_not_in_list", "Warning: Selected resolution '{resolution}' is not in the allowed list. Keeping current or default.").format(resolution=resolution))
-                 if 'gfxmode' not in theme_config or theme_config['gfxmode'] not in self.resolution_combo['values']:
-                      theme_config['gfxmode'] = 'max'
-            try:
-                with open(json_path, 'w', encoding='utf-8') as f:
-                     json.dump(config, f, indent=4)
-                self.root.after(0, self.load_existing_themes)
-
-            except PermissionError:
-                self.show_message_safe("error", "permission_error_title", "error_permission_write_json_settings_message", drive=drive)
-                return
-            except Exception as e:
-                self.show_message_safe("error", "error_unexpected_settings_title", "error_unexpected_write_json_settings_message", str(e))
-                return
+    def show_install_options(self):
+        dialog = tk.Toplevel(self.root)
+        dialog.title(self._("install_options_label", "Install Options"))
+        dialog.transient(self.root)
+        dialog.resizable(False, False)
+
+        self.stage_on_host_check = ttk.Checkbutton(dialog,
+                                                   text=self._("stage_on_host_checkbox", "Stage on this PC before writing"),
+                                                   variable=self.stage_on_host_var,
+                                                   takefocus=False)
+        self.stage_on_host_check.pack(padx=OUTER_PADDING, pady=WIDGET_SPACING, anchor="w")
+
+        self.sync_existing_check = ttk.Checkbutton(dialog,
+                                                   text=self._("sync_existing_checkbox", "Update installed themes incrementally"),
+                                                   variable=self.sync_existing_var,
+                                                   takefocus=False)
+        self.sync_existing_check.pack(padx=OUTER_PADDING, pady=WIDGET_SPACING, anchor="w")
+
+        self.sync_verify_hash_check = ttk.Checkbutton(dialog,
+                                                      text=self._("sync_verify_hash_checkbox", "Compare file contents when updating"),
+                                                      variable=self.sync_verify_hash_var,
+                                                      takefocus=False)
+        self.sync_verify_hash_check.pack(padx=OUTER_PADDING, pady=WIDGET_SPACING, anchor="w")
+
+        self.skip_unused_files_check = ttk.Checkbutton(dialog,
+                                                       text=self._("skip_unused_files_checkbox", "Skip files the theme does not use"),
+                                                       variable=self.skip_unused_files_var,
+                                                       command=self.on_skip_unused_files_toggled,
+                                                       takefocus=False)
+        self.skip_unused_files_check.pack(padx=OUTER_PADDING, pady=WIDGET_SPACING, anchor="w")
+
+        self.optimize_images_check = ttk.Checkbutton(dialog,
+                                                     text=self._("optimize_images_checkbox", "Optimize theme images for the drive's resolution"),
+                                                     variable=self.optimize_images_var,
+                                                     command=self.on_optimize_images_toggled,
+                                                     takefocus=False)
+        self.optimize_images_check.pack(padx=OUTER_PADDING, pady=WIDGET_SPACING, anchor="w")
+
+        ttk.Button(dialog, text=self._("ok_button", "OK"), command=dialog.destroy,
+                   style="RoundedButton.TButton", takefocus=False).pack(pady=OUTER_PADDING)
+
+        dialog.grab_set()
+        self.root.wait_window(dialog)
+
+    def select_target_drives(self):
+        """Shows a modal list of the connected drives and returns the chosen drive letters."""
+        values = self.drive_inventory.displays()
+        selected = []
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title(self._("dialog_select_drives_title", "Select Target Drives"))
+        dialog.transient(self.root)
+        dialog.resizable(False, False)
+
+        title_label = ttk.Label(dialog, text=self._("select_drives_label", "Install the theme list to:"), style="Courier.TLabel")
+        title_label.pack(padx=OUTER_PADDING, pady=(OUTER_PADDING, TITLE_SPACING), anchor="w")
+
+        listbox = tk.Listbox(dialog, selectmode=tk.MULTIPLE, height=8, width=40, exportselection=False)
+        for value in values:
+            listbox.insert(tk.END, value)
+        current_drive = self.drive_var.get()
+        if current_drive in values:
+            listbox.selection_set(values.index(current_drive))
+        listbox.pack(fill="both", expand=True, padx=OUTER_PADDING, pady=0)
+
+        def on_ok():
+            selected.extend(extract_drive_letter(values[i]) for i in listbox.curselection())
+            dialog.destroy()
+
+        btn_frame = ttk.Frame(dialog)
+        btn_frame.pack(pady=OUTER_PADDING)
+        ttk.Button(btn_frame, text=self._("ok_button", "OK"), command=on_ok,
+                   style="RoundedButton.TButton", takefocus=False).pack(side="left", padx=WIDGET_SPACING)
+        ttk.Button(btn_frame, text=self._("cancel_button", "Cancel"), command=dialog.destroy,
+                   style="RoundedButton.TButton", takefocus=False).pack(side="left", padx=WIDGET_SPACING)
+
+        dialog.grab_set()
+        self.root.wait_window(dialog)
+        return [drive for drive in selected if drive]
+
+    def start_apply_theme_to_drives_thread(self):
+        if self.worker_thread and self.worker_thread.is_alive():
+            self.show_message_safe("warning", "warning_busy_title", "warning_busy_message")
+            return
 
+        if not self.theme_sources_paths:
+            self.show_message_safe("warning", "warning_select_drive_title", "warning_no_theme_archive_selected_message")
+            return
 
-        except Exception as e:
-             self.show_message_safe("error", "error_unexpected_settings_title", "error_unexpected_settings_message", str(e), traceback.format_exc())
+        drives = self.select_target_drives()
+        if not drives:
+            return
 
-        finally:
-            self.set_buttons_state(tk.NORMAL)
+        self.reset_status()
+        self.begin_task(0)
+        self.worker_thread = threading.Thread(target=self.apply_theme_to_drives_task, args=(drives, self.theme_sources_paths.copy(), self.stage_on_host_var.get(),
+                                                                                               self.selected_sync_mode()))
+        self.worker_thread.start()
 
     def start_apply_settings_thread(self):
          if self.worker_thread and self.worker_thread.is_alive():
@@ -1492,245 +4751,11 @@ class VentoyThemer:
                                      message_key=self._("error_drive_letter_message", "Could not determine drive letter."))
               return
 
-         self.set_buttons_state(tk.DISABLED)
-         self.worker_thread = threading.Thread(target=self.apply_settings_task, args=(self.current_drive,))
+         self.begin_task(1)
+         self.worker_thread = threading.Thread(target=self.apply_settings_task,
+                                               args=(self.current_drive, self.default_theme_var.get(), self.resolution_var.get()))
          self.worker_thread.start()
 
-    def remove_theme_task(self, drive, selected_theme):
-
-        try:
-            json_path = os.path.join(drive, VENTOY_JSON_PATH)
-            theme_dir = os.path.join(drive, THEMES_DIR_NAME, selected_theme)
-            MAX_STATUS_LENGTH = 50
-            prefix_del = self._("status_deleting_theme_prefix", "Deleting theme '")
-            suffix_del = self._("status_deleting_theme_suffix", "'...")
-            available_length_del = MAX_STATUS_LENGTH - len(prefix_del) - len(suffix_del)
-            short_name_del = selected_theme if len(selected_theme) <= available_length_del else selected_theme[:available_length_del - 3] + "..."
-            self.update_status_safe(2, f"{prefix_del}{short_name_del}{suffix_del}", 10)
-            try:
-                if os.path.exists(theme_dir):
-                    shutil.rmtree(theme_dir)
-                    print(self._("print_theme_folder_deleted", "Theme folder deleted: {}").format(theme_dir))
-                else:
-                    print(self._("print_warning_theme_folder_not_found_skip", "Warning: Theme folder not found, skipping deletion: {}").format(theme_dir))
-            except FileNotFoundError:
-                print(self._("print_warning_theme_folder_not_found_during_delete", "Warning: Theme folder not found during deletion (already removed?): {}").format(theme_dir))
-            except PermissionError:
-                self.show_message_safe("error", "permission_error_title", "error_permission_deleting_folder",
-                                       title_key=self._("permission_error_title", "Permission Error"),
-                                       message_key=self._("error_permission_deleting_folder", "Permission denied while deleting folder: {}\\n\\nMake sure the folder is not in use and you have necessary permissions.").format(selected_theme),
-                                       args=[])
-                self.update_status_safe(2, self._("status_failed_delete_theme_folder", "Failed to delete theme folder."), 40)
-                self.show_message_safe("warning", "warning_partial_deletion_title", "warning_partial_deletion_message_permission",
-                                       title_key=self._("warning_partial_deletion_title", "Partial Deletion"),
-                                       message_key=self._("warning_partial_deletion_message_permission", "Could not delete theme folder '{}' due to permissions. Attempting to update ventoy.json.").format(selected_theme),
-                                       args=[])
-            except Exception as e:
-                self.show_message_safe("error", "generic_error_title", "error_unexpected_deleting_theme_folder",
-                                       title_key=self._("generic_error_title", "Error"),
-                                       message_key=self._("error_unexpected_deleting_theme_folder", "An unexpected error occurred while deleting theme folder: {}").format(str(e)),
-                                       args=[])
-                self.update_status_safe(2, self._("status_failed_delete_theme_folder", "Failed to delete theme folder."), 40)
-                self.show_message_safe("warning", "warning_partial_deletion_title", "warning_partial_deletion_message_unexpected",
-                                       title_key=self._("warning_partial_deletion_title", "Partial Deletion"),
-                                       message_key=self._("warning_partial_deletion_message_unexpected", "Could not delete theme folder '{}' due to an unexpected error. Attempting to update ventoy.json.").format(selected_theme),
-                                       args=[])
-            self.update_status_safe(2, self._("status_updating_config", "Updating config file..."), 60)
-            if os.path.exists(json_path):
-                try:
-                    with open(json_path, 'r', encoding='utf-8') as f:
-                         config = json.load(f)
-                except json.JSONDecodeError:
-                    self.show_message_safe("error", "error_json_read_remove_title", "error_json_read_remove_message",
-                                           title_key=self._("error_json_read_remove_title", "JSON Error"),
-                                           message_key=self._("error_json_read_remove_message", "Failed to read ventoy.json on {drive}. File might be corrupted. Cannot update config.").format(drive=drive),
-                                           args=[])
-                    self.update_status_safe(2, self._("status_failed_update_config", "Failed to update config."), 100)
-                    self.show_message_safe("info", "dialog_deletion_status_title", "dialog_deletion_status_json_error",
-                                           title_key=self._("dialog_deletion_status_title", "Deletion Status"),
-                                           message_key=self._("dialog_deletion_status_json_error", "Theme folder '{}' deletion attempted, but ventoy.json could not be updated due to a JSON error.").format(selected_theme),
-                                           args=[])
-                    self.root.after(0, self.load_existing_themes)
-                    return
-
-                except PermissionError:
-                    self.show_message_safe("error", "permission_error_title", "error_permission_read_json_remove_message",
-                                           title_key=self._("permission_error_title", "Permission Error"),
-                                           message_key=self._("error_permission_read_json_remove_message", "Permission denied while reading ventoy.json on {drive}. Cannot update config.").format(drive=drive),
-                                           args=[])
-                    self.update_status_safe(2, self._("status_failed_update_config", "Failed to update config."), 100)
-                    self.show_message_safe("info", "dialog_deletion_status_title", "dialog_deletion_status_permission_error",
-                                           title_key=self._("dialog_deletion_status_title", "Deletion Status"),
-                                           message_key=self._("dialog_deletion_status_permission_error", "Theme folder '{}' deletion attempted, but ventoy.json could not be updated due to a permission error.").format(selected_theme),
-                                           args=[])
-                    self.root.after(0, self.load_existing_themes)
-                    return
-
-                except Exception as e:
-                    self.show_message_safe("error", "generic_error_title", "error_unexpected_read_json_remove_message",
-                                           title_key=self._("generic_error_title", "Error"),
-                                           message_key=self._("error_unexpected_read_json_remove_message", "An unexpected error occurred while reading ventoy.json: {}").format(str(e)),
-                                           args=[])
-                    self.update_status_safe(2, self._("status_failed_update_config", "Failed to update config."), 100)
-                    self.show_message_safe("info", "dialog_deletion_status_title", "dialog_deletion_status_unexpected_error",
-                                           title_key=self._("dialog_deletion_status_title", "Deletion Status"),
-                                           message_key=self._("dialog_deletion_status_unexpected_error", "Theme folder '{}' deletion attempted, but ventoy.json could not be updated due to an unexpected error.").format(selected_theme),
-                                           args=[])
-                    self.root.after(0, self.load_existing_themes)
-                    return
-
-
-                if 'theme' in config:
-                    normalized_theme_dir_on_drive = os.path.normpath(theme_dir)
-                    def is_path_inside_deleted_theme_dir(ventoy_json_path):
-                         if not ventoy_json_path or not isinstance(ventoy_json_path, str):
-                             return False
-                         try:
-                             full_path_on_drive = os.path.normpath(os.path.join(drive, ventoy_json_path.lstrip('/')))
-                             return full_path_on_drive.startswith(normalized_theme_dir_on_drive + os.sep) or full_path_on_drive == normalized_theme_dir_on_drive
-                         except Exception:
-                             return False
-                    config['theme']['file'] = [
-                         p for p in config['theme'].get('file', [])
-                         if not is_path_inside_deleted_theme_dir(p)
-                    ]
-                    config['theme']['fonts'] = [
-                         f for f in config['theme'].get('fonts', [])
-                         if not is_path_inside_deleted_theme_dir(f)
-                    ]
-                    config['theme']['images'] = [
-                         img for img in config['theme'].get('images', [])
-                         if not is_path_inside_deleted_theme_dir(img)
-                    ]
-                    current_default_index = config['theme'].get('default_file', 0)
-                    if current_default_index > 0:
-                         if current_default_index > len(config['theme']['file']):
-                              print(self._("print_resetting_default_theme_to_random", "Resetting default theme to Random."))
-                              config['theme']['default_file'] = 0
-                    try:
-                        with open(json_path, 'w', encoding='utf-8') as f:
-                             json.dump(config, f, indent=4)
-                        print(self._("print_updated_json_successfully", "Updated ventoy.json successfully."))
-                    except PermissionError:
-                        self.show_message_safe("error", "permission_error_title", "error_permission_write_json_settings_message",
-                                               title_key=self._("permission_error_title", "Permission Error"),
-                                               message_key=self._("error_permission_write_json_settings_message", "Permission denied while writing to ventoy.json on {drive}. Make sure you have write access.").format(drive=drive),
-                                               args=[])
-                        self.update_status_safe(2, self._("status_failed_update_config", "Failed to update config."), 100)
-                        return
-                    except Exception as e:
-                        self.show_message_safe("error", "generic_error_title", "error_unexpected_write_json_settings_message",
-                                               title_key=self._("generic_error_title", "Error"),
-                                               message_key=self._("error_unexpected_write_json_settings_message", "An unexpected error occurred while writing to ventoy.json: {}").format(str(e)),
-                                               args=[])
-                        self.update_status_safe(2, self._("status_failed_update_config", "Failed to update config."), 100)
-                        return
-
-                else:
-                    self.show_message_safe("info", "dialog_deletion_status_title", "info_themes_deleted_json_not_found_message",
-                                           title_key=self._("dialog_deletion_status_title", "Deletion Status"),
-                                           message_key=self._("info_themes_deleted_json_not_found_message", "Themes deleted, but ventoy.json not found."))
-
-
-            self.update_status_safe(2, self._("status_config_update_processed", "Config update processed."), 80)
-            self.root.after(0, self.load_existing_themes)
-
-            prefix_done = self._("status_theme_deletion_finished_prefix", "Theme '")
-            suffix_done = self._("status_theme_deletion_finished_suffix", "' deletion process finished.")
-            available_length_done = MAX_STATUS_LENGTH - len(prefix_done) - len(suffix_done)
-            short_name_done = selected_theme if len(selected_theme) <= available_length_done else selected_theme[:available_length_done - 3] + "..."
-            self.update_status_safe(2, f"{prefix_done}{short_name_done}{suffix_done}", 100)
-
-
-        except Exception as e:
-            self.show_message_safe("error", "generic_error_title", "error_during_theme_deletion_task",
-                                   title_key=self._("generic_error_title", "Error"),
-                                   message_key=self._("error_during_theme_deletion_task", "Error during theme deletion task: {}\\n{}").format(str(e), traceback.format_exc()),
-                                   args=[])
-            self.update_status_safe(2, self._("status_unexpected_error_deletion", "An unexpected error occurred during deletion."), 100)
-
-
-        finally:
-            self.set_buttons_state(tk.NORMAL)
-            self.root.after(500, lambda: self.update_status_safe(2, self._("status_ready", "Status - READY"), 0))
-
-
-    def remove_all_themes_task(self, drive):
-        try:
-            theme_dir = os.path.join(drive, "ventoy", "theme")
-            json_file_path = os.path.join(drive, "ventoy", "ventoy.json")
-            themes_to_delete = []
-            if os.path.exists(theme_dir) and os.path.isdir(theme_dir):
-                try:
-                    themes_to_delete = [item for item in os.listdir(theme_dir) if os.path.isdir(os.path.join(theme_dir, item))]
-                except PermissionError:
-                    self.show_message_safe("error", "permission_error_title", "error_permission_listing_theme_dir")
-                    self.update_status_safe(2, self._("status_failed_list_themes_for_deletion", "Failed to list themes for deletion."), 100)
-                except Exception as e:
-                    self.show_message_safe("error", "generic_error_title", "error_listing_theme_directory", str(e))
-                    self.update_status_safe(2, self._("status_failed_list_themes_for_deletion", "Failed to list themes for deletion."), 100)
-
-            total = len(themes_to_delete)
-            if total == 0:
-                self.update_status_safe(2, self._("status_no_themes_found_in_directory", "No themes found in directory to delete."), 100)
-            else:
-                for idx, theme in enumerate(themes_to_delete, start=1):
-                    theme_path = os.path.join(theme_dir, theme)
-                    MAX_STATUS_LENGTH = 50
-                    prefix = self._("status_deleting_short_prefix", "Deleting ")
-                    suffix = self._("status_deleting_short_suffix", "...")
-                    max_length = MAX_STATUS_LENGTH - len(prefix) - len(suffix)
-                    short_name = theme if len(theme) <= max_length else theme[:max_length - 3] + "..."
-                    self.update_status_safe(2, f"{prefix}{short_name}{suffix}", (idx / total) * 100)
-                    try:
-                        shutil.rmtree(theme_path)
-                        print(self._("print_theme_folder_deleted", "Theme folder deleted: {}").format(theme_path))
-                    except FileNotFoundError:
-                        print(self._("print_warning_theme_folder_not_found_during_delete", "Warning: Theme folder not found during deletion (already removed?): {}").format(theme_path))
-                    except PermissionError:
-                        self.show_message_safe("error", "permission_error_title", "error_permission_deleting_folder", theme)
-                        continue
-
-                    except Exception as e:
-                        self.show_message_safe("error", "generic_error_title", "error_deleting_theme_file", theme, str(e))
-                        continue
-            if os.path.exists(json_file_path):
-                try:
-                    self.update_status_safe(2, self._("status_updating_config", "Updating config file..."), 80)
-                    with open(json_file_path, 'r', encoding='utf-8') as f:
-                         config = json.load(f)
-                    if 'theme' in config:
-                         config['theme']['file'] = []
-                         config['theme']['fonts'] = []
-                         config['theme']['images'] = []
-                         config['theme']['default_file'] = 0
-                    with open(json_file_path, 'w', encoding='utf-8') as f:
-                         json.dump(config, f, indent=4)
-                    print(self._("print_updated_json_successfully", "Updated ventoy.json successfully."))
-                    self.update_status_safe(2, self._("status_config_update_processed", "Config update processed."), 90)
-
-                except json.JSONDecodeError:
-                    self.show_message_safe("error", "error_json_read_remove_title", "error_json_corrupted_message")
-                    self.update_status_safe(2, self._("status_failed_update_ventoy_json_remove", "Failed to update ventoy.json."), 100)
-                except PermissionError:
-                    self.show_message_safe("error", "permission_error_title", "error_permission_writing_ventoy_json_remove")
-                    self.update_status_safe(2, self._("status_failed_update_ventoy_json_remove", "Failed to update ventoy.json."), 100)
-                except Exception as e:
-                    self.show_message_safe("error", "generic_error_title", "error_failed_update_ventoy_json_remove", str(e))
-                    self.update_status_safe(2, self._("status_failed_update_ventoy_json_remove", "Failed to update ventoy.json."), 100)
-            elif total > 0:
-                self.show_message_safe("info", "generic_info_title", "info_themes_deleted_json_not_found_message")
-            self.update_status_safe(2, self._("status_all_themes_removed_config_updated", "All themes removed and config updated."), 100)
-            self.root.after(0, self.load_existing_themes)
-
-        except Exception as e:
-            self.show_message_safe("error", "generic_error_title", "error_during_remove_all_themes_task", str(e), traceback.format_exc())
-            self.update_status_safe(2, self._("status_unexpected_error_remove_all", "Unexpected error occurred."), 100)
-
-        finally:
-            self.set_buttons_state(tk.NORMAL)
-            self.root.after(500, lambda: self.update_status_safe(2, self._("status_ready", "Status - READY"), 0))
-
     def start_remove_theme_thread(self):
         if self.worker_thread and self.worker_thread.is_alive():
             self.show_message_safe("warning", "warning_busy_title", "warning_busy_message")
@@ -1741,21 +4766,25 @@ class VentoyThemer:
             self.show_message_safe("warning", "warning_select_drive_title", "warning_select_drive_message")
             return
 
-        selected = self.remove_theme_combo.get()
-        if not selected or selected == self._("option_select_theme_to_delete", "Select a theme to delete"):
+        selected = [self.remove_theme_listbox.get(i) for i in self.remove_theme_listbox.curselection()]
+        if not selected:
             self.show_message_safe("warning", "warning_select_drive_title", "warning_no_theme_selected_to_delete_message")
             return
 
         drive = extract_drive_letter(drive_display)
-        theme_dir = os.path.join(drive, THEMES_DIR_NAME, selected)
+        missing = [os.path.join(drive, THEMES_DIR_NAME, theme) for theme in selected
+                   if not os.path.exists(os.path.join(drive, THEMES_DIR_NAME, theme))]
 
-        if not os.path.exists(theme_dir):
-            self.show_message_safe("error", "generic_error_title", "error_theme_folder_not_found_message", theme_dir)
-            self.root.after(0, self.load_existing_themes)
+        if missing:
+            self.show_message_safe("error", "generic_error_title", "error_theme_folder_not_found_message", ", ".join(missing))
+            self.load_existing_themes()
             return
 
-        confirm = messagebox.askyesno(self._("dialog_confirm_delete_theme_title", "Confirm"),
-                                     self._("dialog_confirm_delete_theme_message", "ARE YOU SURE YOU WANT TO DELETE THIS THEME?\\n\\nTHIS PROCESS CANNOT BE UNDONE!"))
+        if len(selected) == 1:
+            confirm_message = self._("dialog_confirm_delete_theme_message", "ARE YOU SURE YOU WANT TO DELETE THIS THEME?\\n\\nTHIS PROCESS CANNOT BE UNDONE!")
+        else:
+            confirm_message = self._("dialog_confirm_delete_themes_message", "ARE YOU SURE YOU WANT TO DELETE THESE {} THEMES?\\n\\nTHIS PROCESS CANNOT BE UNDONE!").format(len(selected))
+        confirm = messagebox.askyesno(self._("dialog_confirm_delete_theme_title", "Confirm"), confirm_message)
         if not confirm:
             return
 
@@ -1765,8 +4794,8 @@ class VentoyThemer:
              return
 
         self.reset_status()
-        self.set_buttons_state(tk.DISABLED)
-        self.worker_thread = threading.Thread(target=self.remove_theme_task, args=(self.current_drive, selected))
+        self.begin_task(2)
+        self.worker_thread = threading.Thread(target=self.remove_themes_task, args=(self.current_drive, selected))
         self.worker_thread.start()
 
     def start_remove_all_themes_thread(self):
@@ -1808,11 +4837,213 @@ class VentoyThemer:
             return
 
         self.reset_status()
-        self.set_buttons_state(tk.DISABLED)
+        self.begin_task(2)
         self.worker_thread = threading.Thread(target=self.remove_all_themes_task, args=(self.current_drive,))
         self.worker_thread.start()
 
+class HeadlessThemer(VentoyThemerCore):
+    """Runs the core tasks without a window, writing JSON lines to `stream`."""
+
+    def __init__(self, stream, overwrite_existing=False, install_workers=INSTALL_WORKERS):
+        super().__init__()
+        self.stream = stream
+        self.overwrite_existing = overwrite_existing
+        self.install_workers = max(1, install_workers)
+        self.error_count = 0
+        self._emit_lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        record = {"event": event}
+        record.update(fields)
+        with self._emit_lock:
+            if self.stream is not None:
+                self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self.stream.flush()
+
+    def update_status_safe(self, tab_index, message, progress=None):
+        self.emit("progress", task=CLI_TASK_NAMES[tab_index], message=message, percent=progress)
+
+    def show_message_safe(self, type, *args, **kwargs):
+        title, message = self.format_message(*args, **kwargs)
+        if type == "error":
+            self.error_count += 1
+        self.emit("message", level=type, title=title, message=message)
+
+
+CLI_TASK_NAMES = ("install", "settings", "remove")
+
+
+def normalize_drive(drive):
+    """Turns 'E', 'E:' or 'E:\\' into the 'E:\\' form the tasks expect."""
+    drive = drive.strip()
+    if len(drive) <= 2 and drive[:1].isalpha():
+        return drive[0].upper() + ":\\"
+    return drive
+
+
+def cli_sync_mode(args):
+    if args.full:
+        return None
+    return SYNC_MODE_HASH if args.verify_hash else SYNC_MODE_METADATA
+
+
+def build_cli_parser():
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="VentoyThemer",
+        description="Install, configure and remove Ventoy GRUB themes without the GUI. "
+                    "Progress is written to stdout as JSON lines.")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    list_parser = commands.add_parser("list", help="list Ventoy drives, or the themes on one drive")
+    list_parser.add_argument("--drive", help="drive to list installed themes for")
+    list_parser.add_argument("--all", action="store_true", help="also list drives that are not Ventoy drives")
+
+    install_parser = commands.add_parser("install", help="install theme archives or folders")
+    install_parser.add_argument("--drive", action="append", required=True,
+                                help="target drive; repeat to install to several drives")
+    install_parser.add_argument("--overwrite", action="store_true", help="replace themes that are already installed")
+    install_parser.add_argument("--direct", action="store_true",
+                                help="extract straight onto the drive instead of staging on the host")
+    install_parser.add_argument("--jobs", type=int, default=INSTALL_WORKERS, metavar="N",
+                                help="number of themes extracted in parallel (default: %(default)s)")
+    install_parser.add_argument("--force", action="store_true",
+                                help="install even to drives that do not look like Ventoy drives")
+    install_parser.add_argument("--full", action="store_true",
+                                help="rewrite installed themes in full instead of updating only changed files")
+    install_parser.add_argument("--verify-hash", action="store_true",
+                                help="compare file contents, not just size and time, when updating installed themes")
+    install_parser.add_argument("--skip-unused", action="store_true",
+                                help="extract only the files the theme uses, skipping previews, design sources and READMEs")
+    install_parser.add_argument("--keep", action="append", default=[], metavar="PATTERN",
+                                help="with --skip-unused, also keep archive members matching PATTERN, e.g. '*.txt'; repeatable; implies --skip-unused")
+    install_parser.add_argument("--optimize-images", action="store_true",
+                                help="recompress PNGs and scale down images larger than the drives' gfxmode (needs Pillow)")
+    install_parser.add_argument("sources", nargs="+", help="theme archives or folders")
+
+    check_parser = commands.add_parser("check", help="report missing and unused files of theme archives or folders")
+    check_parser.add_argument("sources", nargs="+", help="theme archives or folders")
+
+    remove_parser = commands.add_parser("remove", help="remove installed themes")
+    remove_parser.add_argument("--drive", required=True)
+    remove_group = remove_parser.add_mutually_exclusive_group(required=True)
+    remove_group.add_argument("--all", action="store_true", help="remove every theme and reset ventoy.json")
+    remove_group.add_argument("themes", nargs="*", default=[], help="theme folder names to remove")
+
+    default_parser = commands.add_parser("set-default", help="set the default theme and resolution")
+    default_parser.add_argument("--drive", required=True)
+    default_parser.add_argument("--resolution", choices=RESOLUTIONS)
+    default_parser.add_argument("theme", help="name of the folder holding the theme's theme.txt, or 'random'")
+    return parser
+
+
+def cli_main(argv):
+    """Entry point for the command-line front-end; returns the process exit code."""
+    args = build_cli_parser().parse_args(argv)
+    stream = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        themer = HeadlessThemer(stream, overwrite_existing=getattr(args, "overwrite", False),
+                                install_workers=getattr(args, "jobs", INSTALL_WORKERS))
+
+        def run_command():
+            try:
+                if args.command == "list":
+                    if args.drive:
+                        drive = normalize_drive(args.drive)
+                        for name, registered in themer.list_installed_themes(drive):
+                            themer.emit("theme", drive=drive, name=name, registered=registered)
+                    else:
+                        for display in list_drives_display(ventoy_only=not args.all):
+                            themer.emit("drive", drive=extract_drive_letter(display), display=display)
+                elif args.command == "install":
+                    drives = [normalize_drive(d) for d in args.drive]
+                    verdicts = VentoyDetector().detect(drives)
+                    not_ventoy = [drive for drive in drives if not verdicts.get(drive)]
+                    if not_ventoy and not args.force:
+                        raise Exception(themer._("error_not_ventoy_drive", "Not a Ventoy drive: {}. Use --force to install anyway.").format(", ".join(not_ventoy)))
+                    # The probes below are cached per filter, so it is set first and the install reuses them.
+                    themer.member_filter = ThemeMemberFilter(THEME_MEMBER_ALLOW_PATTERNS + tuple(args.keep)) if args.skip_unused or args.keep else None
+                    themer.optimize_images = args.optimize_images
+                    sources = []
+                    for source in (os.path.abspath(p) for p in args.sources):
+                        if os.path.isfile(source):
+                            try:
+                                if not themer.probe_theme_source(source).theme_txt:
+                                    raise Exception(themer._("reason_no_theme_txt", "no theme.txt inside"))
+                            except Exception as e:
+                                themer.emit("message", level="warning", title="Skipped", message=f"{os.path.basename(source)}: {e}")
+                                continue
+                        sources.append(source)
+                    if sources:
+                        themer.apply_theme_to_drives_task(drives, sources, stage_on_host=not args.direct,
+                                                         sync_mode=cli_sync_mode(args))
+                elif args.command == "check":
+                    # Every member counts here, so the unused ones can be reported.
+                    themer.member_filter = None
+                    for source in (os.path.abspath(p) for p in args.sources):
+                        try:
+                            check = themer.check_theme_source(source)
+                            if check is None:
+                                raise Exception(themer._("reason_no_theme_txt", "no theme.txt inside"))
+                        except Exception as e:
+                            themer.error_count += 1
+                            themer.emit("message", level="error", title="Error", message=f"{os.path.basename(source)}: {e}")
+                            continue
+                        if not check.ok:
+                            themer.error_count += 1
+                        themer.emit("check", source=source, ok=check.ok, theme_txt=check.theme_txt,
+                                    missing=[{"line": ref.line, "property": ref.property, "file": ref.value} for ref in check.missing],
+                                    errors=[{"line": line, "message": message} for line, message in check.errors],
+                                    unused=check.unused,
+                                    unknown_fonts=[{"line": ref.line, "property": ref.property, "font": ref.value}
+                                                   for ref in check.unknown_fonts])
+                elif args.command == "set-default":
+                    theme = args.theme
+                    if theme.lower() == "random":
+                        theme = themer._("option_random_theme", "Random Theme")
+                    themer.apply_settings_task(normalize_drive(args.drive), theme, args.resolution)
+                elif args.command == "remove":
+                    drive = normalize_drive(args.drive)
+                    if args.all:
+                        themer.remove_all_themes_task(drive)
+                    else:
+                        themer.remove_themes_task(drive, args.themes)
+            except Exception as e:
+                traceback.print_exc()
+                themer.error_count += 1
+                themer.emit("message", level="error", title="Error", message=str(e))
+
+        # The task runs in a worker so Ctrl+C can cancel it cooperatively. An
+        # Event is waited on instead of join(), which is not safe to interrupt.
+        done = threading.Event()
+
+        def run_worker():
+            try:
+                run_command()
+            finally:
+                done.set()
+
+        threading.Thread(target=run_worker, daemon=True).start()
+        while not done.is_set():
+            try:
+                done.wait(0.2)
+            except KeyboardInterrupt:
+                themer.cancel_token.cancel()
+                themer.emit("message", level="warning", title="Cancelled", message=themer._("status_cancelling", "Cancelling..."))
+    cancelled = themer.cancel_token.cancelled
+    themer.emit("result", command=args.command, ok=themer.error_count == 0 and not cancelled,
+                errors=themer.error_count, cancelled=cancelled)
+    if cancelled:
+        return 130
+    return 0 if themer.error_count == 0 else 1
+
+
 if __name__ == "__main__":
+    # Image optimizer workers re-run this script; in a frozen build they must stop here.
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        sys.exit(cli_main(sys.argv[1:]))
     root = TkinterDnD.Tk()
     app = VentoyThemer(root)
     root.mainloop()